@@ -0,0 +1,73 @@
+import os
+import sys
+import math
+import tempfile
+import importlib
+import multiprocessing
+from types import SimpleNamespace
+from contextlib import contextmanager
+
+# Benchmarks run as scripts from the repo root (python benchmarks/bench_x.py).
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def isolate(directory=None):
+    """Point every file, credential and external service at throwaway local values.
+
+    Must run before any bot module is imported: settings are read at import.
+    Returns the scratch directory.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="vyaara-bench-")
+    os.environ.update({
+        "TELEGRAM_TOKEN": "1:fake-benchmark-token",
+        "OPENAI_API_KEY": "sk-fake-benchmark",
+        "SHEETS_FAKE": "1",
+        "DB_FILE": os.path.join(directory, "database.json"),
+        "DB_SQLITE_FILE": os.path.join(directory, "database.db"),
+        "JOURNAL_QUEUE_FILE": os.path.join(directory, "journal_queue.db"),
+        "USER_ID_INDEX_FILE": os.path.join(directory, "user_id_index.json"),
+        "WARM_UP": "",
+    })
+    os.environ.pop("REPLY_CACHE_DISK", None)
+    return directory
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(math.ceil(pct / 100 * len(ordered))) - 1))]
+
+def latency_line(label, seconds):
+    """One-line p50/p95/p99/max summary of a list of durations, in milliseconds."""
+    ms = [s * 1000 for s in seconds]
+    return (f"{label:<22} n={len(ms):<7} p50={percentile(ms, 50):8.2f}ms  p95={percentile(ms, 95):8.2f}ms  "
+            f"p99={percentile(ms, 99):8.2f}ms  max={max(ms or [0]):8.2f}ms")
+
+# ==========================
+# 🧪 FAKE SERVERS OUT OF PROCESS
+# ==========================
+# The fake Telegram/OpenAI servers are plain threaded HTTP servers; run in
+# the benchmark's own process they would compete with the bot for the GIL
+# and inflate every latency. Each one gets its own process instead.
+def _serve(target, kwargs, conn):
+    module, name = target.split(":")
+    server = getattr(importlib.import_module(module), name)(**kwargs).start()
+    conn.send(server.base_url)
+    conn.recv()
+    conn.send(server.stats())
+    server.stop()
+
+@contextmanager
+def served_in_process(target, **kwargs):
+    """Run ``module:Class(**kwargs)`` in a child process; yields .base_url, then .stats after exit."""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.get_context("spawn").Process(target=_serve, args=(target, kwargs, child), daemon=True)
+    process.start()
+    proxy = SimpleNamespace(base_url=parent.recv(), stats={})
+    try:
+        yield proxy
+    finally:
+        parent.send("stop")
+        proxy.stats.update(parent.recv())
+        process.join(5)
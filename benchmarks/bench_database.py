@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import random
+import argparse
+import subprocess
+
+from _common import isolate, latency_line
+
+# ==========================
+# 💾 ONE (SIZE, BACKEND) RUN
+# ==========================
+# database.py keeps a process-wide store and reads DB_BACKEND at import,
+# so every combination runs in its own interpreter.
+def run_one(users, backend, lookups):
+    isolate()
+    os.environ["DB_BACKEND"] = backend
+    os.environ["DB_FLUSH_MAX_DIRTY"] = str(users + 1)  # flush only when asked to
+    os.environ["DB_FLUSH_INTERVAL"] = "3600"
+    import database
+    from storage import get_backend
+
+    timings = {}
+    started = time.perf_counter()
+    for user_id in range(users):
+        database.initialize_user(user_id)
+    timings["initialize"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    database.flush()
+    timings["flush all"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    loaded = get_backend(backend).load_all()
+    timings["cold load"] = time.perf_counter() - started
+    assert len(loaded) == users, f"loaded {len(loaded)} of {users} users"
+
+    rng = random.Random(7)
+    samples = []
+    for _ in range(lookups):
+        user_id = rng.randrange(users)
+        begin = time.perf_counter()
+        database.get_user_data(user_id)
+        samples.append(time.perf_counter() - begin)
+
+    for user_id in rng.sample(range(users), max(1, users // 100)):
+        database.set_last_sentiment(user_id, "positive")
+    started = time.perf_counter()
+    database.flush()
+    timings["flush 1%"] = time.perf_counter() - started
+
+    print(f"{users:>7} {backend:<7} " + "  ".join(f"{name}={seconds * 1000:9.1f}ms" for name, seconds in timings.items()))
+    print(f"{'':>15} " + latency_line("get_user_data", samples))
+
+# 🧪 Usage: python benchmarks/bench_database.py [--sizes 1000,10000,100000] [--backends json,sqlite]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="User store cost by size and backend")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--backends", default="json,sqlite")
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--one", nargs=2, metavar=("USERS", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        run_one(int(args.one[0]), args.one[1], args.lookups)
+        sys.exit(0)
+
+    print("💾 users backend  timings")
+    for size in args.sizes.split(","):
+        for backend in args.backends.split(","):
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--one", size.strip(), backend.strip(),
+                            "--lookups", str(args.lookups)], check=True)
@@ -0,0 +1,128 @@
+import os
+import time
+import random
+import asyncio
+import argparse
+
+from _common import isolate, latency_line, served_in_process
+
+# ==========================
+# 💬 SYNTHETIC TRAFFIC
+# ==========================
+MESSAGES = [
+    "i'm so tired today",
+    "feeling a bit lonely tonight",
+    "can you help me plan my career in data science?",
+    "I want to start a business, what strategy should I follow?",
+    "ok thanks",
+    "I am really happy and excited about my new job!",
+    "study at 7pm and workout at 6am",
+    "hello",
+]
+
+def make_update(update_id, chat_id, text):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": text,
+        },
+    }
+
+# ==========================
+# 🏁 REPLAY THROUGH handle_message
+# ==========================
+async def replay(args):
+    from telegram import Update
+    from telegram.ext import ExtBot
+    from telegram.request import HTTPXRequest
+    import services
+
+    with served_in_process("fake_telegram:FakeTelegram", latency=args.telegram_latency,
+                           error_rate=args.telegram_errors, flood_rate=args.telegram_floods) as telegram, \
+         served_in_process("fake_openai:FakeOpenAI", latency=args.openai_latency,
+                           token_delay=args.token_delay, error_rate=args.openai_errors) as openai:
+        os.environ["OPENAI_BASE_URL"] = openai.base_url
+        services.register("bot", lambda: ExtBot(
+            token=os.environ["TELEGRAM_TOKEN"], base_url=telegram.base_url,
+            request=HTTPXRequest(connection_pool_size=256),
+        ))
+        import bot as vyaara
+        import metrics
+
+        app = vyaara.build_application()
+        failures = []
+
+        async def on_error(update, context):
+            failures.append(context.error)
+
+        app.add_error_handler(on_error)
+        rng = random.Random(42)
+        latencies = []
+
+        async def one(update):
+            started = time.perf_counter()
+            await app.process_update(update)
+            latencies.append(time.perf_counter() - started)
+
+        async with app:
+            tasks = []
+            interval = 1 / args.rate if args.rate else 0
+            started = time.perf_counter()
+            for i in range(args.messages):
+                due = started + i * interval
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                data = make_update(i + 1, 1000 + rng.randrange(args.users), rng.choice(MESSAGES))
+                tasks.append(asyncio.create_task(one(Update.de_json(data, app.bot))))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+    if (os.cpu_count() or 1) < 3:
+        print("⚠️ Fewer than 3 CPUs: the fake servers share cores with the bot and inflate latency under load")
+    print(f"📨 {args.messages} messages from {args.users} users, target {args.rate or '∞'} msg/s, "
+          f"stream={'on' if vyaara.STREAM_REPLIES else 'off'}")
+    print(latency_line("handle_message", latencies))
+    print(f"{'throughput':<22} {len(latencies) / elapsed:.1f} msg/s over {elapsed:.2f}s, {len(failures)} handler errors")
+    print(f"{'telegram calls':<22} {dict(sorted(telegram.stats['calls'].items()))}")
+    print(f"{'openai requests':<22} {openai.stats['requests']}")
+    if failures:
+        kinds = {}
+        for error in failures:
+            kinds[type(error).__name__] = kinds.get(type(error).__name__, 0) + 1
+        print(f"{'handler errors':<22} {kinds} (first: {failures[0]!r})")
+    if metrics.METRICS_ENABLED:
+        print("\n⏱️ Mean time per stage")
+        for key, series in sorted(metrics.handler_stage_seconds._series.items()):
+            count = sum(series[:-1])
+            print(f"  {dict(key)['stage']:<14} {series[-1] / count * 1000:8.2f} ms  x{count}")
+
+# 🧪 Usage: python benchmarks/bench_handler.py --messages 2000 --rate 200 --openai-latency 0.5
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay synthetic updates through bot.handle_message")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=100, help="messages per second (0 = as fast as possible)")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--openai-latency", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--openai-errors", type=float, default=0.0)
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    parser.add_argument("--telegram-errors", type=float, default=0.0)
+    parser.add_argument("--telegram-floods", type=float, default=0.0)
+    parser.add_argument("--stream", choices=["0", "1"], default="0")
+    parser.add_argument("--no-cache", action="store_true", help="disable the reply cache")
+    parser.add_argument("--stages", action="store_true", help="enable metrics and print per-stage times")
+    args = parser.parse_args()
+
+    isolate()
+    os.environ["STREAM_REPLIES"] = args.stream
+    os.environ["STREAM_EDIT_INTERVAL"] = os.getenv("STREAM_EDIT_INTERVAL", "0.2")
+    if args.no_cache:
+        os.environ["REPLY_CACHE_ENABLED"] = "0"
+    if args.stages:
+        os.environ["METRICS_ENABLED"] = "1"
+    asyncio.run(replay(args))
@@ -0,0 +1,81 @@
+import re
+import time
+import argparse
+
+from _common import isolate
+
+# ==========================
+# 🌍 LABELLED SAMPLES
+# ==========================
+# (message, language the bot should reply in). The bot only replies in
+# English or Hindi, so romanised Hindi (Hinglish) is labelled "en".
+CORPUS = [
+    ("hi", "en"),
+    ("ok thanks", "en"),
+    ("i'm tired", "en"),
+    ("feeling sad today", "en"),
+    ("kya kar rahe ho", "en"),
+    ("acha theek hai", "en"),
+    ("lol that was funny", "en"),
+    ("I want to start a business but I don't know where to begin", "en"),
+    ("Can you help me plan my career in data science after college?", "en"),
+    ("my exams are coming and I feel so stressed about everything", "en"),
+    ("main bahut pareshan hoon aaj mera din bahut kharab gaya", "en"),
+    ("mujhe samajh nahi aa raha ki mere career ke liye kya sahi hai", "en"),
+    ("yaar aaj office mein bahut kaam tha aur boss ne daant diya", "en"),
+    ("मैं आज बहुत थका हुआ हूँ", "hi"),
+    ("मुझे अपने करियर के बारे में सलाह चाहिए", "hi"),
+    ("आज का दिन अच्छा था", "hi"),
+    ("नमस्ते", "hi"),
+    ("mera dimag kharab hai yaar", "en"),
+    ("good morning", "en"),
+    ("hola", "en"),
+]
+
+# ==========================
+# 🕰️ BASELINE DETECTOR
+# ==========================
+def legacy_detect(text):
+    """The per-message detection prompts.py used before language.py, unchanged."""
+    from langdetect import detect, LangDetectException
+    from language import GENZ_HINGLISH_SLANG
+
+    try:
+        # If slang or Hinglish-like words present, force English
+        words = set(re.findall(r'\b\w+\b', text.lower()))
+        if words & GENZ_HINGLISH_SLANG:
+            return "en"
+
+        detected = detect(text)
+        # If detected language is not en or hi and text is short, fallback to English
+        if detected not in ["en", "hi"] and len(text.split()) <= 5:
+            return "en"
+        return detected
+    except LangDetectException:
+        return "en"
+
+# ==========================
+# 📏 ACCURACY + SPEED
+# ==========================
+def run(rounds):
+    from language import detect_user_language
+
+    for name, fn in (("legacy", legacy_detect), ("fast", detect_user_language)):
+        wrong = [(text, fn(text)) for text, expected in CORPUS if fn(text) != expected]
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for text, _ in CORPUS:
+                fn(text)
+        per_call = (time.perf_counter() - started) / (rounds * len(CORPUS)) * 1e6
+        print(f"{name:>6}: accuracy {len(CORPUS) - len(wrong)}/{len(CORPUS)}, {per_call:.1f} µs/message")
+        for text, got in wrong:
+            print(f"        ✗ {text!r} -> {got}")
+
+# 🧪 Usage: python benchmarks/bench_language.py [--rounds 20]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reply-language detection: accuracy and cost per message")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    isolate()
+    run(args.rounds)
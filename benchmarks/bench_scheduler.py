@@ -0,0 +1,69 @@
+import time
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from _common import isolate, latency_line
+
+TIMEZONES = [None, "Asia/Kolkata", "Europe/London", "America/New_York", "America/Los_Angeles", "Asia/Tokyo",
+             "Australia/Sydney", "Europe/Berlin"]
+ACTIVITIES = ["study", "workout", "meditation", "reading", "yoga", "coding", "walk"]
+
+def synthetic_users(count, seed=11):
+    """Users with wake/sleep times and a few activities, spread over timezones."""
+    rng = random.Random(seed)
+    users = {}
+    for user_id in range(count):
+        activities = {name: f"{rng.randrange(24):02d}:{rng.randrange(60):02d}"
+                      for name in rng.sample(ACTIVITIES, rng.randrange(4))}
+        users[str(user_id)] = {
+            "wake_time": f"{rng.randrange(5, 10):02d}:{rng.choice((0, 15, 30, 45)):02d}",
+            "sleep_time": f"{rng.randrange(21, 24):02d}:{rng.choice((0, 30)):02d}",
+            "activities": activities,
+            "timezone": rng.choice(TIMEZONES),
+        }
+    return users
+
+# ==========================
+# ⏰ INDEX COST BY SIZE
+# ==========================
+def run(count, minutes):
+    from scheduler import ReminderIndex
+
+    users = synthetic_users(count)
+    now = datetime(2026, 3, 1, 0, 0, tzinfo=timezone.utc)
+    index = ReminderIndex()
+
+    started = time.perf_counter()
+    index.rebuild(users, now)
+    rebuild = time.perf_counter() - started
+
+    ticks, due = [], 0
+    for minute in range(1, minutes + 1):
+        begin = time.perf_counter()
+        due += len(index.pop_due(now + timedelta(minutes=minute)))
+        ticks.append(time.perf_counter() - begin)
+
+    rng = random.Random(3)
+    updates = []
+    for user_id in rng.sample(sorted(users), min(1000, count)):
+        users[user_id]["activities"]["study"] = f"{rng.randrange(24):02d}:00"
+        begin = time.perf_counter()
+        index.update_user(user_id, users[user_id], now)
+        updates.append(time.perf_counter() - begin)
+
+    print(f"⏰ {count} users, {len(index)} reminders: rebuild {rebuild * 1000:.1f} ms, "
+          f"{due} due over {minutes} simulated minutes")
+    print("   " + latency_line("pop_due per tick", ticks))
+    print("   " + latency_line("update_user", updates))
+
+# 🧪 Usage: python benchmarks/bench_scheduler.py [--sizes 1000,10000,100000] [--minutes 60]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reminder index cost by number of users")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--minutes", type=int, default=60)
+    args = parser.parse_args()
+
+    isolate()
+    for size in args.sizes.split(","):
+        run(int(size), args.minutes)
@@ -0,0 +1,128 @@
+import json
+import time
+import random
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==========================
+# 🧪 FAKE TELEGRAM BOT API
+# ==========================
+# Answers the Bot API methods this bot calls (getMe, sendMessage,
+# editMessageText, sendSticker, ...) so python-telegram-bot can run against
+# it unchanged:
+#
+#     with FakeTelegram(latency=0.05, flood_rate=0.01) as fake:
+#         bot = ExtBot(token="1:fake", base_url=fake.base_url)
+#
+# ``latency`` delays every answer, ``error_rate`` answers that share of
+# calls with a 500 and ``flood_rate`` with a 429 carrying retry_after.
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 drops connections under load
+
+class FakeTelegram:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, flood_rate=0.0, retry_after=1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.calls = {}
+        self.sent = []
+        self._message_id = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._server.handle_error = lambda request, address: None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-telegram", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return {"calls": dict(self.calls), "sent": len(self.sent)}
+
+    def _next_message_id(self):
+        with self._lock:
+            self._message_id += 1
+            return self._message_id
+
+    def answer(self, method, params):
+        """Return (status, payload) for one Bot API call."""
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        roll = random.random()
+        if roll < self.flood_rate:
+            return 429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry later",
+                         "parameters": {"retry_after": self.retry_after}}
+        if roll < self.flood_rate + self.error_rate:
+            return 500, {"ok": False, "error_code": 500, "description": "Internal Server Error (fake)"}
+
+        lowered = method.lower()
+        if lowered == "getme":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Vyaara",
+                                                "username": "vyaara_fake_bot"}}
+        if lowered in ("sendmessage", "editmessagetext", "sendsticker"):
+            chat_id = int(params.get("chat_id", 0))
+            message_id = int(params.get("message_id", 0)) or self._next_message_id()
+            message = {"message_id": message_id, "date": int(time.time()),
+                       "chat": {"id": chat_id, "type": "private"}}
+            if "text" in params:
+                message["text"] = params["text"]
+            with self._lock:
+                self.sent.append((method, chat_id))
+            return 200, {"ok": True, "result": message}
+        return 200, {"ok": True, "result": True}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode("utf-8") if length else ""
+                if "json" in self.headers.get("Content-Type", ""):
+                    params = json.loads(body or "{}")
+                else:
+                    params = {name: values[-1] for name, values in parse_qs(body).items()}
+                    for name, value in params.items():
+                        try:
+                            params[name] = json.loads(value)
+                        except ValueError:
+                            pass
+                if fake.latency:
+                    time.sleep(fake.latency)
+                status, payload = fake.answer(self.path.rsplit("/", 1)[-1], params)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST
+
+        return Handler
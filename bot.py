@@ -1,11 +1,9 @@
 import os
-import re
-import json
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from telegram import Update, Bot
+from telegram import Update
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
@@ -13,154 +11,54 @@ from telegram.ext import (
     ContextTypes,
     filters,
 )
-from langdetect import detect, LangDetectException
-from openai import OpenAI, OpenAIError
+from database import initialize_user, save_user_activities, get_user_data, set_user_timezone, increment_conversations
+from llm import get_client
+from prompts import route_message, stream_route_message, clean_reply
+from streaming import send_streaming_reply
+from utils import is_valid_timezone
+from schedule_parser import parse_activities
+from milestone import celebrate_conversation
+from keywords import scan
+from services import get_bot, warm_up
+from logging_setup import setup_logging
+from workers import BOT_WORKERS, run_workers
+import metrics
 
 # ==========================
 # ⚙️ CONFIGURE LOGGING
 # ==========================
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
 # ==========================
 # 🌍 LOAD ENVIRONMENT
 # ==========================
 load_dotenv()
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not TELEGRAM_TOKEN:
-    raise ValueError("❌ TELEGRAM_TOKEN is not defined in .env.")
-if not OPENAI_API_KEY:
-    raise ValueError("❌ OPENAI_API_KEY is not defined in .env.")
 
-bot = Bot(token=TELEGRAM_TOKEN)
-client = OpenAI(api_key=OPENAI_API_KEY)
-
-DB_FILE = "database.json"
-user_emotion_state = {}
+CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", "256"))
+STREAM_REPLIES = os.getenv("STREAM_REPLIES", "1") == "1"
+BOT_MODE = os.getenv("BOT_MODE", "polling")  # polling | webhook (see webhook.py)
 
 # ==========================
-# 🌱 DATABASE UTILS
+# 🧵 PER-CHAT QUEUEING
 # ==========================
-def load_data():
-    if os.path.exists(DB_FILE):
-        with open(DB_FILE, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-    return {}
-
-def save_data(data):
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
-def initialize_user(user_id):
-    data = load_data()
-    if str(user_id) not in data:
-        data[str(user_id)] = {
-            "name": None,
-            "goals": [],
-            "activities": {},
-            "sleep_time": None,
-            "wake_time": None,
-            "last_active_date": None,
-            "streak_count": 0
-        }
-        save_data(data)
-
-def save_user_activities(user_id, activities):
-    data = load_data()
-    initialize_user(user_id)
-    data[str(user_id)]["activities"] = activities
-    save_data(data)
-
-def get_user_data(user_id):
-    data = load_data()
-    initialize_user(user_id)
-    return data[str(user_id)]
+# Updates from different chats are handled concurrently; messages from the
+# same chat wait on that chat's lock so replies stay in order.
+_chat_locks = {}
+metrics.chat_locks.set_function(lambda: len(_chat_locks))
 
-# ==========================
-# 🌎 LANGUAGE + TONE UTILS
-# ==========================
-GENZ_HINGLISH_SLANG = {
-    "hn", "hm", "yup", "lmao", "lol", "brb", "idk", "omg",
-    "kya", "kyu", "mene", "kaha", "shi", "acha", "nahi", "thik", "ha", "haan", "ok", "okay"
-}
-
-def detect_user_language(text):
-    words = set(text.lower().split())
-    if words & GENZ_HINGLISH_SLANG:
-        return "en"
+@asynccontextmanager
+async def chat_queue(chat_id):
+    entry = _chat_locks.get(chat_id)
+    if entry is None:
+        entry = _chat_locks[chat_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
     try:
-        detected_lang = detect(text)
-        if detected_lang not in ["en", "hi"]:  # Force fallback to English for short/slang text
-            return "en"
-        return detected_lang
-    except LangDetectException:
-        return "en"
-
-def is_professional_query(text):
-    return bool(re.search(
-        r'\b(business|career|startup|project|plan|goal|strategy|job|internship|company)\b',
-        text.lower()
-    ))
-
-def get_mood_emoji(text):
-    text = text.lower()
-    if any(word in text for word in ["sad", "depressed", "cry"]):
-        return "🌧️"
-    if any(word in text for word in ["happy", "excited", "good"]):
-        return "🌷"
-    return "😊"
-
-# ==========================
-# 💡 AI REPLIES
-# ==========================
-def get_ai_reply(prompt, lang="en", max_tokens=1000):
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.9,
-            max_tokens=max_tokens
-        )
-        return response.choices[0].message.content.strip()
-    except OpenAIError as e:
-        return f"⚡️ OpenAI error: {e}"
-    except Exception as e:
-        return f"❗ Unexpected error: {e}"
-
-def route_message(text):
-    lang = detect_user_language(text)
-    if is_professional_query(text):
-        pro_prompt = (
-            f"You are a knowledgeable and friendly AI mentor.\n"
-            f"Reply in this language: {lang}.\n"
-            f"👉 Be long, detailed (15-20 sentences), clear line spacing, bullets, arrows, emojis.\n"
-            f"👉 Provide practical steps, examples, tips, no generic advice.\n"
-            f"👉 Format like ChatGPT: easy to read, no dense text walls.\n"
-            f"The user said: {text}"
-        )
-        return get_ai_reply(pro_prompt, lang, max_tokens=3000)
-    casual_prompt = (
-        f"You are a sweet, kind AI friend.\n"
-        f"Reply in this language: {lang}.\n"
-        f"👉 Short, friendly (2-4 sentences), with emojis.\n"
-        f"👉 Add '🌱 How does that feel to you?' if emotional words detected.\n"
-        f"The user said: {text}"
-    )
-    reply = get_ai_reply(casual_prompt, lang, max_tokens=500)
-    return reply + " " + get_mood_emoji(text)
-
-# ==========================
-# 🧹 CLEAN REPLY
-# ==========================
-def clean_reply(text):
-    cleaned = re.sub(r"(?m)^\s*(sw|sk|fi|id)[:!.,]*\s*", "", text)
-    cleaned = re.sub(r"\b(sw|sk|fi|id)\b", "", cleaned)
-    cleaned = re.sub(r" +", " ", cleaned)
-    return cleaned.strip()
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _chat_locks[chat_id]
 
 # ==========================
 # 🤖 TELEGRAM HANDLERS
@@ -180,48 +78,106 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode="Markdown"
     )
 
+async def set_timezone(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/timezone Asia/Kolkata — reminders are sent in the user's local time."""
+    user_id = str(update.message.chat_id)
+    if not context.args or not is_valid_timezone(context.args[0]):
+        await update.message.reply_text("🌍 Please tell me your timezone like this: /timezone Asia/Kolkata")
+        return
+    set_user_timezone(user_id, context.args[0])
+    await update.message.reply_text(f"✅ Timezone set to {context.args[0]}. 🌷 Your reminders will follow your local time!")
+
+async def set_routine(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/routine study at 7pm, yoga at 6am — adds to (or moves) activities in the saved routine."""
+    user_id = str(update.message.chat_id)
+    activities = parse_activities(" ".join(context.args or []))
+    if not activities:
+        await update.message.reply_text("⏰ Tell me your routine like this: /routine study at 7pm, workout at 6:30am")
+        return
+    save_user_activities(user_id, activities, merge=True)
+    await update.message.reply_text("✅ Your daily routine is saved. 🌷 I'll send you gentle reminders!")
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async with chat_queue(update.message.chat_id):
+        await _handle_message(update, context)
+
+async def _handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    stage = metrics.handler_stage_seconds
     user_message = update.message.text.strip()
     user_id = str(update.message.chat_id)
-    initialize_user(user_id)
+    with stage.time(stage="db_init"):
+        initialize_user(user_id)
 
-    if any(greet in user_message.lower() for greet in ["hi", "hello", "hey", "wassup"]):
+    with stage.time(stage="keywords"):
+        hits = scan(user_message)
+
+    if "greeting" in hits:
+        metrics.handler_messages_total.inc(outcome="greeting")
         await start(update, context)
         return
 
-    if any(keyword in user_message.lower() for keyword in ["study at", "workout at", "meal at", "other at"]):
-        activities = {}
-        patterns = {
-            "study": r"study at (\d{1,2}(:\d{2})? ?(am|pm)?)",
-            "workout": r"workout at (\d{1,2}(:\d{2})? ?(am|pm)?)",
-            "meal": r"meal at (\d{1,2}(:\d{2})? ?(am|pm)?)",
-            "other": r"other at (\d{1,2}(:\d{2})? ?(am|pm)?)",
-        }
-        for act, pat in patterns.items():
-            match = re.search(pat, user_message, re.IGNORECASE)
-            if match:
-                time_str = match.group(1)
-                try:
-                    activities[act] = datetime.strptime(time_str, "%I:%M %p").strftime("%H:%M")
-                except:
-                    activities[act] = datetime.strptime(time_str, "%I %p").strftime("%H:%M")
-        save_user_activities(user_id, activities)
-        await update.message.reply_text("✅ Your daily routine is saved. 🌷 I'll send you gentle reminders!")
+    # Only messages that ask for it ("my routine: ...", "remind me to ... at 7")
+    # change the routine; "I went to bed at 2am" is a feeling, not a schedule.
+    if "schedule" in hits:
+        with stage.time(stage="schedule"):
+            activities = parse_activities(user_message)
+        if activities:
+            metrics.handler_messages_total.inc(outcome="schedule")
+            save_user_activities(user_id, activities, merge=True)
+            await update.message.reply_text("✅ Your daily routine is saved. 🌷 I'll send you gentle reminders!")
+            return
+
+    if STREAM_REPLIES:
+        metrics.handler_messages_total.inc(outcome="streamed")
+        with stage.time(stage="stream_reply"):
+            await send_streaming_reply(
+                update.message,
+                stream_route_message(get_client(), user_message, user_id, hits),
+                finalize=clean_reply
+            )
+        await celebrate_conversation(update.message, get_user_data(user_id), increment_conversations(user_id))
         return
 
-    reply = route_message(user_message)
-    reply = clean_reply(reply)
-    await update.message.reply_text(reply, parse_mode="Markdown")
+    metrics.handler_messages_total.inc(outcome="reply")
+    with stage.time(stage="route"):
+        reply = await route_message(get_client(), user_message, user_id, hits)
+    with stage.time(stage="send"), metrics.telegram_send_seconds.time(job="reply"):
+        await update.message.reply_text(reply, parse_mode="Markdown")
+    await celebrate_conversation(update.message, get_user_data(user_id), increment_conversations(user_id))
 
 # ==========================
 # 🚀 RUN BOT
 # ==========================
-def main():
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+async def _post_init(app):
+    metrics.update_queue_depth.set_function(app.update_queue.qsize)
+    await metrics.start()
+
+def build_application(with_jobs=False):
+    if not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("❌ OPENAI_API_KEY is not defined in .env.")
+    app = ApplicationBuilder().bot(get_bot()).concurrent_updates(CONCURRENT_UPDATES).post_init(_post_init).build()
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("timezone", set_timezone))
+    app.add_handler(CommandHandler("routine", set_routine))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
-    logger.info("✅ Vyaara bot is running...")
-    app.run_polling()
+    if with_jobs:
+        from runner import register_jobs
+        register_jobs(app)
+    return app
+
+def main(with_jobs=False):
+    setup_logging()
+    if BOT_WORKERS > 1:
+        run_workers(BOT_WORKERS, BOT_MODE, with_jobs)
+        return
+    warm_up()
+    app = build_application(with_jobs)
+    logger.info(f"✅ Vyaara bot is running ({BOT_MODE})...")
+    if BOT_MODE == "webhook":
+        from webhook import run_webhook
+        run_webhook(app)
+    else:
+        app.run_polling()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,197 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+import metrics
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 SETTINGS
+# ==========================
+BROADCAST_GLOBAL_RATE = float(os.getenv("BROADCAST_GLOBAL_RATE", "30"))          # Telegram: ~30 msg/s per bot
+BROADCAST_PER_CHAT_INTERVAL = float(os.getenv("BROADCAST_PER_CHAT_INTERVAL", "1"))  # Telegram: ~1 msg/s per chat
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "20"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+BROADCAST_RETRY_BASE = float(os.getenv("BROADCAST_RETRY_BASE", "1"))              # first network backoff, doubled per retry
+BROADCAST_PROGRESS_EVERY = max(1, int(os.getenv("BROADCAST_PROGRESS_EVERY", "1000")))
+
+# ==========================
+# 🪣 RATE LIMITERS
+# ==========================
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Hold every sender back, e.g. after Telegram answered with RetryAfter."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChatLimiter:
+    """Keep at least ``interval`` seconds between two sends to the same chat."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next_allowed = {}
+
+    async def wait(self, chat_id):
+        chat_id = str(chat_id)
+        now = time.monotonic()
+        ready_at = self._next_allowed.get(chat_id, now)
+        self._next_allowed[chat_id] = max(ready_at, now) + self.interval
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+        if len(self._next_allowed) > 10000:
+            self._prune(now)
+
+    def _prune(self, now):
+        self._next_allowed = {chat: at for chat, at in self._next_allowed.items() if at > now}
+
+
+# Shared by every broadcast in the process so concurrent jobs respect one global limit.
+global_bucket = TokenBucket(BROADCAST_GLOBAL_RATE)
+chat_limiter = ChatLimiter(BROADCAST_PER_CHAT_INTERVAL)
+
+# ==========================
+# 📊 DELIVERY SUMMARY
+# ==========================
+@dataclass
+class BroadcastSummary:
+    name: str
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    retries: int = 0
+    errors: dict = field(default_factory=dict)  # error type -> count; per-chat details are logged at DEBUG
+    started: float = field(default_factory=time.monotonic)
+    elapsed: float = 0.0
+
+    def note_error(self, chat_id, error):
+        kind = type(error).__name__
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        logger.debug(f"❌ Could not send {self.name} message to {chat_id}: {error}")
+
+    def __str__(self):
+        rate = self.sent / self.elapsed if self.elapsed else 0.0
+        text = (
+            f"{self.name}: {self.sent}/{self.total} sent, {self.failed} failed, "
+            f"{self.blocked} blocked, {self.retries} retries in {self.elapsed:.1f}s ({rate:.1f} msg/s)"
+        )
+        if self.errors:
+            text += ", errors: " + ", ".join(f"{kind} x{count}" for kind, count in sorted(self.errors.items()))
+        return text
+
+# ==========================
+# 📤 SENDING
+# ==========================
+async def send_text(bot, chat_id, text):
+    """Default sender: one plain text message."""
+    await bot.send_message(chat_id=chat_id, text=text)
+
+async def _deliver(bot, chat_id, payload, send, summary):
+    outcome = "failed"
+    metrics.broadcast_in_flight.inc(job=summary.name)
+    try:
+        outcome = await _attempt_delivery(bot, chat_id, payload, send, summary)
+    finally:
+        metrics.broadcast_in_flight.dec(job=summary.name)
+        metrics.broadcast_messages_total.inc(job=summary.name, outcome=outcome)
+
+async def _attempt_delivery(bot, chat_id, payload, send, summary):
+    job = summary.name
+    for attempt in range(BROADCAST_MAX_RETRIES + 1):
+        await global_bucket.acquire()
+        await chat_limiter.wait(chat_id)
+        try:
+            with metrics.telegram_send_seconds.time(job=job):
+                await send(bot, chat_id, payload)
+            summary.sent += 1
+            return "sent"
+        except RetryAfter as e:
+            logger.warning(f"⏳ Telegram asked to slow down for {e.retry_after}s ({summary.name})")
+            metrics.telegram_send_failures_total.inc(job=job, reason="retry_after")
+            global_bucket.pause(e.retry_after)
+        except Forbidden:
+            metrics.telegram_send_failures_total.inc(job=job, reason="forbidden")
+            summary.blocked += 1
+            return "blocked"
+        except BadRequest as e:
+            summary.note_error(chat_id, e)
+            metrics.telegram_send_failures_total.inc(job=job, reason="bad_request")
+            summary.failed += 1
+            return "failed"
+        except TimedOut as e:
+            # The request may have reached Telegram; a retry could deliver the message twice.
+            summary.note_error(chat_id, e)
+            metrics.telegram_send_failures_total.inc(job=job, reason="timed_out")
+            summary.failed += 1
+            return "failed"
+        except NetworkError as e:
+            metrics.telegram_send_failures_total.inc(job=job, reason="network")
+            if attempt == BROADCAST_MAX_RETRIES:
+                summary.note_error(chat_id, e)
+            else:
+                await asyncio.sleep(min(BROADCAST_RETRY_BASE * 2 ** attempt, 30))
+        except Exception as e:
+            summary.note_error(chat_id, e)
+            metrics.telegram_send_failures_total.inc(job=job, reason="other")
+            summary.failed += 1
+            return "failed"
+        if attempt < BROADCAST_MAX_RETRIES:
+            summary.retries += 1
+    summary.failed += 1
+    return "failed"
+
+async def broadcast(bot, items, name="broadcast", send=send_text, on_progress=None):
+    """Deliver ``(chat_id, payload)`` items with bounded concurrency and rate limits.
+
+    ``send(bot, chat_id, payload)`` performs one delivery (plain text by
+    default). Items are pulled lazily, so large generators are fine.
+    ``on_progress(summary)`` is called every BROADCAST_PROGRESS_EVERY items.
+    Returns a BroadcastSummary.
+    """
+    summary = BroadcastSummary(name)
+    iterator = iter(items)
+
+    async def worker():
+        for chat_id, payload in iterator:
+            summary.total += 1
+            await _deliver(bot, chat_id, payload, send, summary)
+            if summary.total % BROADCAST_PROGRESS_EVERY == 0:
+                logger.info(f"📬 {name}: {summary.total} processed so far")
+                if on_progress:
+                    on_progress(summary)
+
+    await asyncio.gather(*(worker() for _ in range(BROADCAST_CONCURRENCY)))
+    summary.elapsed = time.monotonic() - summary.started
+    if summary.total:
+        logger.info(f"✅ {summary}")
+    return summary
@@ -1,25 +1,21 @@
-import os
 import asyncio
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
-from telegram import Bot
-from database import get_all_user_ids, get_user_data
+from services import get_bot
+from database import get_all_users
+from broadcast import broadcast
+from logging_setup import setup_logging
 
 # ==========================
 # ⚙️ CONFIGURE LOGGING
 # ==========================
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
 # ==========================
 # 🌍 LOAD ENV
 # ==========================
 load_dotenv()
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-if not TELEGRAM_TOKEN:
-    raise ValueError("❌ TELEGRAM_TOKEN is NOT defined in .env.")
-bot = Bot(token=TELEGRAM_TOKEN)
 
 # ==========================
 # 💙 DAILY CHECK-IN MESSAGES
@@ -34,47 +30,39 @@ CHECKIN_MESSAGES = [
 ]
 
 # ==========================
-# ⏳ SEND DAILY CHECK-INS
+# ⏳ PICK CHECK-IN TEXT
 # ==========================
-async def send_check_in_message(chat_id, text):
-    """Send a daily check-in message with warmth and care."""
-    try:
-        await bot.send_message(chat_id=chat_id, text=text)
-        logger.info(f"✅ Sent daily check-in to {chat_id}")
-    except Exception as e:
-        logger.error(f"❌ Could not send check-in to {chat_id}: {e}")
+def check_in_text(user_data):
+    """Choose a check-in message that suits the user's last sentiment."""
+    sentiment = user_data.get("last_sentiment", "neutral").lower() if user_data else "neutral"
+
+    if sentiment in ["negative", "sad", "lonely", "tired", "depressed"]:
+        return (
+            "💙 It's okay to have hard days. Remember, you’re not alone — you matter and you’re loved. 🌷\n"
+            "If you’d like, I’m here to listen, or we can try a quick relaxation exercise together. 🌱"
+        )
+    if sentiment in ["positive", "happy", "excited"]:
+        return (
+            "🌷 You’re doing so well! Keep nurturing yourself and sharing that beautiful energy. 🌞\n"
+            "I’m proud of every step you’re taking. 🌱"
+        )
+    return CHECKIN_MESSAGES[datetime.now().day % len(CHECKIN_MESSAGES)]
 
 # ==========================
 # 🎯 MAIN FUNCTION
 # ==========================
-async def send_daily_check_ins():
+async def send_daily_check_ins(bot):
     """Send daily check-in messages to all registered user ids."""
-    ids = get_all_user_ids()
-    for chat_id in ids:
-        user_data = get_user_data(chat_id)
-
-        sentiment = user_data.get("last_sentiment", "neutral").lower() if user_data else "neutral"
-
-        if sentiment in ["negative", "sad", "lonely", "tired", "depressed"]:
-            text = (
-                "💙 It's okay to have hard days. Remember, you’re not alone — you matter and you’re loved. 🌷\n"
-                "If you’d like, I’m here to listen, or we can try a quick relaxation exercise together. 🌱"
-            )
-        elif sentiment in ["positive", "happy", "excited"]:
-            text = (
-                "🌷 You’re doing so well! Keep nurturing yourself and sharing that beautiful energy. 🌞\n"
-                "I’m proud of every step you’re taking. 🌱"
-            )
-        else:
-            text = CHECKIN_MESSAGES[datetime.now().day % len(CHECKIN_MESSAGES)]
-
-        await send_check_in_message(chat_id, text)
+    users = list(get_all_users().items())
+    items = ((chat_id, check_in_text(user_data)) for chat_id, user_data in users)
+    return await broadcast(bot, items, name="daily check-in")
 
 # ==========================
 # ⚡ TESTING LOOP
 # ==========================
 if __name__ == '__main__':
     """Run daily_checkin.py standalone for testing."""
+    setup_logging()
     async def main():
-        await send_daily_check_ins()
+        await send_daily_check_ins(get_bot())
     asyncio.run(main())
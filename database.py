@@ -1,69 +1,225 @@
-import json
+import copy
+import atexit
+import logging
 import os
+import threading
 from datetime import datetime, timedelta
+from storage import get_backend
 
-DB_FILE = "database.json"
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", "5"))    # seconds between write-behind flushes
+FLUSH_MAX_DIRTY = int(os.getenv("DB_FLUSH_MAX_DIRTY", "500"))  # flush early once this many users changed
+
+_backend = None
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        _backend = get_backend()
+    return _backend
 
 def load_data():
-    """Load user data from the JSON database."""
-    if os.path.exists(DB_FILE):
-        with open(DB_FILE, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-    return {}
+    """Load all user data from the configured storage backend."""
+    return _get_backend().load_all()
 
 def save_data(data):
-    """Save user data to the JSON database."""
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    """Save all user data to the configured storage backend."""
+    _get_backend().write(data, data)
+
+# ==========================
+# 🧠 IN-MEMORY USER STORE
+# ==========================
+# The backend is read once per process; reads are served from memory and
+# changed users are marked dirty and written back in batches by a
+# background thread (and once more at interpreter exit).
+#
+# The writer never touches the live records, which the event loop keeps
+# mutating: _mark_dirty() deep-copies a changed record on the caller's
+# thread, and flush() writes those copies.
+_users = None
+_snapshots = None   # user_id -> deep copy of the record as of its last _mark_dirty()
+_dirty = set()
+_lock = threading.RLock()
+_flush_lock = threading.Lock()  # one flush at a time, so an older snapshot never overwrites a newer one
+_flusher = None
+_stop_flusher = threading.Event()
+_flush_soon = threading.Event()  # wakes the flusher early once FLUSH_MAX_DIRTY users are dirty
+
+def _store():
+    """Return the process-wide user dict, loading it on first use."""
+    global _users, _snapshots
+    if _users is None:
+        with _lock:
+            if _users is None:
+                users = load_data()
+                _snapshots = copy.deepcopy(users)
+                _users = users
+                _start_flusher()
+    return _users
+
+# ==========================
+# 🔔 CHANGE LISTENERS
+# ==========================
+_listeners = []
+
+def add_user_listener(callback):
+    """Call ``callback(user_id, user_data)`` whenever a user record changes.
+
+    Fires for changes made in this process and for changes picked up from
+    other processes by refresh().
+    """
+    _listeners.append(callback)
+
+def _notify(user_id, user_data):
+    for callback in _listeners:
+        try:
+            callback(user_id, user_data)
+        except Exception as e:
+            logger.error(f"❌ User listener failed for {user_id}: {e}")
+
+def _mark_dirty(user_id):
+    user_id = str(user_id)
+    with _lock:
+        if _users is not None and user_id in _users:
+            _snapshots[user_id] = copy.deepcopy(_users[user_id])
+        _dirty.add(user_id)
+        should_flush = len(_dirty) >= FLUSH_MAX_DIRTY
+    if _listeners and _users is not None and user_id in _users:
+        _notify(user_id, _users[user_id])
+    if should_flush:
+        _flush_soon.set()  # never write on the caller's thread (usually the event loop)
+
+def refresh():
+    """Pick up changes other processes wrote since we last looked.
 
+    Users that are still dirty in this process win over the stored copy.
+    Records are updated in place, so callers holding a record keep seeing
+    (and writing to) the live one.
+    """
+    users = _store()
+    with _lock:
+        changed = _get_backend().load_changed()
+        changed = {user_id: record for user_id, record in changed.items() if user_id not in _dirty}
+        for user_id, record in changed.items():
+            _snapshots[user_id] = record
+            live = users.get(user_id)
+            if live is None:
+                users[user_id] = copy.deepcopy(record)
+            else:
+                live.clear()
+                live.update(copy.deepcopy(record))
+    for user_id in changed:
+        _notify(user_id, users[user_id])
+
+def flush():
+    """Write the users changed since the last flush to the backend."""
+    with _flush_lock:
+        with _lock:
+            if _users is None or not _dirty:
+                return
+            changed = {user_id: _snapshots[user_id] for user_id in _dirty if user_id in _snapshots}
+            all_users = dict(_snapshots)  # snapshots are replaced, never mutated, so a shallow copy is enough
+            _dirty.clear()
+        try:
+            _get_backend().write(changed, all_users)
+        except BaseException:
+            with _lock:
+                _dirty.update(changed)
+            raise
+    logger.debug(f"💾 Flushed {len(changed)} changed user(s)")
+
+def _flush_loop():
+    while not _stop_flusher.is_set():
+        _flush_soon.wait(FLUSH_INTERVAL)
+        _flush_soon.clear()
+        if _stop_flusher.is_set():
+            return  # shutdown() writes the rest
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"❌ Could not flush user store: {e}")
+
+def _start_flusher():
+    global _flusher
+    if _flusher is None:
+        _flusher = threading.Thread(target=_flush_loop, name="db-flusher", daemon=True)
+        _flusher.start()
+
+def shutdown():
+    """Stop the background flusher and write any pending changes."""
+    _stop_flusher.set()
+    _flush_soon.set()
+    flush()
+
+atexit.register(shutdown)
+
+# ==========================
+# 👤 USER HELPERS
+# ==========================
 def initialize_user(user_id):
     """Ensure a user record exists; create if missing."""
-    data = load_data()
+    users = _store()
     user_id = str(user_id)
-    if user_id not in data:
-        data[user_id] = {
-            "name": None,
-            "goals": [],
-            "activities": {},
-            "sleep_time": None,
-            "wake_time": None,
-            "last_active_date": None,
-            "streak_count": 0,
-            "milestones": {
-                "conversations": 0,
-                "start_date": datetime.now().strftime("%Y-%m-%d"),
-                "custom_dates": [],
-                "custom_conversations": []
-            },
-            "mood": None
-        }
-        save_data(data)
+    if user_id not in users:
+        with _lock:
+            if user_id in users:  # created by another thread meanwhile
+                return users[user_id]
+            users[user_id] = {
+                "name": None,
+                "goals": [],
+                "activities": {},
+                "sleep_time": None,
+                "wake_time": None,
+                "last_active_date": None,
+                "streak_count": 0,
+                "milestones": {
+                    "conversations": 0,
+                    "start_date": datetime.now().strftime("%Y-%m-%d"),
+                    "custom_dates": [],
+                    "custom_conversations": []
+                },
+                "mood": None,
+                "timezone": None
+            }
+        _mark_dirty(user_id)
+    return users[user_id]
 
 def set_user_name(user_id, name):
-    data = load_data()
-    initialize_user(user_id)
-    data[str(user_id)]["name"] = name
-    save_data(data)
+    initialize_user(user_id)["name"] = name
+    _mark_dirty(user_id)
 
 def add_user_goal(user_id, goal):
-    data = load_data()
-    initialize_user(user_id)
-    data[str(user_id)]["goals"].append(goal)
-    save_data(data)
+    initialize_user(user_id)["goals"].append(goal)
+    _mark_dirty(user_id)
 
-def save_user_activities(user_id, activities):
-    data = load_data()
-    initialize_user(user_id)
-    data[str(user_id)]["activities"] = activities
-    save_data(data)
+def save_user_activities(user_id, activities, merge=False):
+    """Store the user's {activity: 'HH:MM'} routine; with ``merge`` only the given activities change."""
+    user_data = initialize_user(user_id)
+    user_data["activities"] = {**(user_data.get("activities") or {}), **activities} if merge else activities
+    _mark_dirty(user_id)
+
+def set_user_schedule(user_id, wake_time=None, sleep_time=None):
+    """Update wake and/or sleep time ('HH:MM'); None leaves a value unchanged."""
+    user_data = initialize_user(user_id)
+    if wake_time is not None:
+        user_data["wake_time"] = wake_time
+    if sleep_time is not None:
+        user_data["sleep_time"] = sleep_time
+    _mark_dirty(user_id)
+
+def set_user_timezone(user_id, timezone_name):
+    """Store the user's IANA timezone; reminders fire in this local time."""
+    initialize_user(user_id)["timezone"] = timezone_name
+    _mark_dirty(user_id)
+
+def set_last_sentiment(user_id, sentiment):
+    """Remember the tone of the user's latest journal entry (used by daily check-ins)."""
+    initialize_user(user_id)["last_sentiment"] = sentiment
+    _mark_dirty(user_id)
 
 def update_user_streak(user_id):
-    data = load_data()
-    initialize_user(user_id)
-    user_data = data[str(user_id)]
+    user_data = initialize_user(user_id)
     today = datetime.now().date()
     last_active = user_data.get("last_active_date")
 
@@ -79,17 +235,25 @@ def update_user_streak(user_id):
         user_data["streak_count"] = 1
 
     user_data["last_active_date"] = today.strftime("%Y-%m-%d")
-    save_data(data)
+    _mark_dirty(user_id)
     return user_data["streak_count"]
 
+def increment_conversations(user_id):
+    """Count one more conversation for the user and return the new total."""
+    milestones = initialize_user(user_id).setdefault("milestones", {})
+    milestones["conversations"] = milestones.get("conversations", 0) + 1
+    _mark_dirty(user_id)
+    return milestones["conversations"]
+
 def get_user_data(user_id):
-    data = load_data()
-    initialize_user(user_id)
-    return data[str(user_id)]
+    return initialize_user(user_id)
+
+def get_all_users():
+    """Return the in-memory mapping of user id -> user record."""
+    return _store()
 
 def get_all_user_ids():
-    data = load_data()
-    return list(data.keys())
+    return list(_store().keys())
 
 def get_user_milestones(user_id):
     user_data = get_user_data(user_id)
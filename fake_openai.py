@@ -0,0 +1,153 @@
+import json
+import time
+import random
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==========================
+# 🧪 FAKE OPENAI SERVER
+# ==========================
+# A tiny local stand-in for the chat completions endpoint, so timeouts,
+# retries and the circuit breaker can be exercised without the network:
+#
+#     with FakeOpenAI() as fake:
+#         fake.fail(429, retry_after=1)       # next request gets a 429
+#         client = AsyncOpenAI(api_key="x", base_url=fake.base_url, max_retries=0)
+#
+# Queued faults are served in order, one per request; once they run out
+# every request succeeds with ``reply`` (streamed as SSE when asked to).
+# For load tests, ``latency`` delays every answer, ``token_delay`` paces
+# streamed tokens and ``error_rate`` turns that share of requests into 500s.
+# tests/test_llm.py drives the retries and the breaker against it.
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 drops connections under load
+
+class FakeOpenAI:
+    def __init__(self, reply="Hello from the fake OpenAI server 🌷", host="127.0.0.1", port=0,
+                 latency=0.0, token_delay=0.0, error_rate=0.0):
+        self.reply = reply
+        self.latency = latency
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.requests = []
+        self._faults = deque()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._server.handle_error = lambda request, address: None  # clients hanging up on stalls are expected
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def fail(self, status, times=1, retry_after=None, body=None):
+        """Answer the next ``times`` requests with an HTTP error."""
+        with self._lock:
+            for _ in range(times):
+                self._faults.append({"status": status, "retry_after": retry_after, "body": body})
+
+    def stall(self, seconds, times=1):
+        """Delay the next ``times`` requests by ``seconds`` before answering."""
+        with self._lock:
+            for _ in range(times):
+                self._faults.append({"delay": seconds})
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        return {"requests": len(self.requests)}
+
+    def _next_fault(self):
+        with self._lock:
+            return self._faults.popleft() if self._faults else None
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                fake.requests.append(request)
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                fault = fake._next_fault()
+                if fault is None and fake.error_rate and random.random() < fake.error_rate:
+                    fault = {"status": 500, "retry_after": None, "body": None}
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fault and "delay" in fault:
+                    time.sleep(fault["delay"])
+                elif fault:
+                    headers = {"retry-after": str(fault["retry_after"])} if fault["retry_after"] is not None else {}
+                    error = fault["body"] or {"error": {"message": f"fake error {fault['status']}", "type": "fake"}}
+                    self._send_json(fault["status"], error, headers)
+                    return
+
+                model = request.get("model", "gpt-3.5-turbo")
+                words = fake.reply.split(" ")
+                usage = {"prompt_tokens": 20, "completion_tokens": len(words), "total_tokens": 20 + len(words)}
+                if not request.get("stream"):
+                    self._send_json(200, {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": fake.reply}}],
+                        "usage": usage,
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+                for i, word in enumerate(words):
+                    if fake.token_delay and i:
+                        time.sleep(fake.token_delay)
+                    delta = {"content": word if i == 0 else " " + word}
+                    self._event({**chunk, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+                self._event({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    self._event({**chunk, "choices": [], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def _event(self, payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+                self.wfile.flush()
+
+        return Handler
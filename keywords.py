@@ -0,0 +1,122 @@
+import os
+import re
+import json
+import time
+
+# ==========================
+# 📚 DEFAULT LEXICONS
+# ==========================
+# Every category is matched on word boundaries, so "good" no longer fires
+# on "goodbye", "hi" on "this" or "low" on "allow".
+TONE_CATEGORIES = ["sad", "happy", "tired", "angry", "lonely"]  # priority order used by analyze_tone
+
+DEFAULT_LEXICONS = {
+    "sad": ["sad", "down", "depressed", "unhappy", "crying", "cry", "overwhelmed", "low"],
+    "happy": ["happy", "excited", "amazing", "fantastic", "good", "joyful", "grateful", "peaceful", "motivated"],
+    "tired": ["tired", "sleepy", "exhausted", "drained", "burnt out", "no energy"],
+    "angry": ["angry", "mad", "furious", "irritated", "frustrated", "annoyed", "enraged"],
+    "lonely": ["lonely", "alone", "isolated", "no one understands", "no one to talk to"],
+    "mood_sad": ["sad", "depressed", "cry", "crying", "cried"],
+    "mood_happy": ["happy", "excited", "good"],
+    "professional": [
+        "business", "career", "startup", "project", "plan", "goal",
+        "strategy", "job", "internship", "company",
+    ],
+    "greeting": ["hi", "hello", "hey", "wassup"],
+    "schedule": ["study at", "workout at", "meal at", "other at", "remind me", "my routine", "my schedule"],
+}
+
+KEYWORD_LEXICONS_FILE = os.getenv("KEYWORD_LEXICONS_FILE")  # JSON {category: [phrases]} merged over the defaults
+
+# ==========================
+# ⚙️ COMPILED MATCHER
+# ==========================
+_WORDS = re.compile(r"[\w']+")
+
+class KeywordMatcher:
+    """All lexicon phrases compiled into one token-level lookup table.
+
+    The text is lowercased and split into words once; each word is looked
+    up in a dict keyed by the first word of every phrase, and multi-word
+    phrases are confirmed against the following words. One pass reports
+    every category hit, instead of one substring scan per word per category.
+    """
+
+    def __init__(self, lexicons):
+        self.lexicons = {category: list(phrases) for category, phrases in lexicons.items()}
+        self._index = {}  # first word -> [(phrase words, phrase, categories)]
+        phrases = {}
+        for category, entries in self.lexicons.items():
+            for entry in entries:
+                words = tuple(_WORDS.findall(entry.lower()))
+                if words:
+                    phrases.setdefault(words, []).append(category)
+        # Longest first so "no one to talk to" wins over shorter overlapping phrases.
+        for words, categories in sorted(phrases.items(), key=lambda item: -len(item[0])):
+            self._index.setdefault(words[0], []).append((words, " ".join(words), categories))
+
+    def scan(self, text):
+        """Return {category: [matched phrases]} for every category found in the text."""
+        hits = {}
+        if not text:
+            return hits
+        words = _WORDS.findall(text.lower())
+        index = self._index
+        i, count = 0, len(words)
+        while i < count:
+            candidates = index.get(words[i])
+            step = 1
+            if candidates:
+                for phrase_words, phrase, categories in candidates:
+                    size = len(phrase_words)
+                    if size == 1 or tuple(words[i:i + size]) == phrase_words:
+                        for category in categories:
+                            hits.setdefault(category, []).append(phrase)
+                        step = size
+                        break
+            i += step
+        return hits
+
+def load_lexicons(path=KEYWORD_LEXICONS_FILE):
+    """Default lexicons, with categories from the optional JSON file replacing or adding to them."""
+    lexicons = dict(DEFAULT_LEXICONS)
+    if path:
+        with open(path, "r") as f:
+            lexicons.update(json.load(f))
+    return lexicons
+
+matcher = KeywordMatcher(load_lexicons())
+
+def scan(text):
+    """Scan text with the shared matcher."""
+    return matcher.scan(text)
+
+# ==========================
+# 🧪 MICRO-BENCHMARK
+# ==========================
+if __name__ == "__main__":
+    samples = [
+        "hey I'm so tired and burnt out after work today",
+        "this allows me to plan my career in a startup",
+        "goodbye, I feel alone and no one understands me",
+        "study at 7pm and workout at 6am please",
+        "I am really happy and excited about my new job!",
+        "ok thanks",
+    ] * 200
+
+    def legacy(text):
+        msg = text.lower()
+        tone = next((cat for cat in TONE_CATEGORIES if any(w in msg for w in DEFAULT_LEXICONS[cat])), "neutral")
+        professional = bool(re.search(r'\b(business|career|startup|project|plan|goal|strategy|job|internship|company)\b', msg))
+        mood_sad = any(w in msg for w in DEFAULT_LEXICONS["mood_sad"])
+        mood_happy = any(w in msg for w in DEFAULT_LEXICONS["mood_happy"])
+        greeting = any(w in msg for w in DEFAULT_LEXICONS["greeting"])
+        schedule = any(w in msg for w in DEFAULT_LEXICONS["schedule"])
+        return tone, professional, mood_sad, mood_happy, greeting, schedule
+
+    for name, fn in (("legacy", legacy), ("matcher", scan)):
+        started = time.perf_counter()
+        for text in samples:
+            fn(text)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>8}: {elapsed / len(samples) * 1e6:.1f} µs/message")
@@ -0,0 +1,108 @@
+import os
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from langdetect import DetectorFactory, detect, LangDetectException
+
+# ==========================
+# 🌍 SETTINGS
+# ==========================
+LANGDETECT_MIN_WORDS = int(os.getenv("LANGDETECT_MIN_WORDS", "6"))      # shorter Latin text is never sent to langdetect
+LANGUAGE_SWITCH_AFTER = int(os.getenv("LANGUAGE_SWITCH_AFTER", "2"))    # weak detections needed to change a user's language
+LANGUAGE_MAX_USERS = int(os.getenv("LANGUAGE_MAX_USERS", "100000"))     # sticky languages kept in memory
+SUPPORTED_LANGUAGES = {"en", "hi"}
+DEFAULT_LANGUAGE = "en"
+
+DetectorFactory.seed = 0  # langdetect is random unless seeded
+
+GENZ_HINGLISH_SLANG = {
+    "hn", "hm", "yup", "lmao", "lol", "brb", "idk", "omg", "wassup",
+    "kya", "kyu", "mene", "kaha", "shi", "acha", "nahi", "thik", "ha", "haan", "ok", "okay"
+}
+
+# ==========================
+# 🔤 CHEAP SCRIPT CHECKS
+# ==========================
+_WORDS = re.compile(r"\w+")
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+_LATIN = re.compile(r"[A-Za-z]")
+_LETTERS = re.compile(r"[^\W\d_]")
+
+STRONG = "strong"  # script-based: switch the user's language at once
+WEAK = "weak"      # heuristic or statistical: needs confirmation
+
+@lru_cache(maxsize=4096)
+def _langdetect(text):
+    try:
+        return detect(text)
+    except LangDetectException:
+        return DEFAULT_LANGUAGE
+
+def classify_language(text):
+    """Return (language, strength) for a message; language is None if there is no signal.
+
+    Order of checks, cheapest first:
+    1. Devanagari letters make up most of the text -> Hindi (strong)
+    2. Gen-Z / Hinglish slang words -> English (weak)
+    3. Latin-only text shorter than LANGDETECT_MIN_WORDS -> English (weak)
+    4. Anything else (long or non-Latin text) -> memoized, seeded langdetect;
+       a language we don't reply in falls back to English (weak), since long
+       romanised Hindi is often read as Indonesian, Estonian and the like
+    """
+    letters = _LETTERS.findall(text)
+    if not letters:
+        return None, None
+    devanagari = sum(1 for ch in letters if _DEVANAGARI.match(ch))
+    if devanagari * 2 >= len(letters):
+        return "hi", STRONG
+
+    words = _WORDS.findall(text.lower())
+    if GENZ_HINGLISH_SLANG.intersection(words):
+        return DEFAULT_LANGUAGE, WEAK
+
+    latin = sum(1 for ch in letters if _LATIN.match(ch))
+    if latin == len(letters) and len(words) < LANGDETECT_MIN_WORDS:
+        return DEFAULT_LANGUAGE, WEAK
+
+    detected = _langdetect(" ".join(text.split()))
+    if detected not in SUPPORTED_LANGUAGES:
+        return DEFAULT_LANGUAGE, WEAK
+    return detected, (STRONG if latin < len(letters) else WEAK)
+
+# ==========================
+# 📌 STICKY PER-USER LANGUAGE
+# ==========================
+_user_languages = OrderedDict()  # user_id -> [language, pending language, pending count]
+
+def detect_user_language(text, user_id=None):
+    """Pick the reply language for a message.
+
+    Without a user id this is just classify_language. With one, the
+    user's previous language is kept until a strong signal or
+    LANGUAGE_SWITCH_AFTER weak detections in a row say otherwise, so
+    replies don't flip language on short or ambiguous messages.
+    """
+    detected, strength = classify_language(text)
+    if user_id is None:
+        return detected or DEFAULT_LANGUAGE
+
+    user_id = str(user_id)
+    state = _user_languages.get(user_id)
+    if state is None:
+        state = _user_languages[user_id] = [detected or DEFAULT_LANGUAGE, None, 0]
+        if len(_user_languages) > LANGUAGE_MAX_USERS:
+            _user_languages.popitem(last=False)
+        return state[0]
+    _user_languages.move_to_end(user_id)
+
+    current = state[0]
+    if detected is None or detected == current:
+        state[1], state[2] = None, 0
+    elif strength == STRONG:
+        state[:] = [detected, None, 0]
+    else:
+        state[2] = state[2] + 1 if state[1] == detected else 1
+        state[1] = detected
+        if state[2] >= LANGUAGE_SWITCH_AFTER:
+            state[:] = [detected, None, 0]
+    return state[0]
@@ -0,0 +1,244 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError, OpenAIError
+import usage
+import metrics
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 LOAD ENVIRONMENT
+# ==========================
+load_dotenv()
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "50"))  # completions in flight at once
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))                # seconds per attempt
+OPENAI_DEADLINE = float(os.getenv("OPENAI_DEADLINE", "90"))              # seconds per call, retries included
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_RETRY_BASE = float(os.getenv("OPENAI_RETRY_BASE", "0.5"))         # first backoff, doubled per retry
+OPENAI_RETRY_MAX = float(os.getenv("OPENAI_RETRY_MAX", "20"))            # longest single backoff
+BREAKER_FAILURES = int(os.getenv("OPENAI_BREAKER_FAILURES", "5"))        # failed calls in a row that open the breaker
+BREAKER_RESET = float(os.getenv("OPENAI_BREAKER_RESET", "30"))           # seconds before a trial call is let through
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+# ==========================
+# 🤖 ASYNC OPENAI CLIENT
+# ==========================
+_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+def create_client():
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("❌ OPENAI_API_KEY is not defined in .env.")
+    # Retries are ours (see _call_with_retries), so the SDK must not add its own.
+    return AsyncOpenAI(api_key=api_key, timeout=OPENAI_TIMEOUT, max_retries=0)
+
+def get_client():
+    """Return the shared AsyncOpenAI client, created on first use (see services.py)."""
+    from services import get_openai
+    return get_openai()
+
+# ==========================
+# 🔌 CIRCUIT BREAKER
+# ==========================
+class CircuitOpenError(OpenAIError):
+    """Raised instead of calling OpenAI while the breaker is open."""
+
+class CircuitBreaker:
+    """Stops calling OpenAI after ``failures`` failed calls in a row.
+
+    While open, every call fails at once with CircuitOpenError. After
+    ``reset_after`` seconds one trial call is let through (half-open): if it
+    succeeds the breaker closes, otherwise it stays open for another period.
+    A trial that is cancelled or abandoned counts as neither; its slot is
+    freed with release_trial() so the next call can try again.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._failed = 0
+        self._opened_at = None
+        self._trial = None  # token of the half-open trial call in flight
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError or let the call through; returns a token if it is the trial call."""
+        state = self.state
+        if state == "open" or (state == "half-open" and self._trial is not None):
+            raise CircuitOpenError("OpenAI circuit breaker is open")
+        if state == "half-open":
+            self._trial = object()
+            return self._trial
+        return None
+
+    def release_trial(self, trial):
+        """Free the trial slot taken by before_call() if its call ended without a verdict."""
+        if trial is not None and self._trial is trial:
+            self._trial = None
+
+    def record_success(self):
+        if self._opened_at is not None:
+            logger.info("✅ OpenAI circuit breaker closed")
+            metrics.openai_breaker_open.set(0)
+        self._failed = 0
+        self._opened_at = None
+        self._trial = None
+
+    def record_failure(self):
+        self._failed += 1
+        self._trial = None
+        if self._opened_at is not None or self._failed >= self.failures:
+            if self._opened_at is None:
+                logger.warning(f"🔌 OpenAI circuit breaker opened after {self._failed} failed calls")
+                metrics.openai_breaker_open.set(1)
+            self._opened_at = time.monotonic()
+
+breaker = CircuitBreaker()
+
+# ==========================
+# 🔁 DEADLINES + RETRIES
+# ==========================
+def _is_retryable(error):
+    if isinstance(error, (asyncio.TimeoutError, APITimeoutError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+def _retry_after(error):
+    """Seconds the server asked us to wait (retry-after-ms / retry-after), if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+async def _call_with_retries(call):
+    """Run ``call()``, retrying 429s, 5xx and timeouts; only those count against the breaker.
+
+    Each attempt gets OPENAI_TIMEOUT seconds and the whole call, backoffs
+    included, OPENAI_DEADLINE seconds. Backoff is exponential with full
+    jitter, but never shorter than the server's retry-after; a wait that
+    would overrun the deadline is not attempted and the last error is raised.
+    """
+    deadline = time.monotonic() + OPENAI_DEADLINE
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            result = await asyncio.wait_for(call(), timeout=min(OPENAI_TIMEOUT, remaining))
+        except Exception as e:
+            attempt += 1
+            metrics.openai_errors_total.inc(type=type(e).__name__)
+            if not _is_retryable(e):
+                raise  # the request itself was wrong; the service is fine
+            if attempt > OPENAI_MAX_RETRIES:
+                breaker.record_failure()
+                raise
+            delay = random.uniform(0, min(OPENAI_RETRY_MAX, OPENAI_RETRY_BASE * 2 ** (attempt - 1)))
+            delay = max(delay, _retry_after(e) or 0)
+            if time.monotonic() + delay >= deadline:
+                breaker.record_failure()
+                raise
+            logger.warning(f"🔁 OpenAI call failed ({type(e).__name__}), retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        return result
+
+# ==========================
+# 💡 AI REPLIES
+# ==========================
+async def get_ai_reply(client, messages, max_tokens=1000, model=DEFAULT_MODEL, temperature=0.9, route=None):
+    """Request a chat completion without blocking the event loop.
+
+    At most OPENAI_MAX_CONCURRENCY requests run at once; the rest wait their
+    turn. Transient failures are retried (see _call_with_retries); raises
+    asyncio.TimeoutError past OPENAI_DEADLINE and CircuitOpenError while the
+    breaker is open. Token usage and latency are recorded under ``route``.
+    """
+    async with _semaphore:
+        trial = breaker.before_call()
+        try:
+            started = time.monotonic()
+            response = await _call_with_retries(lambda: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ))
+            breaker.record_success()
+        finally:
+            breaker.release_trial(trial)  # cancelled: neither success nor failure
+    latency = time.monotonic() - started
+    metrics.openai_request_seconds.observe(latency, route=route or "default", stream="0")
+    usage.record(route, model, response.usage, latency)
+    return response.choices[0].message.content.strip()
+
+async def stream_ai_reply(client, messages, max_tokens=1000, model=DEFAULT_MODEL, temperature=0.9, route=None):
+    """Yield the completion text piece by piece as tokens arrive.
+
+    Shares the concurrency limit, retries and breaker with get_ai_reply.
+    Only opening the stream is retried (nothing has reached the user yet);
+    OPENAI_TIMEOUT also applies to each gap between chunks, so a long reply
+    that keeps flowing is never cut off. A stream closed before its end
+    records nothing on the breaker.
+    """
+    async with _semaphore:
+        trial = breaker.before_call()
+        try:
+            started = time.monotonic()
+            stream = await _call_with_retries(lambda: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            ))
+            chunks = stream.__aiter__()
+            first_token_after = None
+            final_usage = None
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=OPENAI_TIMEOUT)
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    if _is_retryable(e):
+                        breaker.record_failure()
+                    raise
+                if chunk.usage is not None:
+                    final_usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_after is None:
+                        first_token_after = time.monotonic() - started
+                        logger.debug(f"⚡ First token after {first_token_after:.2f}s")
+                        metrics.openai_first_token_seconds.observe(first_token_after, route=route or "default")
+                    yield delta
+            breaker.record_success()
+            latency = time.monotonic() - started
+            metrics.openai_request_seconds.observe(latency, route=route or "default", stream="1")
+            usage.record(route, model, final_usage, latency, first_token_after)
+        finally:
+            breaker.release_trial(trial)  # cancelled or closed early: neither success nor failure
@@ -0,0 +1,181 @@
+import os
+import sys
+import copy
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from dotenv import load_dotenv
+
+# ==========================
+# 🌍 LOAD ENVIRONMENT
+# ==========================
+load_dotenv()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING")   # per subsystem, e.g. "broadcast=WARNING,llm=DEBUG"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")             # json | text
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records waiting for the writer; more are dropped
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "20"))     # records per call site per window (0 = no sampling)
+LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", "60"))  # seconds
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(processName)s %(name)s %(message)s"
+
+# ==========================
+# 🎲 SAMPLING
+# ==========================
+class SamplingFilter(logging.Filter):
+    """Let ``burst`` records per call site through per ``window`` seconds and count the rest.
+
+    A line logged once per user inside a loop then costs a handful of lines
+    per window instead of one per user. The first record let through after
+    a window carries ``suppressed``: how many were dropped before it.
+    Only DEBUG and INFO records are sampled; warnings and errors always pass.
+    """
+
+    def __init__(self, burst=LOG_SAMPLE_BURST, window=LOG_SAMPLE_WINDOW):
+        super().__init__()
+        self.burst, self.window = burst, window
+        self._sites = {}  # (logger, file, line) -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or record.created - site[0] >= self.window:
+                if site is not None and site[2]:
+                    record.suppressed = site[2]
+                self._sites[key] = [record.created, 1, 0]
+                return True
+            if site[1] < self.burst:
+                site[1] += 1
+                return True
+            site[2] += 1
+            return False
+
+# ==========================
+# 📮 QUEUE HANDLER
+# ==========================
+class _QueueHandler(QueueHandler):
+    """Enqueue without blocking the caller; when the writer falls behind, drop and count."""
+
+    def __init__(self, records):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only merge msg and args here; JSON or text formatting happens on the writer thread.
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{line} (+{suppressed} similar suppressed)" if suppressed else line
+
+def _json_formatter():
+    from pythonjsonlogger.json import JsonFormatter
+    return JsonFormatter(
+        "%(levelname)s %(name)s %(processName)s %(message)s",
+        rename_fields={"levelname": "level", "name": "logger", "processName": "process"},
+        timestamp=True,
+        json_ensure_ascii=False,
+    )
+
+def parse_levels(spec):
+    """'bot=DEBUG, broadcast=WARNING' -> {'bot': 'DEBUG', 'broadcast': 'WARNING'}"""
+    levels = {}
+    for part in spec.split(","):
+        name, _, level = part.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+# ==========================
+# 🚀 SETUP
+# ==========================
+_listener = None
+_queue_handler = None
+_writer = None
+
+def setup_logging(level=LOG_LEVEL, levels=LOG_LEVELS, fmt=LOG_FORMAT, stream=None, sample_burst=LOG_SAMPLE_BURST):
+    """Send every log record through a queue to one background writer thread.
+
+    Call once from each entry point (and in each worker process); later
+    calls are no-ops. Callers only pay for building the record and an
+    enqueue; formatting and I/O happen on the writer thread.
+    """
+    global _listener, _queue_handler, _writer
+    if _listener is not None:
+        return
+    _writer = logging.StreamHandler(stream or sys.stderr)
+    _writer.setFormatter(_json_formatter() if fmt == "json" else _TextFormatter(TEXT_FORMAT))
+    _queue_handler = _QueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(SamplingFilter(sample_burst))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper())
+    for name, subsystem_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(subsystem_level)
+
+    _listener = QueueListener(_queue_handler.queue, _writer)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Drain the queue and write directly from now on (for exit-time logging)."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    root.addHandler(_writer)
+    if _queue_handler.dropped:
+        root.warning(f"⚠️ {_queue_handler.dropped} log record(s) dropped: the log writer fell behind")
+
+# 🧪 Usage: python logging_setup.py  (caller-side cost of a log call: direct vs queued vs sampled)
+if __name__ == "__main__":
+    lines = 50_000
+    bench = logging.getLogger("bench")
+    with open(os.devnull, "w") as sink:
+        for label in ("direct", "queued", "queued+sampled"):
+            root = logging.getLogger()
+            for handler in root.handlers[:]:
+                root.removeHandler(handler)
+            if label == "direct":
+                handler = logging.StreamHandler(sink)
+                handler.setFormatter(_json_formatter())
+                root.addHandler(handler)
+                root.setLevel(logging.INFO)
+            else:
+                LOG_QUEUE_SIZE = lines + 1
+                setup_logging(stream=sink, sample_burst=LOG_SAMPLE_BURST if label.endswith("sampled") else 0)
+            started = time.perf_counter()
+            for user_id in range(lines):
+                bench.info(f"✅ Sent daily check-in to {user_id}")
+            caller = time.perf_counter() - started
+            stop_logging()
+            total = time.perf_counter() - started
+            print(f"{label:>15}: {caller / lines * 1e6:5.2f} µs per call on the caller, "
+                  f"{total:.2f}s until {lines} lines were written")
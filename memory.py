@@ -0,0 +1,119 @@
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+
+# ==========================
+# 🌍 SETTINGS
+# ==========================
+MEMORY_MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "12"))              # recent messages kept verbatim
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1200"))      # summary + recent turns per request
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "250"))   # cap on the rolling summary
+MEMORY_TURN_TOKENS = int(os.getenv("MEMORY_TURN_TOKENS", "300"))         # long replies are clipped to this
+MEMORY_MAX_USERS = int(os.getenv("MEMORY_MAX_USERS", "10000"))           # conversations kept in memory
+
+# ==========================
+# 🔢 TOKEN ESTIMATE
+# ==========================
+def estimate_tokens(text):
+    """Cheap local token estimate: ~4 UTF-8 bytes per token.
+
+    Close enough to the real tokenizer for English, and it counts
+    Devanagari (3 bytes per character) as the heavier text it is.
+    """
+    return (len(text.encode("utf-8")) + 3) // 4 if text else 0
+
+def clip_to_tokens(text, max_tokens):
+    """Cut text to roughly ``max_tokens`` tokens, at a word boundary if possible."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    clipped = text.encode("utf-8")[:max_tokens * 4].decode("utf-8", errors="ignore")
+    cut = clipped.rfind(" ")
+    return (clipped[:cut] if cut > len(clipped) // 2 else clipped) + " …"
+
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?।])(\s|$)", re.S)
+
+def _gist(text, max_tokens=40):
+    """First sentence of a turn, clipped: what the rolling summary keeps of it."""
+    text = " ".join(text.split())
+    match = _FIRST_SENTENCE.match(text)
+    return clip_to_tokens(match.group(1) if match else text, max_tokens)
+
+# ==========================
+# 🧠 CONVERSATION MEMORY
+# ==========================
+class ConversationMemory:
+    """Recent turns of one chat plus a rolling summary of older ones.
+
+    Turns past MEMORY_MAX_TURNS, or past the token budget, are folded into
+    the summary one at a time (as their first sentence), and the summary
+    itself drops its oldest lines beyond MEMORY_SUMMARY_TOKENS. The context
+    sent with a request therefore never exceeds MEMORY_TOKEN_BUDGET tokens,
+    however long the conversation runs.
+    """
+
+    def __init__(self):
+        self.turns = deque()          # (role, content, tokens)
+        self.summary_lines = deque()  # (line, tokens)
+        self._turn_tokens = 0
+        self._summary_tokens = 0
+
+    @property
+    def summary(self):
+        return " ".join(line for line, _ in self.summary_lines)
+
+    def add(self, role, content):
+        content = clip_to_tokens(content.strip(), MEMORY_TURN_TOKENS)
+        if not content:
+            return
+        tokens = estimate_tokens(content)
+        self.turns.append((role, content, tokens))
+        self._turn_tokens += tokens
+        self._compact()
+
+    def _compact(self):
+        while self.turns and (
+            len(self.turns) > MEMORY_MAX_TURNS
+            or self._turn_tokens + self._summary_tokens > MEMORY_TOKEN_BUDGET
+        ):
+            role, content, tokens = self.turns.popleft()
+            self._turn_tokens -= tokens
+            line = f"{'User' if role == 'user' else 'You'}: {_gist(content)}"
+            line_tokens = estimate_tokens(line)
+            self.summary_lines.append((line, line_tokens))
+            self._summary_tokens += line_tokens
+            while self._summary_tokens > MEMORY_SUMMARY_TOKENS and self.summary_lines:
+                _, dropped = self.summary_lines.popleft()
+                self._summary_tokens -= dropped
+
+    def messages(self):
+        """Recent turns as chat-completion messages, oldest first."""
+        return [{"role": role, "content": content} for role, content, _ in self.turns]
+
+    def tokens(self):
+        return self._turn_tokens + self._summary_tokens
+
+# ==========================
+# 🗃️ PER-USER STORE
+# ==========================
+_memories = OrderedDict()
+_lock = threading.Lock()
+
+def get_memory(user_id):
+    """Return the user's conversation memory (least recently used users are dropped)."""
+    user_id = str(user_id)
+    with _lock:
+        memory = _memories.get(user_id)
+        if memory is None:
+            memory = _memories[user_id] = ConversationMemory()
+            if len(_memories) > MEMORY_MAX_USERS:
+                _memories.popitem(last=False)
+        else:
+            _memories.move_to_end(user_id)
+        return memory
+
+def remember_exchange(user_id, user_text, reply):
+    """Record one user message and the bot's reply."""
+    memory = get_memory(user_id)
+    memory.add("user", user_text)
+    memory.add("assistant", reply)
@@ -0,0 +1,252 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from dotenv import load_dotenv
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 LOAD ENVIRONMENT
+# ==========================
+load_dotenv()
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))                  # serve /metrics here (0 = no endpoint)
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "0"))  # seconds between log dumps (0 = never)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# ==========================
+# 📏 METRIC TYPES
+# ==========================
+# Every recording method returns at once when METRICS_ENABLED is off, and
+# timers hand back one shared no-op context manager, so instrumented code
+# pays a flag check and nothing else.
+_registry = []
+_lock = threading.Lock()
+
+def _key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name, self.help = name, help_text
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = _key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        return [(self.name, key, value) for key, value in self._values.items()]
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help_text):
+        self.name, self.help = name, help_text
+        self._values = {}
+        self._functions = {}
+        _registry.append(self)
+
+    def set(self, value, **labels):
+        if METRICS_ENABLED:
+            self._values[_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = _key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function, **labels):
+        """Read the value from ``function()`` at scrape time (e.g. a queue's qsize)."""
+        self._functions[_key(labels)] = function
+
+    def samples(self):
+        values = dict(self._values)
+        for key, function in self._functions.items():
+            try:
+                values[key] = function()
+            except Exception:
+                continue
+        return [(self.name, key, value) for key, value in values.items()]
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram, self.labels = histogram, labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+_NOOP_TIMER = _NoopTimer()
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name, self.help = name, help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # label key -> [bucket counts..., +Inf count, sum]
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = _key(labels)
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """``with histogram.time(stage="x"):`` records the block's duration in seconds."""
+        return _Timer(self, labels) if METRICS_ENABLED else _NOOP_TIMER
+
+    def samples(self):
+        samples = []
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", key + (("le", bound),), cumulative))
+            samples.append((f"{self.name}_sum", key, series[-1]))
+            samples.append((f"{self.name}_count", key, cumulative))
+        return samples
+
+# ==========================
+# 📊 BOT METRICS
+# ==========================
+handler_stage_seconds = Histogram("vyaara_handler_stage_seconds", "Time spent in each stage of handle_message")
+handler_messages_total = Counter("vyaara_handler_messages_total", "Messages handled, by outcome")
+chat_locks = Gauge("vyaara_chat_locks", "Chats with a message being handled or waiting")
+update_queue_depth = Gauge("vyaara_update_queue_depth", "Updates waiting in the application queue")
+
+openai_request_seconds = Histogram("vyaara_openai_request_seconds", "OpenAI call latency, retries included")
+openai_first_token_seconds = Histogram("vyaara_openai_first_token_seconds", "Time to the first streamed token")
+openai_tokens_total = Counter("vyaara_openai_tokens_total", "OpenAI tokens, by route and kind")
+openai_errors_total = Counter("vyaara_openai_errors_total", "Failed OpenAI attempts, by error type")
+openai_breaker_open = Gauge("vyaara_openai_breaker_open", "1 while the OpenAI circuit breaker is open")
+
+reply_cache_lookups_total = Counter("vyaara_reply_cache_lookups_total", "Reply cache lookups, by result (hit, miss, disk_hit)")
+reply_cache_stores_total = Counter("vyaara_reply_cache_stores_total", "Replies stored as cache variants")
+reply_cache_evictions_total = Counter("vyaara_reply_cache_evictions_total", "Reply cache keys evicted to stay under the size limit")
+reply_cache_keys = Gauge("vyaara_reply_cache_keys", "Keys in the in-memory reply cache")
+reply_cache_bytes = Gauge("vyaara_reply_cache_bytes", "Approximate size of the in-memory reply cache")
+
+telegram_send_seconds = Histogram("vyaara_telegram_send_seconds", "Telegram send latency, by job")
+telegram_send_failures_total = Counter("vyaara_telegram_send_failures_total", "Failed Telegram sends, by job and reason")
+
+broadcast_in_flight = Gauge("vyaara_broadcast_in_flight", "Broadcast messages being delivered right now")
+broadcast_messages_total = Counter("vyaara_broadcast_messages_total", "Broadcast deliveries, by job and outcome")
+scheduler_tick_seconds = Histogram("vyaara_scheduler_tick_seconds", "Duration of one reminder tick")
+scheduler_indexed_reminders = Gauge("vyaara_scheduler_indexed_reminders", "Reminders in the scheduler index")
+scheduler_due_reminders = Gauge("vyaara_scheduler_due_reminders", "Reminders that came due on the last tick")
+
+# ==========================
+# 📤 EXPOSITION
+# ==========================
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for metric in _registry:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in samples:
+                lines.append(f"{name}{_format_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
+
+async def _serve_connection(reader, writer):
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        path = request_line.decode("latin-1").split(" ")[1] if request_line.count(b" ") >= 2 else ""
+        status, body = ("200 OK", render().encode()) if path.split("?")[0] == "/metrics" else ("404 Not Found", b"")
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def _log_periodically(interval):
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("📊 Metrics\n" + render())
+
+async def start(port=None, host=None):
+    """Start the /metrics endpoint and/or the periodic log dump on the running loop.
+
+    Port and host default to METRICS_PORT / METRICS_HOST as set in the
+    environment when this is called, so each worker process (see
+    workers.py) serves on its own port.
+    """
+    if not METRICS_ENABLED:
+        return
+    port = int(os.getenv("METRICS_PORT", "0")) if port is None else port
+    host = host or os.getenv("METRICS_HOST", METRICS_HOST)
+    if port:
+        await asyncio.start_server(_serve_connection, host, port)
+        logger.info(f"📊 Metrics on http://{host}:{port}/metrics")
+    if METRICS_LOG_INTERVAL > 0:
+        asyncio.get_running_loop().create_task(_log_periodically(METRICS_LOG_INTERVAL))
+
+# 🧪 Usage: python metrics.py  (overhead of the disabled and enabled paths)
+if __name__ == "__main__":
+    rounds = 200_000
+    for enabled in (False, True):
+        METRICS_ENABLED = enabled
+        started = time.perf_counter()
+        for _ in range(rounds):
+            with handler_stage_seconds.time(stage="bench"):
+                pass
+            openai_tokens_total.inc(10, route="bench", kind="prompt")
+        per_call = (time.perf_counter() - started) / rounds * 1e9
+        print(f"{'enabled' if enabled else 'disabled':>8}: {per_call:.0f} ns per timer + counter")
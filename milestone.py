@@ -1,25 +1,22 @@
-import os
+import heapq
 import asyncio
 import logging
-from datetime import datetime
+from datetime import date, timedelta
 from dotenv import load_dotenv
-from telegram import Bot
-from database import get_all_user_ids, get_user_data, get_user_milestones
+from services import get_bot
+from database import add_user_listener, get_all_users, refresh
+from broadcast import broadcast
+from logging_setup import setup_logging
 
 # ==========================
 # ⚙️ CONFIGURE LOGGING
 # ==========================
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
 # ==========================
 # 🌍 LOAD ENVIRONMENT
 # ==========================
 load_dotenv()
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-if not TELEGRAM_TOKEN:
-    raise ValueError("❌ TELEGRAM_TOKEN is NOT defined in .env.")
-bot = Bot(token=TELEGRAM_TOKEN)
 
 # ==========================
 # 🎉 DEFAULT MILESTONE MESSAGES
@@ -30,6 +27,12 @@ DEFAULT_MILESTONES = {
     100: ("🌟 100 days together, {name}! What a beautiful milestone. 🌺 Stay strong and hopeful — I'm with you!"),
 }
 
+CONVERSATION_MILESTONES = {
+    10: "💬 That's our 10th conversation, {name}! 🌱 Thank you for trusting me with your thoughts.",
+    50: "🌈 50 conversations together, {name}! 🌷 I love watching you grow.",
+    100: "🌟 100 conversations, {name}! 🌺 You keep showing up for yourself — I'm so proud of you!",
+}
+
 BADGES = {
     7: ("🏅", None),    # You can add custom sticker files
     30: ("🌳", None),
@@ -39,62 +42,190 @@ BADGES = {
 # ==========================
 # ⚡ SEND MILESTONE MESSAGE
 # ==========================
-async def send_milestone_message(chat_id: str, text: str, sticker_id: str = None) -> None:
-    """Send milestone text and optional sticker to the user."""
-    try:
-        await bot.send_message(chat_id=chat_id, text=text)
-        logger.info(f"✅ Sent milestone text to {chat_id}")
-
-        if sticker_id:
-            await bot.send_sticker(chat_id=chat_id, sticker=sticker_id)
-            logger.info(f"✅ Sent milestone sticker to {chat_id}")
-
-    except Exception as e:
-        logger.error(f"❌ Could not send milestone message to {chat_id}: {e}")
+async def send_milestone_message(bot, chat_id: str, payload: tuple) -> None:
+    """Send milestone text and optional sticker to the user (broadcast sender)."""
+    text, sticker_id = payload
+    await bot.send_message(chat_id=chat_id, text=text)
+    if sticker_id:
+        await bot.send_sticker(chat_id=chat_id, sticker=sticker_id)
 
 # ==========================
 # 🎯 GENERATE MILESTONE MESSAGE
 # ==========================
+def _start_date(user_milestones):
+    try:
+        return date.fromisoformat(user_milestones.get("start_date"))
+    except (TypeError, ValueError):
+        return None
+
+def milestone_days(user_milestones: dict) -> set:
+    """Days since joining that are milestones: the defaults plus custom_dates.
+
+    A custom date is either a day count (45) or a calendar date ('2025-12-31').
+    """
+    days = set(DEFAULT_MILESTONES)
+    start = _start_date(user_milestones)
+    for custom in user_milestones.get("custom_dates", []):
+        if isinstance(custom, int):
+            days.add(custom)
+            continue
+        try:
+            if start:
+                days.add((date.fromisoformat(str(custom)) - start).days)
+        except ValueError:
+            continue
+    return {day for day in days if day > 0}
+
 def milestone_message(days_since_joined: int, user_name: str, user_milestones: dict) -> (str, str):
     """Return a milestone message and sticker if applicable."""
-    available_dates = user_milestones.get("custom_dates", [])
-    available_conversations = user_milestones.get("custom_conversations", [])
+    if days_since_joined not in milestone_days(user_milestones):
+        return None, None
+    text_template = DEFAULT_MILESTONES.get(days_since_joined) or "🌷 {name}, we've hit a special milestone: {milestone}! 🌟"
+    text = text_template.format(name=user_name or "friend", milestone=f"{days_since_joined} days together")
+    sticker_id = BADGES.get(days_since_joined, (None, None))[1]
+    return text, sticker_id
+
+def conversation_milestone_message(conversations: int, user_name: str, user_milestones: dict) -> (str, str):
+    """Return a message and sticker when ``conversations`` is a conversation-count milestone."""
+    if conversations in CONVERSATION_MILESTONES:
+        text_template = CONVERSATION_MILESTONES[conversations]
+    elif conversations in user_milestones.get("custom_conversations", []):
+        text_template = "🌷 {name}, we've hit a special milestone: {milestone}! 🌟"
+    else:
+        return None, None
+    return text_template.format(name=user_name or "friend", milestone=f"{conversations} conversations"), None
 
-    milestones = set(DEFAULT_MILESTONES.keys())
-    for milestone in milestones:
-        if days_since_joined == milestone:
-            text_template = DEFAULT_MILESTONES.get(milestone) or "🌷 {name}, we've hit a special milestone: {milestone}! 🌟"
-            text = text_template.format(name=user_name, milestone=milestone)
-            sticker_id = BADGES.get(milestone, (None, None))[1]
-            return text, sticker_id
-
-    return None, None
+# ==========================
+# 🗂️ DUE-DATE INDEX
+# ==========================
+def next_milestone_date(user_milestones: dict, after: date):
+    """The first milestone date on or after ``after``, or None if there is none left."""
+    start = _start_date(user_milestones)
+    if start is None:
+        return None
+    dates = [start + timedelta(days=day) for day in milestone_days(user_milestones)]
+    upcoming = [due for due in dates if due >= after]
+    return min(upcoming) if upcoming else None
+
+class MilestoneIndex:
+    """Each user's next milestone date, grouped into per-day buckets ordered by a min-heap.
+
+    The daily job pops only today's bucket instead of scanning every user.
+    Users are re-indexed when their record changes, but only if their start
+    date or custom dates did.
+    """
+
+    def __init__(self):
+        self._buckets = {}   # date ordinal -> set of user ids
+        self._heap = []      # date ordinals that (may) have a bucket
+        self._by_user = {}   # user_id -> (date ordinal, signature)
+
+    def __len__(self):
+        return len(self._by_user)
+
+    def _remove(self, user_id):
+        ordinal, _ = self._by_user.pop(user_id, (None, None))
+        bucket = self._buckets.get(ordinal)
+        if bucket is not None:
+            bucket.discard(user_id)
+            if not bucket:
+                del self._buckets[ordinal]
+
+    def _add(self, user_id, due, signature):
+        ordinal = due.toordinal() if due else None
+        self._by_user[user_id] = (ordinal, signature)
+        if ordinal is None:
+            return
+        bucket = self._buckets.get(ordinal)
+        if bucket is None:
+            bucket = self._buckets[ordinal] = set()
+            heapq.heappush(self._heap, ordinal)
+        bucket.add(user_id)
+
+    def update_user(self, user_id, user_data, today=None):
+        user_id = str(user_id)
+        user_milestones = user_data.get("milestones") or {}
+        signature = (user_milestones.get("start_date"), repr(user_milestones.get("custom_dates")))
+        if user_id in self._by_user and self._by_user[user_id][1] == signature:
+            return  # e.g. only the conversation counter changed
+        self._remove(user_id)
+        self._add(user_id, next_milestone_date(user_milestones, today or date.today()), signature)
+
+    def rebuild(self, users, today=None):
+        today = today or date.today()
+        self._buckets, self._heap, self._by_user = {}, [], {}
+        for user_id, user_data in users.items():
+            self.update_user(user_id, user_data, today)
+
+    def pop_due(self, today, users):
+        """Remove and return (user_id, due date) for every milestone due by ``today``.
+
+        Each popped user is re-indexed for their next milestone after the
+        popped one, so after a missed day both that day and today come out.
+        """
+        today_ordinal = today.toordinal()
+        due = []
+        while self._heap and self._heap[0] <= today_ordinal:
+            ordinal = heapq.heappop(self._heap)
+            for user_id in self._buckets.pop(ordinal, ()):
+                popped = date.fromordinal(ordinal)
+                due.append((user_id, popped))
+                _, signature = self._by_user.pop(user_id)
+                user_milestones = (users.get(user_id) or {}).get("milestones") or {}
+                self._add(user_id, next_milestone_date(user_milestones, popped + timedelta(days=1)), signature)
+        return due
+
+milestone_index = MilestoneIndex()
+_index_ready = False
+
+def _ensure_index():
+    global _index_ready
+    if not _index_ready:
+        milestone_index.rebuild(get_all_users())
+        add_user_listener(milestone_index.update_user)
+        _index_ready = True
 
 # ==========================
 # 🎉 MAIN ENTRYPOINT
 # ==========================
-async def send_milestones():
-    """Check user milestones and send celebratory messages."""
-    ids = get_all_user_ids()
-    for chat_id in ids:
-        user_data = get_user_data(chat_id)
-
-        if user_data:
-            user_name = user_data.get("name", "")
-            milestones = get_user_milestones(chat_id)
-
-            days_since_joined = milestones.get("days_since_start", 0)
-
-            text, sticker_id = milestone_message(days_since_joined, user_name, user_data.get("milestones", {}))
-
-            if text:
-                await send_milestone_message(chat_id, text, sticker_id)
+def due_milestones(today=None):
+    """Return [(chat_id, (text, sticker_id))] for users who reach a day milestone today."""
+    _ensure_index()
+    refresh()
+    today = today or date.today()
+    users = get_all_users()
+    items, missed = [], 0
+    for chat_id, due in milestone_index.pop_due(today, users):
+        if due != today:
+            missed += 1  # the job did not run that day; a late "1 week" message would be wrong
+            continue
+        user_data = users.get(chat_id) or {}
+        user_milestones = user_data.get("milestones") or {}
+        text, sticker_id = milestone_message((today - _start_date(user_milestones)).days, user_data.get("name"), user_milestones)
+        if text:
+            items.append((chat_id, (text, sticker_id)))
+    if missed:
+        logger.warning(f"⏭️ Skipped {missed} milestone(s) that were due on earlier days")
+    return items
+
+async def send_milestones(bot):
+    """Send today's day-based milestone messages to the users who reached one."""
+    return await broadcast(bot, due_milestones(), name="milestones", send=send_milestone_message)
+
+async def celebrate_conversation(message, user_data, conversations):
+    """Reply inline when the user's conversation counter just reached a milestone."""
+    text, sticker_id = conversation_milestone_message(conversations, user_data.get("name"), user_data.get("milestones") or {})
+    if text:
+        await message.reply_text(text)
+        if sticker_id:
+            await message.reply_sticker(sticker_id)
 
 # ==========================
 # ⚡ TESTING
 # ==========================
 if __name__ == '__main__':
     """Run milestone.py standalone for testing."""
+    setup_logging()
     async def main():
-        await send_milestones()
+        await send_milestones(get_bot())
     asyncio.run(main())
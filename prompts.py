@@ -1,72 +1,88 @@
+import os
 import re
-from langdetect import detect, LangDetectException
+import asyncio
+import logging
 from openai import OpenAIError
+from llm import DEFAULT_MODEL, CircuitOpenError, get_ai_reply, stream_ai_reply
+import usage
+from tone_analysis import analyze_tone, get_tone_based_message
+from keywords import scan
+from memory import get_memory, remember_exchange
+import reply_cache
+import metrics
+from language import detect_user_language
+
+logger = logging.getLogger(__name__)
 
 # ==========================
 # 🌎 LANGUAGE + TONE UTILS
 # ==========================
 
-GENZ_HINGLISH_SLANG = {
-    "hn", "hm", "yup", "lmao", "lol", "brb", "idk", "omg", "wassup",
-    "kya", "kyu", "mene", "kaha", "shi", "acha", "nahi", "thik", "ha", "haan", "ok", "okay"
-}
+def is_professional_query(text, hits=None):
+    hits = scan(text) if hits is None else hits
+    return "professional" in hits
 
-def detect_user_language(text):
-    try:
-        # If slang or Hinglish-like words present, force English
-        words = set(re.findall(r'\b\w+\b', text.lower()))
-        if words & GENZ_HINGLISH_SLANG:
-            return "en"
-
-        detected = detect(text)
-        # If detected language is not en or hi and text is short, fallback to English
-        if detected not in ["en", "hi"] and len(text.split()) <= 5:
-            return "en"
-        return detected
-    except LangDetectException:
-        return "en"
-
-def is_professional_query(text):
-    return bool(re.search(
-        r'\b(business|career|startup|project|plan|goal|strategy|job|internship|company)\b',
-        text.lower()
-    ))
-
-def get_mood_emoji(text):
-    text = text.lower()
-    if any(word in text for word in ["sad", "depressed", "cry"]):
+def get_mood_emoji(text, hits=None):
+    hits = scan(text) if hits is None else hits
+    if "mood_sad" in hits:
         return "🌧️"
-    if any(word in text for word in ["happy", "excited", "good"]):
+    if "mood_happy" in hits:
         return "🌷"
     return "😊"
 
 # ==========================
 # 💡 AI PROMPT BUILDERS
 # ==========================
+# The instructions never change, so they go first as a system message. Every
+# request for a route then starts with the same bytes (followed by the
+# chat's stable history), which lets OpenAI's prompt caching reuse the
+# prefix. Only the final user message varies per request.
+
+PROFESSIONAL_SYSTEM_PROMPT = (
+    "You are a knowledgeable and friendly AI mentor.\n\n"
+    "👉 Be long and detailed (15-20 sentences).\n"
+    "👉 Use clear line spacing.\n"
+    "👉 Include bullets (•), arrows (→), numbered lists where helpful.\n"
+    "👉 Add suitable emojis to make the reply lively.\n"
+    "👉 Provide practical steps, examples, and actionable tips.\n"
+    "👉 Avoid generic advice, make it specific and engaging.\n"
+    "👉 Format like ChatGPT: clear, friendly, easy to read.\n"
+    "👉 Reply in the language given with each message."
+)
+
+CASUAL_SYSTEM_PROMPT = (
+    "You are a sweet, kind AI friend.\n\n"
+    "👉 Keep it short and warm (2-4 sentences).\n"
+    "👉 Add friendly emojis.\n"
+    "👉 Add a reflection line like '🌱 How does that feel to you?' if emotional words detected.\n"
+    "👉 Reply in the language given with each message."
+)
 
-def build_professional_prompt(text, lang):
-    return (
-        f"You are a knowledgeable and friendly AI mentor.\n"
-        f"Reply in this language: {lang}.\n\n"
-        f"👉 Be long and detailed (15-20 sentences).\n"
-        f"👉 Use clear line spacing.\n"
-        f"👉 Include bullets (•), arrows (→), numbered lists where helpful.\n"
-        f"👉 Add suitable emojis to make the reply lively.\n"
-        f"👉 Provide practical steps, examples, and actionable tips.\n"
-        f"👉 Avoid generic advice, make it specific and engaging.\n"
-        f"👉 Format like ChatGPT: clear, friendly, easy to read.\n\n"
-        f"The user said: {text}"
-    )
-
-def build_casual_prompt(text, lang):
-    return (
-        f"You are a sweet, kind AI friend.\n"
-        f"Reply in this language: {lang}.\n\n"
-        f"👉 Keep it short and warm (2-4 sentences).\n"
-        f"👉 Add friendly emojis.\n"
-        f"👉 Add a reflection line like '🌱 How does that feel to you?' if emotional words detected.\n\n"
-        f"The user said: {text}"
-    )
+# Per-route model and max_tokens ceiling; max_tokens shrinks to the measured
+# reply lengths (see usage.suggested_max_tokens).
+ROUTE_SETTINGS = {
+    "professional": {
+        "system": PROFESSIONAL_SYSTEM_PROMPT,
+        "model": os.getenv("OPENAI_MODEL_PROFESSIONAL", DEFAULT_MODEL),
+        "max_tokens": int(os.getenv("OPENAI_MAX_TOKENS_PROFESSIONAL", "3000")),
+    },
+    "casual": {
+        "system": CASUAL_SYSTEM_PROMPT,
+        "model": os.getenv("OPENAI_MODEL_CASUAL", DEFAULT_MODEL),
+        "max_tokens": int(os.getenv("OPENAI_MAX_TOKENS_CASUAL", "500")),
+    },
+}
+
+def _summary_line(summary):
+    return f"What you remember from earlier in this conversation: {summary}\n" if summary else ""
+
+def build_user_prompt(text, lang, summary=None):
+    """The per-request part of the prompt; the route's wording lives in its system prompt."""
+    return f"Reply in this language: {lang}.\n{_summary_line(summary)}The user said: {text}"
+
+def build_messages(route, prompt, history=()):
+    """System instructions, then the chat history, then this request's prompt."""
+    return [{"role": "system", "content": ROUTE_SETTINGS[route]["system"]}, *history, {"role": "user", "content": prompt}]
 
 # ==========================
 # 🧹 CLEAN REPLY
@@ -85,35 +101,97 @@ def clean_reply(text):
 # 🌟 ROUTING REPLY
 # ==========================
 
-def route_message(client, text):
-    lang = detect_user_language(text)
-
-    if is_professional_query(text):
-        pro_prompt = build_professional_prompt(text, lang)
-        try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": pro_prompt}],
-                temperature=0.9,
-                max_tokens=3000
-            )
-            return clean_reply(response.choices[0].message.content.strip())
-        except OpenAIError as e:
-            return f"⚡ OpenAI error: {e}"
-        except Exception as e:
-            return f"❗ Unexpected error: {e}"
-
-    casual_prompt = build_casual_prompt(text, lang)
+TIMEOUT_REPLY = "⏳ Sorry, that took too long. Please try again in a moment. 🌷"
+
+def _prepare_route(text, user_id=None, hits=None):
+    """Return (route, messages, suffix, cache_key) for the route the text belongs to."""
+    with metrics.handler_stage_seconds.time(stage="language"):
+        lang = detect_user_language(text, user_id)
+    hits = scan(text) if hits is None else hits
+    tone = analyze_tone(text, hits)
+    if is_professional_query(text, hits):
+        route, suffix = "professional", ""
+    else:
+        route, suffix = "casual", " " + get_mood_emoji(text, hits)
+    # Short casual messages ("hi", "ok thanks") are answered without the
+    # user's history so the reply can be shared through the cache; a reply
+    # written with history or a summary in the prompt never is.
+    cache_key = reply_cache.make_key(text, lang, route, tone)
+    history, summary = [], None
+    if user_id is not None and cache_key is None:
+        memory = get_memory(user_id)
+        history, summary = memory.messages(), memory.summary
+    return route, build_messages(route, build_user_prompt(text, lang, summary), history), suffix, cache_key
+
+def _request_options(route):
+    settings = ROUTE_SETTINGS[route]
+    return {
+        "model": settings["model"],
+        "max_tokens": usage.suggested_max_tokens(route, settings["max_tokens"]),
+        "route": route,
+    }
+
+def fallback_reply(text, hits=None):
+    """Canned, tone-matched reply used when OpenAI is down or keeps failing."""
+    return get_tone_based_message(analyze_tone(text, hits))
+
+def _remember(user_id, text, reply):
+    if user_id is not None:
+        remember_exchange(user_id, text, reply)
+
+async def route_message(client, text, user_id=None, hits=None):
+    with metrics.handler_stage_seconds.time(stage="prepare"):
+        route, messages, suffix, cache_key = _prepare_route(text, user_id, hits)
+    cached = reply_cache.get(cache_key)
+    if cached:
+        _remember(user_id, text, cached)
+        return cached
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": casual_prompt}],
-            temperature=0.9,
-            max_tokens=500
-        )
-        reply = response.choices[0].message.content.strip()
-        return clean_reply(reply) + " " + get_mood_emoji(text)
+        with metrics.handler_stage_seconds.time(stage="openai"):
+            reply = await get_ai_reply(client, messages, **_request_options(route))
+        with metrics.handler_stage_seconds.time(stage="clean"):
+            reply = clean_reply(reply) + suffix
+        reply_cache.put(cache_key, reply)
+        _remember(user_id, text, reply)
+        return reply
+    except CircuitOpenError:
+        return fallback_reply(text, hits)
     except OpenAIError as e:
-        return f"⚡ OpenAI error: {e}"
+        logger.warning(f"⚡ OpenAI error, sending a fallback reply: {e}")
+        return fallback_reply(text, hits)
+    except asyncio.TimeoutError:
+        return TIMEOUT_REPLY
     except Exception as e:
         return f"❗ Unexpected error: {e}"
+
+async def stream_route_message(client, text, user_id=None, hits=None):
+    """Streaming variant of route_message: yields raw reply fragments.
+
+    The caller is expected to run clean_reply over the assembled text.
+    """
+    with metrics.handler_stage_seconds.time(stage="prepare"):
+        route, messages, suffix, cache_key = _prepare_route(text, user_id, hits)
+    cached = reply_cache.get(cache_key)
+    if cached:
+        _remember(user_id, text, cached)
+        yield cached
+        return
+    try:
+        fragments = []
+        async for fragment in stream_ai_reply(client, messages, **_request_options(route)):
+            fragments.append(fragment)
+            yield fragment
+        if suffix:
+            yield suffix
+        reply = clean_reply("".join(fragments)) + suffix
+        reply_cache.put(cache_key, reply)
+        _remember(user_id, text, reply)
+    except CircuitOpenError:
+        yield ("\n" if fragments else "") + fallback_reply(text, hits)
+    except OpenAIError as e:
+        logger.warning(f"⚡ OpenAI error, sending a fallback reply: {e}")
+        yield ("\n" if fragments else "") + fallback_reply(text, hits)
+    except asyncio.TimeoutError:
+        yield "\n" + TIMEOUT_REPLY
+    except Exception as e:
+        yield f"\n❗ Unexpected error: {e}"
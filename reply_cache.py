@@ -0,0 +1,166 @@
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+from cachetools import TTLCache
+from dotenv import load_dotenv
+import metrics
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 LOAD ENVIRONMENT
+# ==========================
+load_dotenv()
+REPLY_CACHE_ENABLED = os.getenv("REPLY_CACHE_ENABLED", "1") == "1"
+REPLY_CACHE_TTL = float(os.getenv("REPLY_CACHE_TTL", "21600"))                  # seconds a key stays fresh
+REPLY_CACHE_MAX_BYTES = int(os.getenv("REPLY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+REPLY_CACHE_VARIANTS = int(os.getenv("REPLY_CACHE_VARIANTS", "3"))              # replies kept per key
+REPLY_CACHE_MAX_WORDS = int(os.getenv("REPLY_CACHE_MAX_WORDS", "6"))            # only short messages are cached
+REPLY_CACHE_ROUTES = set(os.getenv("REPLY_CACHE_ROUTES", "casual").split(","))
+REPLY_CACHE_DISK = os.getenv("REPLY_CACHE_DISK", "")                            # sqlite path; empty = memory only
+
+# ==========================
+# 🔑 KEY NORMALIZATION
+# ==========================
+_ELONGATION = re.compile(r"(\w)\1{2,}")     # "sooo" -> "so", "tiredddd" -> "tired"
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_CONTRACTIONS = {"i'm": "i am", "im": "i am", "feelin": "feeling", "u": "you", "thx": "thanks", "ty": "thank you"}
+
+def normalize_text(text):
+    """Reduce a message to a canonical form so near-identical messages share a key."""
+    text = text.lower().replace("’", "'")
+    words = [_CONTRACTIONS.get(word, word) for word in text.split()]
+    text = _NON_WORD.sub(" ", " ".join(words))
+    text = _ELONGATION.sub(r"\1", text)
+    return _SPACES.sub(" ", text).strip()
+
+def make_key(text, lang, route, tone):
+    """Return the cache key for a message, or None if it should not be cached."""
+    if not REPLY_CACHE_ENABLED or route not in REPLY_CACHE_ROUTES:
+        return None
+    normalized = normalize_text(text)
+    if not normalized or len(normalized.split()) > REPLY_CACHE_MAX_WORDS:
+        return None
+    return f"{route}|{lang}|{tone}|{normalized}"
+
+# ==========================
+# 💾 CACHE TIERS
+# ==========================
+def _size_of(variants):
+    return sum(len(reply.encode("utf-8")) for reply in variants) + 64
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that counts size-based evictions (expired keys are not evictions)."""
+
+    def popitem(self):
+        item = super().popitem()
+        _stats["evictions"] += 1
+        metrics.reply_cache_evictions_total.inc()
+        return item
+
+_memory = _CountingTTLCache(maxsize=REPLY_CACHE_MAX_BYTES, ttl=REPLY_CACHE_TTL, getsizeof=_size_of)
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "disk_hits": 0, "stores": 0, "evictions": 0}
+metrics.reply_cache_keys.set_function(lambda: len(_memory))
+metrics.reply_cache_bytes.set_function(lambda: int(_memory.currsize))
+_disk = None
+
+def _disk_conn():
+    global _disk
+    if _disk is None and REPLY_CACHE_DISK:
+        _disk = sqlite3.connect(REPLY_CACHE_DISK, check_same_thread=False, isolation_level=None)
+        _disk.execute("PRAGMA journal_mode=WAL")
+        _disk.execute(
+            "CREATE TABLE IF NOT EXISTS replies ("
+            " key TEXT PRIMARY KEY, variants TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+    return _disk
+
+def _load_from_disk(key):
+    conn = _disk_conn()
+    if conn is None:
+        return None
+    row = conn.execute(
+        "SELECT variants FROM replies WHERE key = ? AND expires_at > ?", (key, time.time())
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+def _save_to_disk(key, variants):
+    conn = _disk_conn()
+    if conn is None:
+        return
+    conn.execute(
+        "INSERT OR REPLACE INTO replies (key, variants, expires_at) VALUES (?, ?, ?)",
+        (key, json.dumps(variants), time.time() + REPLY_CACHE_TTL),
+    )
+
+def _variants(key):
+    variants = _memory.get(key)
+    if variants is None:
+        variants = _load_from_disk(key)
+        if variants is not None:
+            _memory[key] = variants
+            _stats["disk_hits"] += 1
+            metrics.reply_cache_lookups_total.inc(result="disk_hit")
+    return variants
+
+# ==========================
+# 🔍 PUBLIC API
+# ==========================
+def get(key):
+    """Return a cached reply for the key, or None on a miss.
+
+    A key only starts answering once it holds REPLY_CACHE_VARIANTS replies,
+    so users don't all get the same wording; until then lookups miss and
+    the fresh replies are collected with put().
+    """
+    if key is None:
+        return None
+    with _lock:
+        variants = _variants(key)
+        if variants and len(variants) >= REPLY_CACHE_VARIANTS:
+            _stats["hits"] += 1
+            metrics.reply_cache_lookups_total.inc(result="hit")
+            return random.choice(variants)
+        _stats["misses"] += 1
+        metrics.reply_cache_lookups_total.inc(result="miss")
+        return None
+
+def put(key, reply):
+    """Remember a fresh reply as another variant for the key."""
+    if key is None or not reply:
+        return
+    with _lock:
+        variants = list(_variants(key) or [])
+        if reply in variants or len(variants) >= REPLY_CACHE_VARIANTS:
+            return
+        variants.append(reply)
+        _memory[key] = variants
+        _stats["stores"] += 1
+        metrics.reply_cache_stores_total.inc()
+        _save_to_disk(key, variants)
+
+def stats():
+    """Return hit/miss counters and current memory usage."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+            "keys": len(_memory),
+            "bytes": int(_memory.currsize),
+        }
+
+def clear():
+    """Drop every cached reply from memory (the disk tier is left alone)."""
+    with _lock:
+        _memory.clear()
@@ -0,0 +1,78 @@
+import os
+import logging
+from datetime import datetime, time
+from dotenv import load_dotenv
+from telegram.ext import ContextTypes
+from utils import resolve_timezone
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 LOAD ENVIRONMENT
+# ==========================
+load_dotenv()
+CHECKIN_TIME = os.getenv("CHECKIN_TIME", "20:00")          # HH:MM in DEFAULT_TIMEZONE; empty = off
+MILESTONE_TIME = os.getenv("MILESTONE_TIME", "09:00")
+GOOD_MORNING_TIME = os.getenv("GOOD_MORNING_TIME", "")      # off by default: reminders already greet at wake time
+GOOD_NIGHT_TIME = os.getenv("GOOD_NIGHT_TIME", "")
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "1") == "1"
+
+# ==========================
+# ⏰ JOB CALLBACKS
+# ==========================
+# Every job gets the application's Bot from the context, so they all share
+# one HTTP connection pool and the one in-process user store.
+async def reminders_job(context: ContextTypes.DEFAULT_TYPE):
+    from scheduler import run_scheduler
+    await run_scheduler(context.bot)
+
+async def check_ins_job(context: ContextTypes.DEFAULT_TYPE):
+    from daily_checkin import send_daily_check_ins
+    await send_daily_check_ins(context.bot)
+
+async def milestones_job(context: ContextTypes.DEFAULT_TYPE):
+    from milestone import send_milestones
+    await send_milestones(context.bot)
+
+async def good_morning_job(context: ContextTypes.DEFAULT_TYPE):
+    from daily_messages import send_good_morning
+    await send_good_morning(context.bot)
+
+async def good_night_job(context: ContextTypes.DEFAULT_TYPE):
+    from daily_messages import send_good_night
+    await send_good_night(context.bot)
+
+DAILY_JOBS = [
+    ("daily check-in", check_ins_job, CHECKIN_TIME),
+    ("milestones", milestones_job, MILESTONE_TIME),
+    ("good morning", good_morning_job, GOOD_MORNING_TIME),
+    ("good night", good_night_job, GOOD_NIGHT_TIME),
+]
+
+# ==========================
+# 🗓️ JOB REGISTRATION
+# ==========================
+def register_jobs(app):
+    """Put the reminder tick and the daily broadcasts on the application's job queue."""
+    if app.job_queue is None:
+        raise RuntimeError('❌ Job queue missing: install "python-telegram-bot[job-queue]".')
+    if REMINDERS_ENABLED:
+        # Tick just after each minute boundary, like the standalone scheduler loop.
+        now = datetime.now()
+        first = 60 - now.second - now.microsecond / 1_000_000 + 0.05
+        app.job_queue.run_repeating(reminders_job, interval=60, first=first, name="reminders")
+    tz = resolve_timezone()
+    for name, callback, hhmm in DAILY_JOBS:
+        if not hhmm:
+            continue
+        hour, minute = map(int, hhmm.split(":"))
+        app.job_queue.run_daily(callback, time(hour, minute, tzinfo=tz), name=name)
+        logger.info(f"🗓️ Scheduled {name} daily at {hhmm}")
+
+# 🧪 Usage: python runner.py  (bot + reminders + daily jobs on one event loop)
+if __name__ == "__main__":
+    from bot import main
+    main(with_jobs=True)
@@ -0,0 +1,171 @@
+import re
+import time
+from dataclasses import dataclass
+
+# ==========================
+# 🧩 GRAMMAR
+# ==========================
+# One time grammar, compiled once at import, shared by the message scanner
+# and by parse_time(). Accepted: 7pm, 7 pm, 7:30pm, 7.30 p.m., 07:30, 18:00,
+# 7 (24h hour), 9 o'clock, half past 9, quarter to 8 pm, noon, midnight.
+_MERIDIEM = r"(?:a\.?m\.?|p\.?m\.?)"
+_TIME = rf"""
+    (?P<special>noon|midnight)
+  | (?P<fraction>half|quarter)\s+(?P<relation>past|to)\s+(?P<fraction_hour>\d{{1,2}})
+        (?:\s*(?P<fraction_meridiem>{_MERIDIEM}))?
+  | (?P<hour>\d{{1,2}})(?:[:.](?P<minute>\d{{2}}))?(?:\s*(?P<meridiem>{_MERIDIEM}))?(?:\s*o'?clock)?
+"""
+_SCHEDULE = re.compile(rf"(?:\bat|@)\s+(?:{_TIME})(?![\w:])", re.IGNORECASE | re.VERBOSE)
+_TIME_ONLY = re.compile(rf"\s*(?:{_TIME})\s*", re.IGNORECASE | re.VERBOSE)
+_WORDS = re.compile(r"[^\W\d_][\w'-]*")
+_CLAUSE_BREAK = re.compile(r"[,;:.!?\n]")
+
+# Words that end an activity name when read backwards from "at":
+# "remind me to go for a walk at 6" -> "walk", "study and yoga at 7" -> "yoga".
+_NAME_STOPWORDS = {
+    "a", "an", "the", "and", "then", "also", "plus", "i", "i'll", "ill", "im", "i'm", "will", "want", "to",
+    "me", "my", "remind", "please", "do", "go", "have", "should", "need", "for", "some", "at",
+    "schedule", "routine", "plan", "is", "are", "every", "each", "day", "daily", "usually",
+}
+MAX_NAME_WORDS = 3
+
+# A name counts as an activity only if one of its words is here (a plural
+# "s" is ignored), so "meet my friend at 5" or "see you at 6" are not saved.
+_ACTIVITY_WORDS = {
+    "study", "homework", "revision", "revise", "class", "lecture", "exam", "practice", "read", "reading",
+    "write", "writing", "journal", "journaling", "work", "coding", "code", "meeting", "other",
+    "workout", "exercise", "gym", "yoga", "run", "running", "jog", "jogging", "walk", "swim", "swimming",
+    "stretch", "stretching", "cardio", "dance", "sport", "meditate", "meditation", "pray", "prayer",
+    "meal", "breakfast", "lunch", "dinner", "snack", "water", "medicine", "pill", "vitamin",
+    "sleep", "bed", "bedtime", "nap", "wake", "music", "guitar", "piano", "chores", "cleaning",
+}
+
+@dataclass(frozen=True)
+class ScheduledActivity:
+    name: str    # lowercased activity, e.g. "study" or "deep work"
+    time: str    # 'HH:MM', 24h
+    source: str  # the matched "at ..." text
+
+# ==========================
+# ⏰ TIMES
+# ==========================
+def _to_hhmm(match):
+    """Normalise one _TIME match to 'HH:MM', or None if it is not a real clock time."""
+    groups = match.groupdict()
+    if groups["special"]:
+        return "12:00" if groups["special"].lower() == "noon" else "00:00"
+    if groups["fraction"]:
+        hour, meridiem = int(groups["fraction_hour"]), groups["fraction_meridiem"]
+        minute = 30 if groups["fraction"].lower() == "half" else 15
+    else:
+        hour, minute, meridiem = int(groups["hour"]), int(groups["minute"] or 0), groups["meridiem"]
+    if minute > 59:
+        return None
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower().startswith("p") else 0)
+    elif hour > 23:
+        return None
+    if groups["fraction"] and groups["relation"].lower() == "to":
+        if minute == 30:
+            return None  # "half to" is not a time
+        # After the meridiem: "quarter to 12 pm" is 11:45, "quarter to 12 am" is 23:45.
+        hour, minute = (hour - 1) % 24, 45
+    return f"{hour:02d}:{minute:02d}"
+
+def parse_time(text):
+    """'9am', '9:30 PM', '18:00', 'half past 7 pm', 'noon' -> 'HH:MM'; None if not a time."""
+    if not text:
+        return None
+    match = _TIME_ONLY.fullmatch(text)
+    return _to_hhmm(match) if match else None
+
+# ==========================
+# 📋 ACTIVITIES
+# ==========================
+def _activity_name(prefix):
+    """The activity named just before "at": the last few words of the clause, minus filler."""
+    clause = _CLAUSE_BREAK.split(prefix)[-1]
+    words = []
+    for word in reversed(_WORDS.findall(clause.lower())):
+        if word in _NAME_STOPWORDS or len(words) == MAX_NAME_WORDS:
+            if words:
+                break
+            continue
+        words.append(word)
+    return " ".join(reversed(words))
+
+def _is_activity(name):
+    return any(word in _ACTIVITY_WORDS or (word.endswith("s") and word[:-1] in _ACTIVITY_WORDS)
+               for word in name.split())
+
+def parse_schedule(text):
+    """Every "<activity> at <time>" in ``text``, in one left-to-right scan.
+
+    Mentions without a known activity word in their name, or with an
+    impossible time, are skipped.
+    """
+    activities = []
+    previous_end = 0
+    for match in _SCHEDULE.finditer(text):
+        name = _activity_name(text[previous_end:match.start()])
+        hhmm = _to_hhmm(match)
+        previous_end = match.end()
+        if hhmm and _is_activity(name):
+            activities.append(ScheduledActivity(name, hhmm, match.group(0)))
+    return activities
+
+def parse_activities(text):
+    """{activity: 'HH:MM'} for the activities in ``text`` (a later mention wins).
+
+    >>> parse_activities("study at 7pm, workout at 6:30am and yoga at half past 8")
+    {'study': '19:00', 'workout': '06:30', 'yoga': '08:30'}
+    """
+    return {activity.name: activity.time for activity in parse_schedule(text)}
+
+# 🧪 Usage: python schedule_parser.py  (compares against the old try-every-format parsing)
+if __name__ == "__main__":
+    from datetime import datetime
+
+    LEGACY_PATTERNS = {
+        "study": r"study at (\d{1,2}(:\d{2})? ?(am|pm)?)",
+        "workout": r"workout at (\d{1,2}(:\d{2})? ?(am|pm)?)",
+        "meal": r"meal at (\d{1,2}(:\d{2})? ?(am|pm)?)",
+        "other": r"other at (\d{1,2}(:\d{2})? ?(am|pm)?)",
+    }
+
+    def legacy(text):
+        activities = {}
+        for act, pat in LEGACY_PATTERNS.items():
+            match = re.search(pat, text, re.IGNORECASE)
+            if match:
+                time_str = match.group(1)
+                for fmt in ("%I:%M %p", "%I %p", "%I:%M%p", "%I%p", "%H:%M"):
+                    try:
+                        activities[act] = datetime.strptime(time_str, fmt).strftime("%H:%M")
+                        break
+                    except ValueError:
+                        continue
+        return activities
+
+    samples = [
+        "study at 7 pm and workout at 6 am",
+        "study at 7pm and workout at 6:30am",
+        "meal at 13:00",
+        "other at 9:15 PM, study at 18:00",
+        "remind me to meditate at half past 6 am and go for a walk at noon",
+        "I had a long day at work, can we talk?",
+        "my schedule: yoga at 7pm, meet my friend at 5",
+    ]
+    for text in samples:
+        print(f"{text!r:70} -> {parse_activities(text)}  (legacy: {legacy(text)})")
+
+    rounds = 20_000
+    for name, fn in (("legacy", legacy), ("parser", parse_activities)):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for text in samples:
+                fn(text)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>7}: {elapsed / (rounds * len(samples)) * 1e6:6.2f} µs per message")
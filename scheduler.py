@@ -1,79 +1,225 @@
 import asyncio
+import heapq
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from telegram import Bot
-from database import load_data
+from services import get_bot
+from database import add_user_listener, get_all_users, refresh
+from broadcast import broadcast
+from utils import resolve_timezone
+import metrics
+from logging_setup import setup_logging
 
 # ==========================
 # ⚙️ CONFIGURE LOGGING
 # ==========================
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
 # ==========================
 # 🌍 LOAD ENVIRONMENT
 # ==========================
 load_dotenv()
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-if not TELEGRAM_TOKEN:
-    raise ValueError("❌ TELEGRAM_TOKEN is not defined in .env.")
 
-bot = Bot(token=TELEGRAM_TOKEN)
+SCHEDULER_CATCHUP_MINUTES = int(os.getenv("SCHEDULER_CATCHUP_MINUTES", "30"))  # still send reminders this late after a stall
 
 # ==========================
-# 📤 SEND MESSAGE UTILITY
+# ☀️ GREETINGS
 # ==========================
-async def send_message(chat_id, text):
-    try:
-        await bot.send_message(chat_id=chat_id, text=text)
-    except Exception as e:
-        logger.error(f"❌ Could not send message to {chat_id}: {e}")
+GOOD_MORNING_TEXT = "☀️ Good morning! 🌷 Let’s make this day beautiful and productive. You're strong and capable!"
+GOOD_NIGHT_TEXT = "🌙 Good night! 😴 You’ve worked hard today. Remember, rest is vital for a brighter tomorrow. 🌱 Sweet dreams!"
 
 # ==========================
-# ☀️ GREETINGS
+# ⏰ ACTIVITY REMINDERS
 # ==========================
-async def send_good_morning(user_id, chat_id):
-    await send_message(chat_id, "☀️ Good morning! 🌷 Let’s make this day beautiful and productive. You're strong and capable!")
-
-async def send_good_night(user_id, chat_id):
-    await send_message(chat_id, "🌙 Good night! 😴 You’ve worked hard today. Remember, rest is vital for a brighter tomorrow. 🌱 Sweet dreams!")
+def activity_reminder_text(activity):
+    return f"🌷 It's time for {activity}! Stay focused and enjoy it."
 
 # ==========================
-# ⏰ ACTIVITY REMINDERS
+# 🗂️ REMINDER INDEX
 # ==========================
-async def send_activity_reminders(user_id, chat_id, activities):
-    now = datetime.now().strftime("%H:%M")
-    for activity, activity_time in activities.items():
-        if now == activity_time:
-            await send_message(chat_id, f"🌷 It's time for {activity}! Stay focused and enjoy it.")
+def _epoch_minute(moment):
+    return int(moment.timestamp() // 60)
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+def _minute_start(epoch_minute):
+    return datetime.fromtimestamp(epoch_minute * 60, timezone.utc)
+
+def next_fire_minute(hhmm, after, timezone_name=None):
+    """UTC epoch minute of the next ``hhmm`` in the user's timezone strictly after ``after``."""
+    local_after = after.astimezone(resolve_timezone(timezone_name))
+    try:
+        hour, minute = map(int, hhmm.split(":"))
+        candidate = local_after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except (AttributeError, ValueError):
+        return None
+    if candidate <= local_after:
+        candidate += timedelta(days=1)  # wall-clock arithmetic, so DST shifts keep the local hour
+    return _epoch_minute(candidate)
+
+def user_reminders(user_data):
+    """Return the (kind, name, HH:MM) reminders configured for a user."""
+    reminders = []
+    if user_data.get("wake_time"):
+        reminders.append(("wake", None, user_data["wake_time"]))
+    if user_data.get("sleep_time"):
+        reminders.append(("sleep", None, user_data["sleep_time"]))
+    for activity, activity_time in (user_data.get("activities") or {}).items():
+        reminders.append(("activity", activity, activity_time))
+    return reminders
+
+def reminder_text(kind, name):
+    if kind == "wake":
+        return GOOD_MORNING_TEXT
+    if kind == "sleep":
+        return GOOD_NIGHT_TEXT
+    return activity_reminder_text(name)
+
+class ReminderIndex:
+    """Reminders grouped into per-UTC-minute buckets, ordered by a min-heap of minutes.
+
+    Local reminder times are converted to UTC using each user's timezone,
+    so users in every timezone share one index and a tick pops only the
+    buckets that are due. Its cost is proportional to the number of due
+    reminders rather than the number of users. Users are re-indexed
+    individually when their reminder settings change; other changes to the
+    record (every message counts a conversation) are skipped.
+    """
+
+    def __init__(self):
+        self._buckets = {}   # UTC epoch minute -> set of (user_id, kind, name, HH:MM, timezone)
+        self._heap = []      # epoch minutes that (may) have a bucket
+        self._by_user = {}   # user_id -> list of (epoch minute, entry)
+        self._signatures = {}  # user_id -> reminder settings the user was indexed with
+        self._processed_minute = None  # last epoch minute pop_due() handled
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._by_user.values())
+
+    def _add(self, user_id, minute, entry):
+        bucket = self._buckets.get(minute)
+        if bucket is None:
+            bucket = self._buckets[minute] = set()
+            heapq.heappush(self._heap, minute)
+        bucket.add(entry)
+        self._by_user.setdefault(user_id, []).append((minute, entry))
+
+    def remove_user(self, user_id):
+        self._signatures.pop(user_id, None)
+        for minute, entry in self._by_user.pop(user_id, []):
+            bucket = self._buckets.get(minute)
+            if bucket is not None:
+                bucket.discard(entry)
+                if not bucket:
+                    del self._buckets[minute]
+        if len(self._heap) > 2 * len(self._buckets) + 64:
+            # Minutes of emptied buckets stay in the heap until popped; drop them in one go.
+            self._heap = list(self._buckets)
+            heapq.heapify(self._heap)
+
+    def _reference(self):
+        """Reindexed reminders fire after the last processed tick, not after the wall clock.
+
+        Otherwise a record changing between a reminder's minute starting and
+        the tick that pops it would push that reminder to tomorrow.
+        """
+        if self._processed_minute is None:
+            return _utc_now()
+        return _minute_start(self._processed_minute)
+
+    def update_user(self, user_id, user_data, now=None):
+        """(Re)index every reminder of one user, unless their reminder settings are unchanged."""
+        user_id = str(user_id)
+        timezone_name = user_data.get("timezone")
+        signature = (user_data.get("wake_time"), user_data.get("sleep_time"),
+                     tuple(sorted((user_data.get("activities") or {}).items())), timezone_name)
+        if self._signatures.get(user_id) == signature:
+            return
+        now = now or self._reference()
+        self.remove_user(user_id)
+        self._signatures[user_id] = signature
+        for kind, name, hhmm in user_reminders(user_data):
+            minute = next_fire_minute(hhmm, now, timezone_name)
+            if minute is not None:
+                self._add(user_id, minute, (user_id, kind, name, hhmm, timezone_name))
+
+    def rebuild(self, users, now=None):
+        # Treat the previous minute as processed, so reminders of the current minute are still indexed.
+        self._processed_minute = _epoch_minute(now or _utc_now()) - 1
+        now = self._reference()
+        self._buckets, self._heap, self._by_user, self._signatures = {}, [], {}, {}
+        for user_id, user_data in users.items():
+            self.update_user(user_id, user_data, now)
+
+    def pop_due(self, now):
+        """Remove and return (entry, minutes_late) for every reminder due by ``now``.
+
+        Each popped reminder is rescheduled for its next occurrence, so
+        minutes missed during a stall are all caught up in one call.
+        """
+        now_minute = _epoch_minute(now)
+        due = []
+        while self._heap and self._heap[0] <= now_minute:
+            minute = heapq.heappop(self._heap)
+            for entry in self._buckets.pop(minute, ()):
+                due.append((entry, now_minute - minute))
+        self._processed_minute = max(now_minute, self._processed_minute or now_minute)
+        reference = self._reference()
+        for entry, _ in due:
+            user_id = entry[0]
+            entries = self._by_user.get(user_id, [])
+            entries[:] = [(m, e) for m, e in entries if e != entry]
+            minute = next_fire_minute(entry[3], reference, entry[4])
+            if minute is not None:
+                self._add(user_id, minute, entry)
+        return due
+
+reminder_index = ReminderIndex()
+_index_ready = False
+
+def _ensure_index():
+    global _index_ready
+    if not _index_ready:
+        reminder_index.rebuild(get_all_users())
+        add_user_listener(reminder_index.update_user)
+        metrics.scheduler_indexed_reminders.set_function(lambda: len(reminder_index))
+        _index_ready = True
 
 # ==========================
 # 🔄 MAIN SCHEDULER LOGIC
 # ==========================
-async def run_scheduler():
-    data = load_data()
-    for user_id, user_data in data.items():
-        chat_id = user_id
-        sleep_time = user_data.get("sleep_time")
-        wake_time = user_data.get("wake_time")
-        activities = user_data.get("activities", {})
-
-        now = datetime.now().strftime("%H:%M")
-        if wake_time == now:
-            await send_good_morning(user_id, chat_id)
-        if sleep_time == now:
-            await send_good_night(user_id, chat_id)
-
-        await send_activity_reminders(user_id, chat_id, activities)
+async def run_scheduler(bot, now=None):
+    """Send every reminder that came due since the previous tick."""
+    with metrics.scheduler_tick_seconds.time():
+        _ensure_index()
+        refresh()
+        now = now or _utc_now()
+        items, skipped = [], 0
+        for (user_id, kind, name, hhmm, timezone_name), minutes_late in reminder_index.pop_due(now):
+            if minutes_late > SCHEDULER_CATCHUP_MINUTES:
+                skipped += 1
+                continue
+            items.append((user_id, reminder_text(kind, name)))
+        if skipped:
+            logger.warning(f"⏭️ Skipped {skipped} reminder(s) more than {SCHEDULER_CATCHUP_MINUTES} min late")
+    metrics.scheduler_due_reminders.set(len(items))
+    if items:
+        await broadcast(bot, items, name="reminders")
 
 # ==========================
 # 🕰️ SCHEDULER LOOP
 # ==========================
 def start_scheduler():
+    """Standalone reminder loop; runner.py runs the same job on the bot's job queue."""
+    setup_logging()
+    bot = get_bot()
+
     async def scheduler_loop():
         while True:
-            await run_scheduler()
-            await asyncio.sleep(60)
+            await run_scheduler(bot)
+            # Wake up just after the next minute boundary instead of drifting by 60s steps.
+            now = datetime.now()
+            await asyncio.sleep(60 - now.second - now.microsecond / 1_000_000 + 0.05)
     asyncio.run(scheduler_loop())
@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+import time
+import logging
+import threading
+import subprocess
+from dotenv import load_dotenv
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 LOAD ENVIRONMENT
+# ==========================
+load_dotenv()
+WARM_UP = os.getenv("WARM_UP", "bot,openai")  # services created at startup; add "sheet" to open Google Sheets too
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", "256"))  # parallel Bot API requests (PTB's builder default)
+
+# ==========================
+# 🗃️ SERVICE REGISTRY
+# ==========================
+# External clients are built on first use, never at import time, so
+# importing a module costs no network or auth round trips and cannot fail
+# because Telegram, OpenAI or Google Sheets is unreachable.
+_factories = {}
+_instances = {}
+_lock = threading.Lock()
+
+def register(name, factory):
+    """Register a zero-argument factory for a service (replacing any built instance)."""
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+def get(name):
+    """Return the service, building it on first use."""
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+    with _lock:
+        if name not in _instances:
+            started = time.perf_counter()
+            _instances[name] = _factories[name]()
+            logger.info(f"🔌 {name} ready in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return _instances[name]
+
+def reset(name=None):
+    """Forget built services (all of them, or one) so the next get() rebuilds them."""
+    with _lock:
+        if name is None:
+            _instances.clear()
+        else:
+            _instances.pop(name, None)
+
+def warm_up(names=None):
+    """Build services ahead of the first request; failures are logged, not raised.
+
+    Returns {name: seconds} for the services that came up.
+    """
+    timings = {}
+    for name in (names if names is not None else [n.strip() for n in WARM_UP.split(",") if n.strip()]):
+        started = time.perf_counter()
+        try:
+            get(name)
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up of {name} failed, it will be retried on first use: {e}")
+            continue
+        timings[name] = time.perf_counter() - started
+    return timings
+
+# ==========================
+# 🏭 DEFAULT FACTORIES
+# ==========================
+def _make_bot():
+    from telegram.ext import ExtBot
+    from telegram.request import HTTPXRequest
+    token = os.getenv("TELEGRAM_TOKEN")
+    if not token:
+        raise ValueError("❌ TELEGRAM_TOKEN is not defined in .env.")
+    return ExtBot(
+        token=token,
+        request=HTTPXRequest(connection_pool_size=TELEGRAM_POOL_SIZE),
+        get_updates_request=HTTPXRequest(),
+    )
+
+def _make_openai():
+    from llm import create_client
+    return create_client()
+
+def _make_sheet():
+    from sheets import _open_sheet
+    return _open_sheet()
+
+register("bot", _make_bot)
+register("openai", _make_openai)
+register("sheet", _make_sheet)
+
+def get_bot():
+    return get("bot")
+
+def get_openai():
+    return get("openai")
+
+def get_sheet():
+    return get("sheet")
+
+# ==========================
+# ⏱️ STARTUP PROFILE
+# ==========================
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def import_profile(module="runner, bot"):
+    """Import ``module`` in a fresh interpreter under -X importtime.
+
+    Returns (total_ms, rows) with rows as (self_ms, cumulative_ms, depth, name).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"❌ import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us) / 1000, int(cumulative_us) / 1000, (len(indent) - 1) // 2, name))
+    total = sum(self_ms for self_ms, _, _, _ in rows)
+    return total, rows
+
+def format_profile(total, rows, top=15):
+    lines = [f"⏱️ Total import time: {total:.0f} ms", "", f"{'self ms':>9} {'cum ms':>9}  module"]
+    for self_ms, cumulative_ms, _, name in sorted(rows, reverse=True)[:top]:
+        lines.append(f"{self_ms:>9.1f} {cumulative_ms:>9.1f}  {name}")
+    lines += ["", "Top-level imports (cumulative):"]
+    for self_ms, cumulative_ms, depth, name in sorted((r for r in rows if r[2] == 0), key=lambda r: -r[1])[:top]:
+        lines.append(f"{'':>9} {cumulative_ms:>9.1f}  {name}")
+    return "\n".join(lines)
+
+# 🧪 Usage: python services.py profile ["mod1, mod2"] [--budget-ms N]   (exit 1 over budget, for CI)
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "profile":
+        print("Usage: python services.py profile [\"mod1, mod2\"] [--budget-ms N]")
+        sys.exit(1)
+    args = sys.argv[2:]
+    budget = None
+    if "--budget-ms" in args:
+        i = args.index("--budget-ms")
+        budget = float(args[i + 1])
+        del args[i:i + 2]
+    total, rows = import_profile(args[0] if args else "runner, bot")
+    print(format_profile(total, rows))
+    if budget is not None and total > budget:
+        print(f"❌ Import time {total:.0f} ms is over the {budget:.0f} ms budget")
+        sys.exit(1)
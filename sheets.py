@@ -1,8 +1,19 @@
 import os
-import gspread
-from google.oauth2.service_account import Credentials
+import json
+import time
+import asyncio
+import atexit
+import random
+import sqlite3
+import logging
+import threading
+import tempfile
+from types import SimpleNamespace
 from dotenv import load_dotenv
-from datetime import datetime
+import database
+from services import get, get_sheet, register
+
+logger = logging.getLogger(__name__)
 
 # 🌿 Load environment variables
 load_dotenv()
@@ -11,42 +22,391 @@ load_dotenv()
 GOOGLE_CREDENTIALS_JSON = os.getenv("GOOGLE_CREDENTIALS_JSON")  # e.g. path/to/credentials.json
 SPREADSHEET_NAME = os.getenv("SPREADSHEET_NAME", "Vyaara Journal")
 SHEET_NAME = os.getenv("SHEET_NAME", "Sheet1")
+SHEETS_FAKE = os.getenv("SHEETS_FAKE", "0") == "1"              # use an in-memory worksheet (offline testing)
+
+# 📦 Journal write-behind queue settings
+JOURNAL_QUEUE_FILE = os.getenv("JOURNAL_QUEUE_FILE", "journal_queue.db")
+JOURNAL_BATCH_SIZE = int(os.getenv("JOURNAL_BATCH_SIZE", "200"))        # rows per append_rows call
+JOURNAL_FLUSH_INTERVAL = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "10"))  # max seconds a row waits
+JOURNAL_MAX_BACKOFF = float(os.getenv("JOURNAL_MAX_BACKOFF", "300"))
+
+# 🗂️ Incremental user-ID index
+USER_ID_INDEX_FILE = os.getenv("USER_ID_INDEX_FILE", "user_id_index.json")
+
+JOURNAL_HEADER = ["Date", "User ID", "Message", "Sentiment"]
+
+# 🧪 Offline stand-in for a gspread Worksheet
+class FakeAPIError(Exception):
+    """Shaped like gspread's APIError: the HTTP status is on ``response.status_code``."""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status} {message} (fake)")
+        self.response = SimpleNamespace(status_code=status)
+
+class FakeWorksheet:
+    """In-memory worksheet with the subset of the gspread API this bot uses.
+
+    ``fail_next(n, status)`` makes the next n writes raise an API error
+    (a 429 quota error by default), so retry behaviour can be exercised
+    without the network.
+    """
+
+    def __init__(self, header=JOURNAL_HEADER):
+        self.rows = [list(header)]
+        self.append_calls = 0
+        self._failures = 0
+        self._failure_status = 429
+
+    def fail_next(self, count=1, status=429):
+        self._failures = count
+        self._failure_status = status
+
+    def _maybe_fail(self):
+        if self._failures:
+            self._failures -= 1
+            raise FakeAPIError(self._failure_status, "RESOURCE_EXHAUSTED" if self._failure_status == 429 else "PERMISSION_DENIED")
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values], **kwargs)
+
+    def append_rows(self, values, **kwargs):
+        self._maybe_fail()
+        self.append_calls += 1
+        self.rows.extend([list(map(str, row)) for row in values])
+
+    def get_all_records(self):
+        header = self.rows[0]
+        return [dict(zip(header, row)) for row in self.rows[1:]]
+
+    def get_all_values(self):
+        return [list(row) for row in self.rows]
+
+    def get_values(self, range_name):
+        from gspread.utils import a1_range_to_grid_range
+        grid = a1_range_to_grid_range(range_name)
+        rows = self.rows[grid.get("startRowIndex", 0):grid.get("endRowIndex")]
+        start_col, end_col = grid.get("startColumnIndex", 0), grid.get("endColumnIndex")
+        values = [row[start_col:end_col] for row in rows]
+        while values and not any(values[-1]):
+            values.pop()
+        return values
+
+# 🔐 Authenticate with Google Sheets (on first use, via services.get_sheet)
+def _open_sheet():
+    if SHEETS_FAKE:
+        return FakeWorksheet()
+    import gspread
+    from google.oauth2.service_account import Credentials
+    creds = Credentials.from_service_account_file(
+        GOOGLE_CREDENTIALS_JSON,
+        scopes=[
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive.file",
+            "https://www.googleapis.com/auth/drive",
+        ]
+    )
+    client = gspread.authorize(creds)
+    # 📘 Access the right sheet
+    return client.open(SPREADSHEET_NAME).worksheet(SHEET_NAME)
+
+def is_transient_error(error):
+    """Quota, server and network errors are worth retrying.
+
+    Anything else, such as bad credentials, a missing spreadsheet or a
+    rejected row, fails the same way every time.
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    if isinstance(error, (FileNotFoundError, PermissionError)):
+        return False
+    if isinstance(error, (OSError, TimeoutError)):  # includes requests' ConnectionError and Timeout
+        return True
+    return type(error).__name__ == "TransportError"  # google.auth could not reach the token endpoint
+
+# 📬 Durable write-behind queue for journal rows
+class JournalQueue:
+    """Journal rows spooled to SQLite and appended to the sheet in batches.
+
+    enqueue() only does a local insert, so callers never wait on the
+    Sheets API. A background thread sends up to JOURNAL_BATCH_SIZE rows per
+    append_rows call once a batch fills up or the oldest row has waited
+    JOURNAL_FLUSH_INTERVAL seconds. Rows are deleted only after the append
+    succeeds. Transient failures (429 quota, 5xx, network) back off
+    exponentially with jitter and keep the rows, so nothing is lost across
+    restarts. A batch that fails permanently (auth, a bad sheet id, a
+    rejected row) is parked in ``journal_parked`` instead of being retried
+    forever; requeue_parked() puts it back once the problem is fixed.
+    Without an explicit worksheet the shared one is opened on first flush.
+    """
+
+    def __init__(self, worksheet=None, path=JOURNAL_QUEUE_FILE):
+        self._worksheet = worksheet
+        self.path = path
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()  # one batch in flight, so no row is appended twice
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._backoff = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS journal_queue ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, row TEXT NOT NULL, queued_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS journal_parked ("
+            " id INTEGER PRIMARY KEY, row TEXT NOT NULL, queued_at REAL NOT NULL, error TEXT NOT NULL)"
+        )
+
+    @property
+    def worksheet(self):
+        return self._worksheet or get_sheet()
+
+    def enqueue(self, row):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO journal_queue (row, queued_at) VALUES (?, ?)", (json.dumps(row), time.time())
+            )
+        self._start()
+        if self.pending() >= JOURNAL_BATCH_SIZE:
+            self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM journal_queue").fetchone()[0]
+
+    def _oldest_age(self):
+        with self._lock:
+            (oldest,) = self._conn.execute("SELECT MIN(queued_at) FROM journal_queue").fetchone()
+        return time.time() - oldest if oldest else 0.0
+
+    def parked(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM journal_parked").fetchone()[0]
 
-# 🔐 Authenticate with Google Sheets
-creds = Credentials.from_service_account_file(
-    GOOGLE_CREDENTIALS_JSON,
-    scopes=[
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive",
-    ]
-)
-client = gspread.authorize(creds)
+    def flush_once(self):
+        """Append one batch to the sheet. Returns the number of rows sent.
 
-# 📘 Access the right sheet
-sheet = client.open(SPREADSHEET_NAME).worksheet(SHEET_NAME)
+        Transient errors propagate with the rows still queued; after a
+        permanent error the batch is parked and 0 is returned.
+        """
+        with self._drain_lock:
+            with self._lock:
+                batch = self._conn.execute(
+                    "SELECT id, row FROM journal_queue ORDER BY id LIMIT ?", (JOURNAL_BATCH_SIZE,)
+                ).fetchall()
+            if not batch:
+                return 0
+            try:
+                self.worksheet.append_rows([json.loads(row) for _, row in batch], value_input_option="USER_ENTERED")
+            except Exception as e:
+                if is_transient_error(e):
+                    raise
+                self._park(batch[-1][0], e)
+                logger.error(f"❌ Parked {len(batch)} journal row(s) after a permanent error: {e}")
+                return 0
+            with self._lock:
+                self._conn.execute("DELETE FROM journal_queue WHERE id <= ?", (batch[-1][0],))
+            return len(batch)
+
+    def _park(self, last_id, error):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO journal_parked (id, row, queued_at, error) "
+                "SELECT id, row, queued_at, ? FROM journal_queue WHERE id <= ?", (str(error), last_id)
+            )
+            self._conn.execute("DELETE FROM journal_queue WHERE id <= ?", (last_id,))
+            self._conn.execute("COMMIT")
+
+    def requeue_parked(self):
+        """Move parked rows back into the queue (e.g. after fixing credentials). Returns how many."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            count = self._conn.execute(
+                "INSERT INTO journal_queue (row, queued_at) SELECT row, queued_at FROM journal_parked ORDER BY id"
+            ).rowcount
+            self._conn.execute("DELETE FROM journal_parked")
+            self._conn.execute("COMMIT")
+        if count:
+            self._start()
+            self._wake.set()
+        return count
+
+    def flush(self):
+        """Send every queued row now (stops at the first failure)."""
+        sent = 0
+        while True:
+            count = self.flush_once()
+            if not count:
+                return sent
+            sent += count
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self._backoff or JOURNAL_FLUSH_INTERVAL)
+            self._wake.clear()
+            if not self._backoff and self.pending() < JOURNAL_BATCH_SIZE and self._oldest_age() < JOURNAL_FLUSH_INTERVAL:
+                continue
+            try:
+                sent = self.flush()
+                self._backoff = 0.0
+                if sent:
+                    logger.info(f"📝 Appended {sent} journal row(s) to Google Sheets")
+            except Exception as e:
+                self._backoff = min(JOURNAL_MAX_BACKOFF, max(1.0, self._backoff * 2)) * random.uniform(0.8, 1.2)
+                logger.warning(f"⚠️ Journal flush failed, retrying in {self._backoff:.0f}s: {e}")
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+                    self._thread.start()
+
+    def close(self, timeout=30):
+        """Stop the writer and make one last attempt to send what is queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)  # let an in-flight batch finish before the final drain
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"⚠️ {self.pending()} journal row(s) stay queued for the next start: {e}")
+
+def _make_journal_queue():
+    queue = JournalQueue()
+    atexit.register(queue.close)
+    return queue
+
+# Built on first use (see services.py), so importing this module opens no files.
+register("journal_queue", _make_journal_queue)
+
+def get_journal_queue():
+    return get("journal_queue")
 
 # 💾 Save a new message row (with optional emoji parsing/sentiment)
 def save_message(date, user_id, message, sentiment="neutral"):
-    """Append a journal entry to Google Sheets."""
+    """Queue a journal entry for Google Sheets; returns immediately."""
     try:
-        sheet.append_row([date, str(user_id), message, sentiment])
+        get_journal_queue().enqueue([date, str(user_id), message, sentiment])
     except Exception as e:
-        print(f"❌ Failed to save message for {user_id}: {e}")
+        logger.error(f"❌ Failed to queue message for {user_id}: {e}")
+
+# 🗂️ Remember which sheet rows were already scanned for user IDs
+class UserIdIndex:
+    """Unique user IDs from the journal sheet, refreshed incrementally.
+
+    The index persists the last row it has read, so each refresh fetches
+    only the new rows of the "User ID" column via get_values instead of
+    downloading the whole sheet. It never touches the user store, so it is
+    safe to refresh from a worker thread; register_user_ids() adds the newly
+    seen IDs to the store on the event loop.
+    """
+
+    def __init__(self, worksheet=None, path=USER_ID_INDEX_FILE):
+        self._worksheet = worksheet
+        self.path = path
+        self._lock = threading.Lock()
+        self.column = None
+        self.last_row = 1  # the header row
+        self.ids = set()
+        self._load()
+
+    @property
+    def worksheet(self):
+        return self._worksheet or get_sheet()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Rebuilding user-ID index, could not read {self.path}: {e}")
+            return
+        self.column = state.get("column")
+        self.last_row = state.get("last_row", 1)
+        self.ids = set(state.get("ids", []))
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".user-id-index-", suffix=".json", dir=directory)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"column": self.column, "last_row": self.last_row, "ids": sorted(self.ids)}, f)
+        os.replace(tmp_path, self.path)
+
+    def _find_column(self):
+        from gspread.utils import rowcol_to_a1
+        header = (self.worksheet.get_values("1:1") or [[]])[0]
+        for index, title in enumerate(header, start=1):
+            if str(title).strip().lower() == "user id":
+                return rowcol_to_a1(1, index).rstrip("1")
+        raise ValueError("no 'User ID' column in the sheet header")
+
+    def refresh(self):
+        """Read rows added since the last refresh; returns (all IDs, IDs first seen now)."""
+        with self._lock:
+            if self.column is None:
+                self.column = self._find_column()
+            start = self.last_row + 1
+            values = self.worksheet.get_values(f"{self.column}{start}:{self.column}")
+            new_ids = {str(row[0]).strip() for row in values if row and str(row[0]).strip()} - self.ids
+            self.last_row += len(values)
+            if values:
+                self.ids |= new_ids
+                self._save()
+            return set(self.ids), new_ids
+
+    def rebuild(self):
+        """Forget everything and rescan the sheet from the first row."""
+        with self._lock:
+            self.column, self.last_row, self.ids = None, 1, set()
+        return self.refresh()
+
+register("user_id_index", UserIdIndex)
+
+def get_user_id_index():
+    return get("user_id_index")
 
 # 📥 Get all unique user IDs
-def get_all_user_ids():
-    """Fetch unique user IDs from the sheet."""
-    ids = set()
+def fetch_user_ids():
+    """Read new sheet rows; returns (all IDs, IDs first seen now). Safe in a worker thread."""
+    index = get_user_id_index()
     try:
-        records = sheet.get_all_records()
-        for record in records:
-            user_id = str(record.get("User Id") or record.get("User ID") or "").strip()
-            if user_id:
-                ids.add(user_id)
+        ids, new_ids = index.refresh()
+        return list(ids), new_ids
     except Exception as e:
-        print(f"❌ Failed to fetch user IDs: {e}")
-    return list(ids)
+        logger.error(f"❌ Failed to fetch user IDs: {e}")
+        return list(index.ids), set()
+
+def register_user_ids(user_ids):
+    """Create user-store records for IDs first seen in the sheet.
+
+    Run this on the event loop: new records notify the reminder and
+    milestone indexes, which are not thread-safe.
+    """
+    for user_id in user_ids:
+        database.initialize_user(user_id)
+
+def get_all_user_ids():
+    """Fetch unique user IDs from the sheet (only new rows are read) and register new ones.
+
+    Blocks on Sheets I/O; async code should use load_user_ids() instead.
+    """
+    ids, new_ids = fetch_user_ids()
+    register_user_ids(new_ids)
+    return ids
+
+async def load_user_ids():
+    """get_all_user_ids() for the event loop: the sheet is read in a worker thread."""
+    ids, new_ids = await asyncio.to_thread(fetch_user_ids)
+    register_user_ids(new_ids)
+    return ids
 
 # 🧪 Test mode
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# ⚙️ CONFIG
+# ==========================
+DB_BACKEND = os.getenv("DB_BACKEND", "json")              # "json" or "sqlite"
+DB_FILE = os.getenv("DB_FILE", "database.json")
+DB_SQLITE_FILE = os.getenv("DB_SQLITE_FILE", "database.db")
+
+
+class StorageError(Exception):
+    """Raised when the stored user data cannot be read safely."""
+
+
+# ==========================
+# 📄 JSON BACKEND
+# ==========================
+class JsonBackend:
+    """Whole-file JSON storage, written atomically via a temp file + rename.
+
+    Readers in other processes always see either the old or the new file,
+    never a truncated one. Concurrent writers still race on the whole file,
+    so use the SQLite backend when several processes write.
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._seen_mtime = None
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def load_all(self):
+        self._seen_mtime = self._mtime()
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError as e:
+                # Refuse to continue with an empty dict: the next save would wipe every user.
+                raise StorageError(f"{self.path} is not valid JSON: {e}") from e
+
+    def load_changed(self):
+        """Return every user if the file changed since we last read it, else {}."""
+        mtime = self._mtime()
+        if mtime is None or mtime == self._seen_mtime:
+            return {}
+        return self.load_all()
+
+    def write(self, changed, all_users):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".database-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(all_users, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._seen_mtime = self._mtime()
+
+    def close(self):
+        pass
+
+
+# ==========================
+# 🗄️ SQLITE BACKEND
+# ==========================
+class SQLiteBackend:
+    """One row per user in SQLite (WAL mode).
+
+    Each flush upserts the changed users in a single transaction. Every
+    write bumps a monotonically increasing ``seq`` so other processes can
+    fetch only the rows that changed since they last looked.
+    """
+
+    def __init__(self, path=DB_SQLITE_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._seen_seq = 0
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " user_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " seq INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_users_seq ON users(seq)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _rows_to_users(self, rows):
+        users = {}
+        for user_id, data, seq in rows:
+            users[user_id] = json.loads(data)
+            self._seen_seq = max(self._seen_seq, seq)
+        return users
+
+    def load_all(self):
+        rows = self._conn().execute("SELECT user_id, data, seq FROM users").fetchall()
+        return self._rows_to_users(rows)
+
+    def load_changed(self):
+        rows = self._conn().execute(
+            "SELECT user_id, data, seq FROM users WHERE seq > ? ORDER BY seq",
+            (self._seen_seq,),
+        ).fetchall()
+        return self._rows_to_users(rows)
+
+    def write(self, changed, all_users):
+        if not changed:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (seq,) = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM users").fetchone()
+            conn.executemany(
+                "INSERT INTO users (user_id, data, seq) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, seq = excluded.seq",
+                [(user_id, json.dumps(record), seq + 1) for user_id, record in changed.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def get_backend(name=None):
+    """Build the storage backend selected by DB_BACKEND."""
+    name = (name or DB_BACKEND).lower()
+    if name == "json":
+        return JsonBackend(DB_FILE)
+    if name == "sqlite":
+        return SQLiteBackend(DB_SQLITE_FILE)
+    raise ValueError(f"❌ Unknown DB_BACKEND: {name}")
+
+
+# ==========================
+# 🚚 JSON → SQLITE MIGRATION
+# ==========================
+def migrate_json_to_sqlite(json_path=DB_FILE, sqlite_path=DB_SQLITE_FILE):
+    """Copy every user from the JSON file into the SQLite database."""
+    users = JsonBackend(json_path).load_all()
+    backend = SQLiteBackend(sqlite_path)
+    try:
+        backend.write(users, users)
+    finally:
+        backend.close()
+    return len(users)
+
+
+# 🧪 Usage: python storage.py migrate [database.json] [database.db]
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Usage: python storage.py migrate [json_path] [sqlite_path]")
+        sys.exit(1)
+    json_path = sys.argv[2] if len(sys.argv) > 2 else DB_FILE
+    sqlite_path = sys.argv[3] if len(sys.argv) > 3 else DB_SQLITE_FILE
+    count = migrate_json_to_sqlite(json_path, sqlite_path)
+    print(f"✅ Migrated {count} user(s) from {json_path} to {sqlite_path}")
@@ -0,0 +1,108 @@
+import os
+import time
+import asyncio
+import logging
+from telegram.error import BadRequest, RetryAfter
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 SETTINGS
+# ==========================
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))  # min seconds between edits of one message
+STREAM_PLACEHOLDER = "✍️ ..."
+STREAM_FAILED_REPLY = "❗ Sorry, something went wrong while replying. Please try again in a moment. 🌷"
+
+# ==========================
+# ✂️ HELPERS
+# ==========================
+def _split_point(text, limit):
+    """Index to cut an over-long reply at: last newline, else last space, else hard limit."""
+    for separator in ("\n", " "):
+        cut = text.rfind(separator, 0, limit)
+        if cut > limit // 2:
+            return cut
+    return limit
+
+async def _edit(message, text, parse_mode=None):
+    """Edit a message, tolerating 'not modified' and falling back to plain text."""
+    try:
+        await message.edit_text(text, parse_mode=parse_mode)
+    except RetryAfter as e:
+        await asyncio.sleep(e.retry_after)
+        await _edit(message, text, parse_mode)
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            return
+        if parse_mode:
+            # The finished reply may not be valid Markdown; show it as-is.
+            await _edit(message, text)
+        else:
+            raise
+
+# ==========================
+# 📡 STREAMING REPLY
+# ==========================
+async def send_streaming_reply(message, chunks, finalize=None, parse_mode="Markdown"):
+    """Stream an LLM reply into Telegram by editing a placeholder message.
+
+    A placeholder is sent at once and edited at most every
+    STREAM_EDIT_INTERVAL seconds as fragments from ``chunks`` arrive. Text
+    past Telegram's 4096-character limit rolls over into a new message. Each
+    message gets a last edit with ``finalize`` applied and ``parse_mode`` set.
+    If ``chunks`` raises, the placeholder (or the partial reply) is edited to
+    end with STREAM_FAILED_REPLY and the error is re-raised. Returns the
+    full reply text.
+    """
+    finalize = finalize or (lambda text: text)
+    started = time.monotonic()
+    current = await message.reply_text(STREAM_PLACEHOLDER)
+    buffer = ""
+    full_text = ""
+    next_edit_at = 0.0
+    first_token = True
+
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            if first_token:
+                first_token = False
+                logger.debug(f"⚡ Time to first token for chat {message.chat_id}: {time.monotonic() - started:.2f}s")
+            buffer += chunk
+            full_text += chunk
+
+            while len(buffer) > TELEGRAM_MAX_MESSAGE_LENGTH:
+                cut = _split_point(buffer, TELEGRAM_MAX_MESSAGE_LENGTH)
+                head, buffer = buffer[:cut], buffer[cut:].lstrip()
+                await _edit(current, finalize(head) or head, parse_mode)
+                current = await message.reply_text(buffer[:TELEGRAM_MAX_MESSAGE_LENGTH] or STREAM_PLACEHOLDER)
+                next_edit_at = time.monotonic() + STREAM_EDIT_INTERVAL
+
+            now = time.monotonic()
+            if now >= next_edit_at and buffer.strip():
+                try:
+                    await current.edit_text(buffer)
+                except RetryAfter as e:
+                    next_edit_at = now + e.retry_after
+                    continue
+                except BadRequest as e:
+                    if "not modified" not in str(e).lower():
+                        logger.warning(f"⚠️ Could not update streamed reply in chat {message.chat_id}: {e}")
+                next_edit_at = now + STREAM_EDIT_INTERVAL
+    except Exception:
+        partial = finalize(buffer)[:TELEGRAM_MAX_MESSAGE_LENGTH - len(STREAM_FAILED_REPLY) - 2] if buffer.strip() else ""
+        try:
+            await _edit(current, f"{partial}\n\n{STREAM_FAILED_REPLY}" if partial else STREAM_FAILED_REPLY)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not replace the placeholder in chat {message.chat_id}: {e}")
+        raise
+
+    final = finalize(buffer) if buffer.strip() else ""
+    await _edit(current, final or "🌷", parse_mode)
+    logger.debug(f"✅ Streamed {len(full_text)} chars to chat {message.chat_id} in {time.monotonic() - started:.2f}s")
+    return full_text
@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read when modules are imported, so point every file,
+# credential and external service at throwaway values before any test
+# module imports the bot.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_scratch = tempfile.mkdtemp(prefix="vyaara-tests-")
+os.environ.update({
+    "TELEGRAM_TOKEN": "1:fake-test-token",
+    "OPENAI_API_KEY": "sk-fake-test",
+    "SHEETS_FAKE": "1",
+    "DB_FILE": os.path.join(_scratch, "database.json"),
+    "DB_SQLITE_FILE": os.path.join(_scratch, "database.db"),
+    "JOURNAL_QUEUE_FILE": os.path.join(_scratch, "journal_queue.db"),
+    "USER_ID_INDEX_FILE": os.path.join(_scratch, "user_id_index.json"),
+    "WARM_UP": "",
+    "REPLY_CACHE_DISK": "",
+})
+
+@pytest.fixture
+def fake_openai():
+    """A running FakeOpenAI; build clients inside the test's event loop with ``fake_client(fake)``."""
+    from fake_openai import FakeOpenAI
+
+    with FakeOpenAI(reply="hello there") as fake:
+        yield fake
+
+
+def fake_client(fake):
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key="sk-fake-test", base_url=fake.base_url, max_retries=0)
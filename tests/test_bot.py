@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import bot
+import database
+
+
+class FakeMessage:
+    def __init__(self, chat_id, text):
+        self.chat_id = chat_id
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class FakeUpdate:
+    def __init__(self, message):
+        self.message = message
+
+
+class FakeContext:
+    def __init__(self, args=None):
+        self.args = args
+
+
+@pytest.fixture(autouse=True)
+def llm_replies(monkeypatch):
+    """Answer every message that reaches the LLM route with a fixed reply."""
+    routed = []
+
+    async def route_message(client, text, user_id=None, hits=None):
+        routed.append(text)
+        return "llm reply"
+
+    async def celebrate_conversation(*args):
+        pass
+
+    monkeypatch.setattr(bot, "STREAM_REPLIES", False)
+    monkeypatch.setattr(bot, "get_client", lambda: None)
+    monkeypatch.setattr(bot, "route_message", route_message)
+    monkeypatch.setattr(bot, "celebrate_conversation", celebrate_conversation)
+    return routed
+
+
+def send(chat_id, text):
+    message = FakeMessage(chat_id, text)
+    asyncio.run(bot._handle_message(FakeUpdate(message), FakeContext()))
+    return message
+
+
+def activities(chat_id):
+    return database.get_user_data(str(chat_id)).get("activities") or {}
+
+
+@pytest.mark.parametrize("text", [
+    "I went to bed at 2am and I feel awful",
+    "I have a meeting at 5 and I am so nervous",
+    "my class ends at 3",
+])
+def test_feelings_with_a_time_go_to_the_llm(text, llm_replies):
+    database.save_user_activities("501", {"study": "19:00"})
+    message = send(501, text)
+    assert message.replies == ["llm reply"]
+    assert llm_replies == [text]
+    assert activities(501) == {"study": "19:00"}
+
+
+def test_asked_for_routine_is_merged_into_the_saved_one(llm_replies):
+    database.save_user_activities("502", {"study": "19:00", "yoga": "06:00"})
+    message = send(502, "my routine: yoga at 7am and walk at 6pm")
+    assert llm_replies == []
+    assert "routine is saved" in message.replies[0]
+    assert activities(502) == {"study": "19:00", "yoga": "07:00", "walk": "18:00"}
+
+
+def test_routine_command_saves_and_merges():
+    database.save_user_activities("503", {"study": "19:00"})
+    message = FakeMessage(503, "/routine gym at 6:30am")
+    asyncio.run(bot.set_routine(FakeUpdate(message), FakeContext(["gym", "at", "6:30am"])))
+    assert activities(503) == {"study": "19:00", "gym": "06:30"}
+
+    message = FakeMessage(503, "/routine")
+    asyncio.run(bot.set_routine(FakeUpdate(message), FakeContext([])))
+    assert "/routine" in message.replies[0]
+    assert activities(503) == {"study": "19:00", "gym": "06:30"}
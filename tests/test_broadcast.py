@@ -0,0 +1,93 @@
+import time
+import asyncio
+
+import pytest
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+import broadcast
+from broadcast import ChatLimiter, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def fast_limits(monkeypatch):
+    monkeypatch.setattr(broadcast, "global_bucket", TokenBucket(1000))
+    monkeypatch.setattr(broadcast, "chat_limiter", ChatLimiter(0))
+    monkeypatch.setattr(broadcast, "BROADCAST_RETRY_BASE", 0.01)
+
+
+class ScriptedSender:
+    """Raises the queued errors for a chat, in order, then delivers."""
+
+    def __init__(self, errors=None):
+        self.errors = {chat_id: list(queued) for chat_id, queued in (errors or {}).items()}
+        self.attempts = []
+        self.delivered = []
+
+    async def __call__(self, bot, chat_id, payload):
+        self.attempts.append((chat_id, time.monotonic()))
+        queued = self.errors.get(chat_id)
+        if queued:
+            raise queued.pop(0)
+        self.delivered.append(chat_id)
+
+
+def run(sender, chat_ids):
+    return asyncio.run(broadcast.broadcast(None, ((chat_id, "hi") for chat_id in chat_ids), send=sender))
+
+
+def test_every_chat_gets_one_message():
+    sender = ScriptedSender()
+    summary = run(sender, range(50))
+    assert sorted(sender.delivered) == list(range(50))
+    assert (summary.total, summary.sent, summary.failed) == (50, 50, 0)
+
+
+def test_network_errors_are_retried():
+    sender = ScriptedSender({1: [NetworkError("reset"), NetworkError("reset")]})
+    summary = run(sender, [1])
+    assert sender.delivered == [1]
+    assert summary.retries == 2
+
+
+def test_network_errors_give_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(broadcast, "BROADCAST_MAX_RETRIES", 2)
+    sender = ScriptedSender({1: [NetworkError("reset")] * 5})
+    summary = run(sender, [1])
+    assert len(sender.attempts) == 3
+    assert summary.failed == 1 and summary.errors == {"NetworkError": 1}
+
+
+def test_timeouts_are_not_retried():
+    sender = ScriptedSender({1: [TimedOut()]})
+    summary = run(sender, [1])
+    assert len(sender.attempts) == 1
+    assert sender.delivered == []
+    assert summary.failed == 1
+
+
+def test_retry_after_pauses_every_sender():
+    sender = ScriptedSender({1: [RetryAfter(0.3)]})
+    started = time.monotonic()
+    summary = run(sender, [1, 2, 3])
+    retried_at = [at for chat_id, at in sender.attempts if chat_id == 1][-1]
+    assert retried_at - started >= 0.3
+    assert sorted(sender.delivered) == [1, 2, 3]
+    assert summary.retries == 1
+
+
+def test_blocked_and_bad_chats_are_counted_without_retries():
+    sender = ScriptedSender({1: [Forbidden("blocked")], 2: [BadRequest("chat not found")]})
+    summary = run(sender, [1, 2, 3])
+    assert (summary.sent, summary.blocked, summary.failed, summary.retries) == (1, 1, 1, 0)
+
+
+def test_chat_limiter_spaces_messages_to_one_chat():
+    limiter = ChatLimiter(0.1)
+
+    async def twice():
+        await limiter.wait(1)
+        started = time.monotonic()
+        await limiter.wait(1)
+        return time.monotonic() - started
+
+    assert asyncio.run(twice()) >= 0.09
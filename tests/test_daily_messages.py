@@ -0,0 +1,25 @@
+import asyncio
+import threading
+
+import daily_messages
+import sheets
+
+
+def test_ids_are_fetched_off_the_loop_and_registered_on_it(monkeypatch):
+    fetched_on, registered_on = [], []
+
+    def fetch_user_ids():
+        fetched_on.append(threading.current_thread())
+        return ["1", "not-a-number", "2"], {"2"}
+
+    async def broadcast(bot, items, name):
+        return list(items)
+
+    monkeypatch.setattr(sheets, "fetch_user_ids", fetch_user_ids)
+    monkeypatch.setattr(sheets.database, "initialize_user", lambda user_id: registered_on.append(threading.current_thread()))
+    monkeypatch.setattr(daily_messages, "broadcast", broadcast)
+    sent = asyncio.run(daily_messages.send_good_morning(bot=None))
+    assert [chat_id for chat_id, _ in sent] == [1, 2]
+    assert all(text in daily_messages.GOOD_MORNING_MESSAGES for _, text in sent)
+    assert fetched_on and fetched_on[0] is not threading.main_thread()
+    assert registered_on == [threading.main_thread()]
@@ -0,0 +1,127 @@
+import json
+import time
+import threading
+
+import pytest
+
+import database
+from storage import JsonBackend, SQLiteBackend, StorageError, migrate_json_to_sqlite
+
+
+def make_backend(kind, tmp_path):
+    if kind == "json":
+        return JsonBackend(str(tmp_path / "users.json"))
+    return SQLiteBackend(str(tmp_path / "users.db"))
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    backend = make_backend(request.param, tmp_path)
+    monkeypatch.setattr(database, "_backend", backend)
+    monkeypatch.setattr(database, "_users", None)
+    monkeypatch.setattr(database, "_snapshots", None)
+    monkeypatch.setattr(database, "_listeners", [])
+    database._dirty.clear()
+    yield backend
+    database._dirty.clear()
+
+
+def reload(backend):
+    """What another process would read from the same file."""
+    return type(backend)(backend.path).load_all()
+
+
+def test_changes_round_trip_through_the_backend(backend):
+    database.set_user_name("1", "Asha")
+    database.save_user_activities("1", {"study": "19:00"})
+    database.flush()
+    assert not database._dirty
+    stored = reload(backend)["1"]
+    assert stored["name"] == "Asha"
+    assert stored["activities"] == {"study": "19:00"}
+
+
+def test_merged_activities_keep_the_rest_of_the_routine(backend):
+    database.save_user_activities("1", {"study": "19:00", "yoga": "06:00"})
+    database.save_user_activities("1", {"yoga": "07:00", "walk": "18:00"}, merge=True)
+    assert database.get_user_data("1")["activities"] == {"study": "19:00", "yoga": "07:00", "walk": "18:00"}
+
+
+def test_flush_writes_the_snapshot_taken_when_marked_dirty(backend):
+    database.set_user_name("1", "Asha")
+    database.get_user_data("1")["name"] = "changed without _mark_dirty"
+    database.flush()
+    assert reload(backend)["1"]["name"] == "Asha"
+
+
+def test_failed_write_keeps_users_dirty(backend, monkeypatch):
+    database.set_user_name("1", "Asha")
+
+    def broken(changed, all_users):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backend, "write", broken)
+    with pytest.raises(OSError):
+        database.flush()
+    assert "1" in database._dirty
+
+
+def test_many_dirty_users_wake_the_flusher_instead_of_writing_inline(backend, monkeypatch):
+    monkeypatch.setattr(database, "FLUSH_MAX_DIRTY", 3)
+    written_on = []
+    write = backend.write
+
+    def recording_write(changed, all_users):
+        written_on.append(threading.current_thread())
+        write(changed, all_users)
+
+    monkeypatch.setattr(backend, "write", recording_write)
+    for user_id in range(3):
+        database.initialize_user(str(user_id))
+    assert threading.main_thread() not in written_on
+    deadline = time.monotonic() + 5
+    while database._dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert written_on and all(thread.name == "db-flusher" for thread in written_on)
+    assert set(reload(backend)) == {"0", "1", "2"}
+
+
+def test_refresh_updates_records_in_place(backend):
+    record = database.initialize_user("1")
+    database.initialize_user("2")
+    database.flush()
+    other_process = type(backend)(backend.path)
+    users = other_process.load_all()
+    users["1"]["name"] = "from elsewhere"
+    users["2"]["name"] = "stale"
+    time.sleep(0.01)  # a new mtime for the JSON backend
+    other_process.write({"1": users["1"], "2": users["2"]}, users)
+
+    database.set_user_name("2", "local")  # still dirty here, so it wins
+    database.refresh()
+    assert database.get_user_data("1") is record
+    assert record["name"] == "from elsewhere"
+    assert database.get_user_data("2")["name"] == "local"
+
+
+def test_sqlite_load_changed_returns_only_newer_rows(tmp_path):
+    writer, reader = SQLiteBackend(str(tmp_path / "a.db")), SQLiteBackend(str(tmp_path / "a.db"))
+    writer.write({"1": {"name": "a"}}, {})
+    assert reader.load_all() == {"1": {"name": "a"}}
+    assert reader.load_changed() == {}
+    writer.write({"2": {"name": "b"}}, {})
+    assert reader.load_changed() == {"2": {"name": "b"}}
+
+
+def test_invalid_json_is_refused(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text("{not json")
+    with pytest.raises(StorageError):
+        JsonBackend(str(path)).load_all()
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    users = {"1": {"name": "a"}, "2": {"name": "b"}}
+    (tmp_path / "users.json").write_text(json.dumps(users))
+    assert migrate_json_to_sqlite(str(tmp_path / "users.json"), str(tmp_path / "users.db")) == 2
+    assert SQLiteBackend(str(tmp_path / "users.db")).load_all() == users
@@ -0,0 +1,60 @@
+import pytest
+
+import language
+from language import classify_language, detect_user_language
+
+
+@pytest.fixture(autouse=True)
+def clear_sticky_languages():
+    language._user_languages.clear()
+    yield
+    language._user_languages.clear()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("kya kar rahe ho", "en"),
+    ("I want to start a business but I don't know where to begin", "en"),
+    ("मुझे अपने करियर के बारे में सलाह चाहिए", "hi"),
+    ("main bahut pareshan hoon aaj mera din bahut kharab gaya", "en"),
+    ("yaar aaj office mein bahut kaam tha aur boss ne daant diya", "en"),
+])
+def test_detection(text, expected):
+    assert detect_user_language(text) == expected
+
+
+def test_unsupported_langdetect_result_falls_back(monkeypatch):
+    monkeypatch.setattr(language, "_langdetect", lambda text: "id")
+    text = "main bahut pareshan hoon aaj mera din bahut kharab gaya"
+    assert classify_language(text) == (language.DEFAULT_LANGUAGE, language.WEAK)
+
+
+def test_devanagari_is_a_strong_signal():
+    assert classify_language("आज का दिन अच्छा था") == ("hi", language.STRONG)
+
+
+def test_text_without_letters_has_no_signal():
+    assert classify_language("123 !!! 😊") == (None, None)
+
+
+def test_short_latin_text_skips_langdetect(monkeypatch):
+    monkeypatch.setattr(language, "_langdetect", lambda text: pytest.fail("langdetect was called"))
+    assert classify_language("feeling sad today") == ("en", language.WEAK)
+
+
+def test_sticky_language_needs_repeated_weak_signals(monkeypatch):
+    monkeypatch.setattr(language, "LANGUAGE_SWITCH_AFTER", 2)
+    assert detect_user_language("आज का दिन अच्छा था", user_id=1) == "hi"
+    assert detect_user_language("ok thanks", user_id=1) == "hi"
+    assert detect_user_language("ok thanks", user_id=1) == "en"
+
+
+def test_strong_signal_switches_at_once():
+    assert detect_user_language("ok thanks", user_id=1) == "en"
+    assert detect_user_language("नमस्ते", user_id=1) == "hi"
+
+
+def test_sticky_languages_are_bounded(monkeypatch):
+    monkeypatch.setattr(language, "LANGUAGE_MAX_USERS", 2)
+    for user_id in range(3):
+        detect_user_language("ok thanks", user_id=user_id)
+    assert list(language._user_languages) == ["1", "2"]
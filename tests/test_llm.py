@@ -0,0 +1,133 @@
+import time
+import asyncio
+
+import pytest
+from openai import BadRequestError, InternalServerError
+
+import llm
+from conftest import fake_client
+from llm import CircuitBreaker, CircuitOpenError
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(llm, "OPENAI_RETRY_BASE", 0.01)
+    monkeypatch.setattr(llm, "OPENAI_TIMEOUT", 0.5)
+    monkeypatch.setattr(llm, "OPENAI_DEADLINE", 3)
+    monkeypatch.setattr(llm, "breaker", CircuitBreaker(failures=2, reset_after=0.2))
+
+
+def run(fake, scenario):
+    async def main():
+        return await scenario(fake_client(fake))
+    return asyncio.run(main())
+
+
+async def open_breaker(client, fake):
+    fake.fail(500, times=llm.breaker.failures * (llm.OPENAI_MAX_RETRIES + 1))
+    for _ in range(llm.breaker.failures):
+        with pytest.raises(InternalServerError):
+            await llm.get_ai_reply(client, MESSAGES)
+    assert llm.breaker.state == "open"
+    await asyncio.sleep(llm.breaker.reset_after)
+    assert llm.breaker.state == "half-open"
+
+
+def test_plain_reply(fake_openai):
+    assert run(fake_openai, lambda client: llm.get_ai_reply(client, MESSAGES)) == "hello there"
+
+
+def test_transient_errors_are_retried_after_retry_after(fake_openai):
+    fake_openai.fail(429, retry_after=0.3)
+    fake_openai.fail(503)
+    started = time.monotonic()
+    assert run(fake_openai, lambda client: llm.get_ai_reply(client, MESSAGES)) == "hello there"
+    assert time.monotonic() - started >= 0.3
+    assert len(fake_openai.requests) == 3
+    assert llm.breaker.state == "closed"
+
+
+def test_stalled_attempt_times_out_and_is_retried(fake_openai):
+    fake_openai.stall(1)
+    assert run(fake_openai, lambda client: llm.get_ai_reply(client, MESSAGES)) == "hello there"
+    assert len(fake_openai.requests) == 2
+
+
+def test_client_errors_are_not_retried(fake_openai):
+    fake_openai.fail(400)
+    with pytest.raises(BadRequestError):
+        run(fake_openai, lambda client: llm.get_ai_reply(client, MESSAGES))
+    assert len(fake_openai.requests) == 1
+
+
+def test_client_errors_do_not_open_the_breaker(fake_openai):
+    async def scenario(client):
+        fake_openai.fail(400, times=llm.breaker.failures + 1)
+        for _ in range(llm.breaker.failures + 1):
+            with pytest.raises(BadRequestError):
+                await llm.get_ai_reply(client, MESSAGES)
+        assert llm.breaker.state == "closed"
+        assert await llm.get_ai_reply(client, MESSAGES) == "hello there"
+    run(fake_openai, scenario)
+
+
+def test_streamed_reply(fake_openai):
+    async def scenario(client):
+        return [fragment async for fragment in llm.stream_ai_reply(client, MESSAGES)]
+    assert "".join(run(fake_openai, scenario)) == "hello there"
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_good_trial(fake_openai):
+    async def scenario(client):
+        await open_breaker(client, fake_openai)
+        llm.breaker._opened_at = time.monotonic()  # back to open
+        sent = len(fake_openai.requests)
+        with pytest.raises(CircuitOpenError):
+            await llm.get_ai_reply(client, MESSAGES)
+        assert len(fake_openai.requests) == sent
+
+        await asyncio.sleep(llm.breaker.reset_after)
+        assert await llm.get_ai_reply(client, MESSAGES) == "hello there"
+        assert llm.breaker.state == "closed"
+    run(fake_openai, scenario)
+
+
+def test_failed_trial_reopens_the_breaker(fake_openai):
+    async def scenario(client):
+        await open_breaker(client, fake_openai)
+        fake_openai.fail(500, times=llm.OPENAI_MAX_RETRIES + 1)
+        with pytest.raises(InternalServerError):
+            await llm.get_ai_reply(client, MESSAGES)
+        assert llm.breaker.state == "open"
+    run(fake_openai, scenario)
+
+
+def test_cancelled_trial_frees_the_trial_slot(fake_openai):
+    async def scenario(client):
+        await open_breaker(client, fake_openai)
+        fake_openai.stall(0.4)
+        trial = asyncio.create_task(llm.get_ai_reply(client, MESSAGES))
+        await asyncio.sleep(0.1)
+        with pytest.raises(CircuitOpenError):
+            await llm.get_ai_reply(client, MESSAGES)  # only one trial at a time
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert llm.breaker.state == "half-open"
+        assert await llm.get_ai_reply(client, MESSAGES) == "hello there"
+        assert llm.breaker.state == "closed"
+    run(fake_openai, scenario)
+
+
+def test_abandoned_trial_stream_frees_the_trial_slot(fake_openai):
+    async def scenario(client):
+        await open_breaker(client, fake_openai)
+        stream = llm.stream_ai_reply(client, MESSAGES)
+        assert await stream.__anext__() == "hello"
+        await stream.aclose()
+        assert llm.breaker.state == "half-open"
+        assert await llm.get_ai_reply(client, MESSAGES) == "hello there"
+        assert llm.breaker.state == "closed"
+    run(fake_openai, scenario)
@@ -0,0 +1,29 @@
+import logging
+
+from logging_setup import SamplingFilter, parse_levels
+
+
+def record(level, created, lineno=10):
+    entry = logging.LogRecord("bench", level, "bench.py", lineno, "message", None, None)
+    entry.created = created
+    return entry
+
+
+def test_info_is_sampled_per_call_site_and_window():
+    sampler = SamplingFilter(burst=2, window=60)
+    passed = [sampler.filter(record(logging.INFO, 0)) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert sampler.filter(record(logging.INFO, 0, lineno=11))  # another call site
+    later = record(logging.INFO, 61)
+    assert sampler.filter(later)
+    assert later.suppressed == 3
+
+
+def test_warnings_and_errors_are_never_sampled():
+    sampler = SamplingFilter(burst=1, window=60)
+    for level in (logging.WARNING, logging.ERROR, logging.CRITICAL):
+        assert all(sampler.filter(record(level, 0)) for _ in range(10))
+
+
+def test_parse_levels():
+    assert parse_levels("bot=debug, broadcast=WARNING,,bad") == {"bot": "DEBUG", "broadcast": "WARNING"}
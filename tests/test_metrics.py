@@ -0,0 +1,30 @@
+import socket
+import asyncio
+
+import metrics
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_start_reads_the_port_when_called(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    monkeypatch.setenv("METRICS_PORT", str(port))
+    metrics.handler_messages_total.inc(outcome="test")
+
+    async def scrape():
+        await metrics.start(host="127.0.0.1")
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response.decode()
+
+    response = asyncio.run(scrape())
+    assert response.startswith("HTTP/1.1 200")
+    assert 'handler_messages_total{outcome="test"}' in response
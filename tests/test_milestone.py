@@ -0,0 +1,98 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+import milestone
+from milestone import MilestoneIndex, celebrate_conversation, due_milestones
+
+START = date(2026, 1, 1)
+
+
+def user(name="Asha", start=START, **milestones):
+    return {"name": name, "milestones": {"start_date": start.isoformat(), **milestones}}
+
+
+@pytest.fixture
+def users(monkeypatch):
+    """A fresh index over an in-memory user table instead of the store."""
+    table = {}
+    monkeypatch.setattr(milestone, "milestone_index", MilestoneIndex())
+    monkeypatch.setattr(milestone, "_index_ready", False)
+    monkeypatch.setattr(milestone, "get_all_users", lambda: table)
+    monkeypatch.setattr(milestone, "refresh", lambda: None)
+    monkeypatch.setattr(milestone, "add_user_listener", lambda listener: None)
+    return table
+
+
+def test_users_are_bucketed_by_their_next_milestone():
+    index = MilestoneIndex()
+    index.rebuild({"1": user(), "2": user(start=START + timedelta(days=1)), "3": {"name": "no start"}}, today=START)
+    assert len(index) == 3
+    assert index._buckets == {
+        (START + timedelta(days=7)).toordinal(): {"1"},
+        (START + timedelta(days=8)).toordinal(): {"2"},
+    }
+
+
+def test_pop_due_reindexes_for_the_next_milestone():
+    users = {"1": user()}
+    index = MilestoneIndex()
+    index.rebuild(users, today=START)
+    week = START + timedelta(days=7)
+    assert index.pop_due(week - timedelta(days=1), users) == []
+    assert index.pop_due(week, users) == [("1", week)]
+    assert index._by_user["1"][0] == (START + timedelta(days=30)).toordinal()
+
+
+def test_unchanged_milestones_are_not_reindexed():
+    index = MilestoneIndex()
+    index.update_user("1", user(), today=START)
+    before = list(index._heap)
+    index.update_user("1", {**user(), "conversations": 5}, today=START)
+    assert index._heap == before
+
+    index.update_user("1", user(custom_dates=[3]), today=START)
+    assert index._by_user["1"][0] == (START + timedelta(days=3)).toordinal()
+
+
+def test_due_milestones_only_sends_today(users):
+    start = date.today()  # the index is built as of today
+    custom = (start + timedelta(days=3)).isoformat()
+    users.update({"1": user(start=start), "2": user(start=start, custom_dates=[custom]),
+                  "3": user(start=start + timedelta(days=2))})
+    assert due_milestones(today=start + timedelta(days=3)) == [("2", (
+        "🌷 Asha, we've hit a special milestone: 3 days together! 🌟", None))]
+    week = due_milestones(today=start + timedelta(days=7))
+    assert sorted(chat_id for chat_id, _ in week) == ["1", "2"]
+    assert all("1 week" in text for _, (text, _) in week)
+
+
+def test_missed_days_are_skipped_not_sent_late(users):
+    start = date.today()
+    users["1"] = user(start=start)
+    assert due_milestones(today=start + timedelta(days=8)) == []
+    assert due_milestones(today=start + timedelta(days=30))[0][0] == "1"
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text):
+        self.replies.append(text)
+
+    async def reply_sticker(self, sticker):
+        self.replies.append(sticker)
+
+
+@pytest.mark.parametrize("conversations, custom, expected", [
+    (10, [], "💬 That's our 10th conversation, Asha! 🌱 Thank you for trusting me with your thoughts."),
+    (25, [25], "🌷 Asha, we've hit a special milestone: 25 conversations! 🌟"),
+    (25, [], None),
+    (11, [25], None),
+])
+def test_conversation_milestones(conversations, custom, expected):
+    message = FakeMessage()
+    asyncio.run(celebrate_conversation(message, user(custom_conversations=custom), conversations))
+    assert message.replies == ([expected] if expected else [])
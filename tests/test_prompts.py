@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+import memory
+import prompts
+import reply_cache
+from conftest import fake_client
+from llm import CircuitBreaker
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setattr("llm.breaker", CircuitBreaker())
+    reply_cache.clear()
+    memory._memories.clear()
+    yield
+    reply_cache.clear()
+    memory._memories.clear()
+
+
+def test_replies_without_history_are_cached():
+    *_, cache_key = prompts._prepare_route("feeling sad today", user_id="new")
+    assert cache_key is not None
+
+
+def test_short_casual_messages_skip_history_and_stay_cacheable():
+    memory.remember_exchange("regular", "my exam went badly", "I'm sorry, that sounds hard.")
+    route, messages, _, cache_key = prompts._prepare_route("feeling sad today", user_id="regular")
+    assert cache_key is not None
+    assert [message["role"] for message in messages] == ["system", "user"]
+    assert "earlier in this conversation" not in messages[-1]["content"]
+
+
+def test_longer_messages_carry_history_and_are_not_cached():
+    memory.remember_exchange("regular", "my exam went badly", "I'm sorry, that sounds hard.")
+    text = "I keep thinking about it and I cannot sleep at all tonight"
+    route, messages, _, cache_key = prompts._prepare_route(text, user_id="regular")
+    assert cache_key is None
+    assert "my exam went badly" in [message["content"] for message in messages]
+
+
+def test_cache_answers_regulars_on_repeated_short_messages(fake_openai, monkeypatch):
+    monkeypatch.setattr(reply_cache, "REPLY_CACHE_VARIANTS", 1)  # answer from the first stored reply
+    memory.remember_exchange("b", "my dog died yesterday", "I'm so sorry about your dog.")
+
+    async def exchange():
+        client = fake_client(fake_openai)
+        fake_openai.reply = "generic reply"
+        first = await prompts.route_message(client, "feeling sad today", user_id="a")
+        second = await prompts.route_message(client, "feeling sad today", user_id="b")
+        return first, second
+
+    first, second = asyncio.run(exchange())
+    assert first.startswith("generic reply") and second.startswith("generic reply")
+    assert len(fake_openai.requests) == 1
+    assert all("dog" not in str(message["content"]) for message in fake_openai.requests[0]["messages"])
+
+
+def test_routes_differ_only_in_their_system_prompt():
+    professional, messages, suffix, _ = prompts._prepare_route("help me plan my career")
+    casual, casual_messages, casual_suffix, _ = prompts._prepare_route("feeling sad today")
+    assert (professional, casual) == ("professional", "casual")
+    assert messages[0]["content"] == prompts.PROFESSIONAL_SYSTEM_PROMPT
+    assert casual_messages[0]["content"] == prompts.CASUAL_SYSTEM_PROMPT
+    assert suffix == "" and casual_suffix.strip()
+    assert messages[-1]["content"].endswith("The user said: help me plan my career")
@@ -0,0 +1,55 @@
+import pytest
+
+from schedule_parser import parse_activities, parse_schedule, parse_time
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("9am", "09:00"),
+    ("9:30 PM", "21:30"),
+    ("7.30 p.m.", "19:30"),
+    ("18:00", "18:00"),
+    ("half past 7 pm", "19:30"),
+    ("quarter to 8", "07:45"),
+    ("quarter to 12 pm", "11:45"),
+    ("quarter to 12 am", "23:45"),
+    ("quarter to 1 am", "00:45"),
+    ("quarter to 1 pm", "12:45"),
+    ("quarter to 0", "23:45"),
+    ("quarter to 13 pm", None),
+    ("noon", "12:00"),
+    ("midnight", "00:00"),
+    ("13pm", None),
+    ("25:00", None),
+    ("soon", None),
+])
+def test_parse_time(text, expected):
+    assert parse_time(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("study at 7pm and workout at 6:30am", {"study": "19:00", "workout": "06:30"}),
+    ("yoga at 7pm", {"yoga": "19:00"}),
+    ("remind me to meditate at half past 6 am and go for a walk at noon", {"meditate": "06:30", "walk": "12:00"}),
+    ("my schedule: study at 9, workout at 6am", {"study": "09:00", "workout": "06:00"}),
+    ("my routine: deep work at 10", {"deep work": "10:00"}),
+    ("lunch every day at 1pm", {"lunch": "13:00"}),
+    ("other at 9:15 PM", {"other": "21:15"}),
+])
+def test_activities_are_parsed(text, expected):
+    assert parse_activities(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "remind me to drink water",
+    "meet my friend at 5",
+    "see you at 6",
+    "I had a long day at work, can we talk?",
+    "study at 25:00",
+])
+def test_messages_without_a_schedule_parse_to_nothing(text):
+    assert parse_activities(text) == {}
+
+
+def test_schedule_keeps_the_matched_text():
+    [activity] = parse_schedule("Yoga @ 7 PM please")
+    assert (activity.name, activity.time, activity.source) == ("yoga", "19:00", "@ 7 PM")
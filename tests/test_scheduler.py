@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+from scheduler import ReminderIndex, _epoch_minute, next_fire_minute
+
+NOW = datetime(2026, 3, 1, 6, 0, tzinfo=timezone.utc)
+
+
+def user(**fields):
+    return {"wake_time": None, "sleep_time": None, "activities": {}, "timezone": None, **fields}
+
+
+def due_names(index, moment):
+    return sorted((entry[0], entry[1], entry[2]) for entry, _ in index.pop_due(moment))
+
+
+def test_next_fire_minute_uses_the_users_timezone():
+    minute = next_fire_minute("12:00", NOW, "Asia/Kolkata")  # 11:30 in Kolkata now
+    assert minute == _epoch_minute(datetime(2026, 3, 1, 6, 30, tzinfo=timezone.utc))
+    assert next_fire_minute("06:00", NOW) == _epoch_minute(NOW + timedelta(days=1))
+    assert next_fire_minute("not a time", NOW) is None
+
+
+def test_reminders_fire_in_their_minute_and_repeat_daily():
+    index = ReminderIndex()
+    index.rebuild({"1": user(wake_time="06:30", activities={"study": "07:00"})}, NOW)
+    assert due_names(index, NOW + timedelta(minutes=29)) == []
+    assert due_names(index, NOW + timedelta(minutes=30)) == [("1", "wake", None)]
+    assert due_names(index, NOW + timedelta(minutes=60)) == [("1", "activity", "study")]
+    assert due_names(index, NOW + timedelta(days=1, minutes=30)) == [("1", "wake", None)]
+
+
+def test_a_stalled_tick_catches_up_with_minutes_late():
+    index = ReminderIndex()
+    index.rebuild({"1": user(wake_time="06:05")}, NOW)
+    [(entry, minutes_late)] = index.pop_due(NOW + timedelta(minutes=20))
+    assert minutes_late == 15
+
+
+def test_a_reminder_in_the_startup_minute_fires():
+    index = ReminderIndex()
+    index.rebuild({"1": user(wake_time="06:00")}, NOW)
+    assert due_names(index, NOW) == [("1", "wake", None)]
+
+
+def test_unchanged_settings_are_not_reindexed():
+    index = ReminderIndex()
+    record = user(wake_time="06:30", activities={"study": "07:00"})
+    index.rebuild({"1": record}, NOW)
+    heap_size = len(index._heap)
+    for conversations in range(100):
+        record["milestones"] = {"conversations": conversations}
+        index.update_user("1", record)
+    assert len(index._heap) == heap_size
+    assert len(index) == 2
+
+
+def test_changed_settings_are_reindexed():
+    index = ReminderIndex()
+    record = user(activities={"study": "07:00"})
+    index.rebuild({"1": record}, NOW)
+    record["activities"] = {"study": "06:10", "yoga": "06:20"}
+    index.update_user("1", record)
+    assert due_names(index, NOW + timedelta(minutes=60)) == [("1", "activity", "study"), ("1", "activity", "yoga")]
+
+
+def test_removed_user_gets_nothing_and_the_heap_stays_bounded():
+    index = ReminderIndex()
+    index.rebuild({str(i): user(wake_time=f"{i % 24:02d}:{i % 60:02d}") for i in range(200)}, NOW)
+    for i in range(200):
+        index.remove_user(str(i))
+    assert len(index) == 0
+    assert len(index._heap) <= 64
+    assert index.pop_due(NOW + timedelta(days=2)) == []
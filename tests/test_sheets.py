@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import subprocess
+
+import pytest
+
+import sheets
+from conftest import ROOT
+from sheets import FakeAPIError, FakeWorksheet, JournalQueue, UserIdIndex, is_transient_error
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(worksheet=None):
+        queue = JournalQueue(worksheet or FakeWorksheet(), path=str(tmp_path / f"queue-{len(queues)}.db"))
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.close(timeout=5)
+
+
+def rows(count):
+    return [["2026-01-01", str(i), f"entry {i}", "neutral"] for i in range(count)]
+
+
+def test_flush_appends_every_row_once_in_batches(make_queue, monkeypatch):
+    monkeypatch.setattr(sheets, "JOURNAL_BATCH_SIZE", 2)
+    queue = make_queue()
+    for row in rows(5):
+        queue.enqueue(row)
+    queue.flush()
+    assert queue.pending() == 0
+    assert [row[1] for row in queue.worksheet.rows[1:]] == ["0", "1", "2", "3", "4"]
+
+
+def test_transient_error_keeps_rows_queued(make_queue):
+    queue = make_queue()
+    for row in rows(3):
+        queue.enqueue(row)
+    queue.worksheet.fail_next(1, status=429)
+    with pytest.raises(FakeAPIError):
+        queue.flush()
+    assert queue.pending() == 3
+    assert queue.flush() == 3
+    assert len(queue.worksheet.rows) == 4  # header + 3, nothing duplicated
+
+
+def test_permanent_error_parks_the_batch(make_queue):
+    queue = make_queue()
+    for row in rows(3):
+        queue.enqueue(row)
+    queue.worksheet.fail_next(1, status=403)
+    assert queue.flush() == 0
+    assert queue.pending() == 0
+    assert queue.parked() == 3
+
+    assert queue.requeue_parked() == 3
+    assert queue.parked() == 0
+    queue.flush()
+    assert len(queue.worksheet.rows) == 4
+
+
+class SlowWorksheet(FakeWorksheet):
+    def append_rows(self, values, **kwargs):
+        time.sleep(0.2)
+        super().append_rows(values, **kwargs)
+
+
+def test_close_does_not_append_an_in_flight_batch_twice(make_queue, monkeypatch):
+    monkeypatch.setattr(sheets, "JOURNAL_BATCH_SIZE", 2)
+    queue = make_queue(SlowWorksheet())
+    for row in rows(4):
+        queue.enqueue(row)  # a full batch wakes the writer thread
+    deadline = time.monotonic() + 5
+    while queue.worksheet.append_calls == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)  # the writer is now mid-batch
+    queue.close(timeout=5)
+    appended = [row[1] for row in queue.worksheet.rows[1:]]
+    assert sorted(appended) == ["0", "1", "2", "3"]
+    assert queue.pending() == 0
+
+
+@pytest.mark.parametrize("error, transient", [
+    (FakeAPIError(429, "quota"), True),
+    (FakeAPIError(503, "unavailable"), True),
+    (FakeAPIError(403, "denied"), False),
+    (FakeAPIError(404, "not found"), False),
+    (ConnectionError("reset"), True),
+    (TimeoutError(), True),
+    (FileNotFoundError("credentials.json"), False),
+    (ValueError("bad row"), False),
+])
+def test_error_classification(error, transient):
+    assert is_transient_error(error) is transient
+
+
+def test_import_opens_no_files(tmp_path):
+    env = dict(os.environ, PYTHONPATH=ROOT, JOURNAL_QUEUE_FILE="journal_queue.db", USER_ID_INDEX_FILE="user_id_index.json")
+    subprocess.run([sys.executable, "-c", "import sheets, daily_messages"], cwd=tmp_path, env=env, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_save_message_logs_instead_of_printing(monkeypatch, caplog, capsys):
+    def broken(row):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(sheets.get_journal_queue(), "enqueue", broken)
+    sheets.save_message("2026-01-01", 1, "hello")
+    assert "disk full" in caplog.text
+    assert capsys.readouterr().out == ""
+
+
+@pytest.fixture
+def journal_sheet():
+    worksheet = FakeWorksheet()
+    worksheet.append_rows([["2026-01-01", "1", "hi", "neutral"], ["2026-01-01", "2", "hey", "neutral"],
+                           ["2026-01-02", "1", "again", "neutral"]])
+    return worksheet
+
+
+def test_user_id_index_reads_only_new_rows(journal_sheet, tmp_path, monkeypatch):
+    index = UserIdIndex(journal_sheet, path=str(tmp_path / "index.json"))
+    assert index.refresh() == ({"1", "2"}, {"1", "2"})
+
+    requested = []
+    get_values = journal_sheet.get_values
+    monkeypatch.setattr(journal_sheet, "get_values", lambda range_name: requested.append(range_name) or get_values(range_name))
+    journal_sheet.append_rows([["2026-01-03", "3", "new", "neutral"], ["2026-01-03", "2", "dup", "neutral"]])
+    assert index.refresh() == ({"1", "2", "3"}, {"3"})
+    assert requested == ["B5:B"]
+    assert index.refresh() == ({"1", "2", "3"}, set())
+
+
+def test_user_id_index_persists_its_position(journal_sheet, tmp_path):
+    path = str(tmp_path / "index.json")
+    UserIdIndex(journal_sheet, path=path).refresh()
+    restored = UserIdIndex(journal_sheet, path=path)
+    assert (restored.ids, restored.last_row) == ({"1", "2"}, 4)
+    assert restored.refresh() == ({"1", "2"}, set())
+    assert restored.rebuild() == ({"1", "2"}, {"1", "2"})
+
+
+def test_user_id_index_does_not_touch_the_user_store(journal_sheet, tmp_path, monkeypatch):
+    monkeypatch.setattr(sheets.database, "initialize_user", lambda user_id: pytest.fail("touched the user store"))
+    UserIdIndex(journal_sheet, path=str(tmp_path / "index.json")).refresh()
+
+
+def test_load_user_ids_registers_new_ids_on_the_event_loop(journal_sheet, tmp_path, monkeypatch):
+    index = UserIdIndex(journal_sheet, path=str(tmp_path / "index.json"))
+    monkeypatch.setattr(sheets, "get_user_id_index", lambda: index)
+    registered_on = []
+    monkeypatch.setattr(sheets.database, "initialize_user",
+                        lambda user_id: registered_on.append((user_id, threading.current_thread())))
+
+    ids = asyncio.run(sheets.load_user_ids())
+    assert sorted(ids) == ["1", "2"]
+    assert sorted(user_id for user_id, _ in registered_on) == ["1", "2"]
+    assert all(thread is threading.main_thread() for _, thread in registered_on)
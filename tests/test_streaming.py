@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+import streaming
+from streaming import STREAM_FAILED_REPLY, STREAM_PLACEHOLDER, send_streaming_reply
+
+
+class FakeMessage:
+    chat_id = 7
+
+    def __init__(self, sent=None):
+        self.sent = sent if sent is not None else []
+        self.text = None
+
+    async def reply_text(self, text):
+        message = FakeMessage(self.sent)
+        message.text = text
+        self.sent.append(message)
+        return message
+
+    async def edit_text(self, text, parse_mode=None):
+        self.text = text
+
+
+async def fragments(*parts, error=None):
+    for part in parts:
+        yield part
+    if error:
+        raise error
+
+
+@pytest.fixture(autouse=True)
+def no_edit_pacing(monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_EDIT_INTERVAL", 0)
+
+
+def test_reply_is_streamed_into_the_placeholder():
+    message = FakeMessage()
+    text = asyncio.run(send_streaming_reply(message, fragments("Hello", " there"), finalize=str.upper))
+    assert text == "Hello there"
+    assert [m.text for m in message.sent] == ["HELLO THERE"]
+
+
+def test_long_reply_rolls_over_into_new_messages(monkeypatch):
+    monkeypatch.setattr(streaming, "TELEGRAM_MAX_MESSAGE_LENGTH", 20)
+    message = FakeMessage()
+    asyncio.run(send_streaming_reply(message, fragments("word " * 10)))
+    assert len(message.sent) == 3
+    assert all(len(m.text) <= 20 for m in message.sent)
+
+
+def test_failure_before_the_first_chunk_replaces_the_placeholder():
+    message = FakeMessage()
+    with pytest.raises(RuntimeError):
+        asyncio.run(send_streaming_reply(message, fragments(error=RuntimeError("boom"))))
+    assert [m.text for m in message.sent] == [STREAM_FAILED_REPLY]
+    assert message.sent[0].text != STREAM_PLACEHOLDER
+
+
+def test_failure_mid_stream_keeps_the_partial_reply():
+    message = FakeMessage()
+    with pytest.raises(RuntimeError):
+        asyncio.run(send_streaming_reply(message, fragments("Half a", " reply", error=RuntimeError("boom"))))
+    assert message.sent[0].text == f"Half a reply\n\n{STREAM_FAILED_REPLY}"
@@ -0,0 +1,25 @@
+import pytest
+
+import keywords
+from keywords import DEFAULT_LEXICONS, KeywordMatcher
+from tone_analysis import analyze_tone, analyze_tones, dominant_tones
+
+pytest.importorskip("numpy")
+
+
+def test_batch_scores_agree_with_single_message_tone():
+    messages = ["I feel so alone", "burnt out and sleepy", "what a good day", "", "no one to talk to"]
+    assert dominant_tones(analyze_tones(messages)) == ["lonely", "tired", "happy", "neutral", "lonely"]
+    assert [analyze_tone(message) for message in messages][:4] == ["lonely", "tired", "happy", "neutral"]
+
+
+def test_empty_batch():
+    assert analyze_tones([]).shape == (0, len(keywords.TONE_CATEGORIES))
+
+
+def test_vocabulary_follows_the_active_lexicons(monkeypatch):
+    assert dominant_tones(analyze_tones(["feeling meh"])) == ["neutral"]
+    custom = dict(DEFAULT_LEXICONS, sad=DEFAULT_LEXICONS["sad"] + ["meh"])
+    monkeypatch.setattr(keywords, "matcher", KeywordMatcher(custom))
+    assert dominant_tones(analyze_tones(["feeling meh"])) == ["sad"]
+    assert analyze_tone("feeling meh") == "sad"
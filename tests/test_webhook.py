@@ -0,0 +1,155 @@
+import json
+import asyncio
+
+import pytest
+
+import webhook
+from webhook import WebhookServer, replay
+
+SECRET = "s3cret"
+
+
+class FakeApplication:
+    bot = None
+
+    def __init__(self):
+        self.update_queue = asyncio.Queue()
+
+
+def message_update(update_id):
+    return {
+        "update_id": update_id,
+        "message": {"message_id": update_id, "date": 0, "chat": {"id": 7, "type": "private"}, "text": "hi"},
+    }
+
+
+async def started_server(application):
+    server = WebhookServer(application, secret=SECRET)
+    await server.start(host="127.0.0.1", port=0)
+    port = server._server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}{server.path}", port
+
+
+def run_replay(tmp_path, lines, secret=SECRET):
+    path = tmp_path / "updates.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    application = FakeApplication()
+
+    async def scenario():
+        server, url, _ = await started_server(application)
+        try:
+            return await replay(str(path), url, secret=secret)
+        finally:
+            await server.stop()
+
+    return asyncio.run(scenario()), application
+
+
+def test_replayed_updates_are_queued(tmp_path):
+    statuses, application = run_replay(tmp_path, [json.dumps(message_update(i)) for i in range(5)])
+    assert statuses == {200: 5}
+    assert application.update_queue.qsize() == 5
+
+
+def test_wrong_secret_is_refused(tmp_path):
+    statuses, application = run_replay(tmp_path, [json.dumps(message_update(1))], secret="wrong")
+    assert statuses == {403: 1}
+    assert application.update_queue.empty()
+
+
+def test_malformed_update_is_a_bad_request(tmp_path):
+    bodies = ["{not json", "null", "[]", "1", '"x"', "{}"]
+    statuses, application = run_replay(tmp_path, bodies + [json.dumps(message_update(2))])
+    assert statuses == {400: len(bodies), 200: 1}
+    assert application.update_queue.qsize() == 1
+
+
+def test_full_queue_asks_telegram_to_redeliver(tmp_path, monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_MAX_QUEUE", 1)
+    statuses, application = run_replay(tmp_path, [json.dumps(message_update(i)) for i in range(3)])
+    assert statuses[503] >= 1
+    assert application.update_queue.qsize() == 1
+
+
+async def raw_request(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+@pytest.mark.parametrize("data, status", [
+    (b"GARBAGE\r\n\r\n", 400),
+    (b"POST /telegram HTTP/1.1\r\nContent-Length: lots\r\n\r\n", 400),
+    (b"POST /telegram HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % (webhook.WEBHOOK_MAX_BODY + 1), 413),
+    (b"GET /metrics HTTP/1.1\r\n\r\n", 404),
+    (b"GET /healthz HTTP/1.1\r\n\r\n", 200),
+    (b"POST /telegram HTTP/1.1\r\nX-Long: " + b"a" * 100_000 + b"\r\n\r\n", 431),
+    (b"POST /telegram HTTP/1.1\r\n" + b"X-Many: 1\r\n" * 200 + b"\r\n", 431),
+])
+def test_raw_requests(data, status):
+    async def scenario():
+        server, _, port = await started_server(FakeApplication())
+        try:
+            return await raw_request(port, data)
+        finally:
+            await server.stop()
+
+    assert asyncio.run(scenario()) == status
+
+
+def test_slow_request_is_dropped(monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_READ_TIMEOUT", 0.1)
+
+    async def scenario():
+        server, _, port = await started_server(FakeApplication())
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /telegram HTTP/1.1\r\nContent-Length: 10\r\n\r\n{")
+            await writer.drain()
+            closed = await asyncio.wait_for(reader.read(), timeout=2)
+            writer.close()
+            return closed
+        finally:
+            await server.stop()
+
+    assert asyncio.run(scenario()) == b""
+
+
+class ServedApplication(FakeApplication):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+        async def post_init(app):
+            self.calls.append("post_init")
+        self.post_init = post_init
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def start(self):
+        self.calls.append("start")
+
+    async def stop(self):
+        self.calls.append("stop")
+
+
+def test_serve_runs_post_init_before_starting(monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_SET_ON_START", False)
+    start = WebhookServer.start
+    monkeypatch.setattr(WebhookServer, "start", lambda self: start(self, host="127.0.0.1", port=0))
+    application = ServedApplication()
+
+    async def scenario():
+        stop = asyncio.Event()
+        stop.set()
+        await webhook.serve(application, stop)
+
+    asyncio.run(scenario())
+    assert application.calls == ["post_init", "start", "stop"]
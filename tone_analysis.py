@@ -1,32 +1,152 @@
 import re
+import csv
+import sys
+from itertools import islice, repeat
+import keywords
+from keywords import TONE_CATEGORIES, _WORDS, scan
 
 # ==========================
 # 🎤 TONE ANALYSIS UTILITY
 # ==========================
-def analyze_tone(message: str) -> str:
-    """Analyze the emotional tone of the user's message."""
-    msg = message.lower().strip()
-
-    sad_words = ["sad", "down", "depressed", "unhappy", "crying", "overwhelmed", "low"]
-    happy_words = ["happy", "excited", "amazing", "fantastic", "good", "joyful", "grateful", "peaceful", "motivated"]
-    tired_words = ["tired", "sleepy", "exhausted", "drained", "burnt out", "no energy"]
-    angry_words = ["angry", "mad", "furious", "irritated", "frustrated", "annoyed", "enraged"]
-    lonely_words = ["lonely", "alone", "isolated", "no one understands", "no one to talk to"]
-
-    if any(word in msg for word in sad_words):
-        return "sad"
-    elif any(word in msg for word in happy_words):
-        return "happy"
-    elif any(word in msg for word in tired_words):
-        return "tired"
-    elif any(word in msg for word in angry_words):
-        return "angry"
-    elif any(word in msg for word in lonely_words):
-        return "lonely"
+def analyze_tone(message: str, hits: dict = None) -> str:
+    """Analyze the emotional tone of the user's message.
 
+    ``hits`` may be a keywords.scan() result for the same message, to
+    avoid scanning it twice.
+    """
+    if hits is None:
+        hits = scan(message)
+    for tone in TONE_CATEGORIES:
+        if tone in hits:
+            return tone
     return "neutral"
 
 
+# ==========================
+# 📊 BATCH TONE SCORING
+# ==========================
+class _ToneVocabulary:
+    """Lexicon phrases as integer ids plus a (phrases x tones) membership matrix."""
+
+    def __init__(self, matcher):
+        import numpy as np
+
+        self.matcher = matcher
+        lexicons = matcher.lexicons
+        self.ids = {}
+        for tone in TONE_CATEGORIES:
+            for phrase in lexicons.get(tone, []):
+                self.ids.setdefault(" ".join(_WORDS.findall(phrase.lower())), len(self.ids))
+        self.membership = np.zeros((len(self.ids) + 1, len(TONE_CATEGORIES)))  # last row: unknown token
+        for column, tone in enumerate(TONE_CATEGORIES):
+            for phrase in lexicons.get(tone, []):
+                self.membership[self.ids[" ".join(_WORDS.findall(phrase.lower()))], column] = 1
+        multi_word = [phrase.split() for phrase in self.ids if " " in phrase]
+        self.phrase_lengths = sorted({len(words) for words in multi_word})
+        self.first_words = {words[0] for words in multi_word}
+
+_vocabulary = None
+_SEPARATOR = "\x1e"
+_BATCH_TOKENS = re.compile(r"[\w']+|\x1e")
+
+def analyze_tones(messages):
+    """Score every tone category for every message at once.
+
+    Returns a NumPy array of shape (len(messages), len(TONE_CATEGORIES))
+    holding how many lexicon phrases of each tone appear in each message,
+    using the same lexicons as keywords.matcher (KEYWORD_LEXICONS_FILE included).
+    Tokens of the whole batch are mapped to phrase ids in one flat array
+    and summed per message with bincount, instead of scanning each
+    message against each word list.
+    """
+    import numpy as np
+
+    global _vocabulary
+    if _vocabulary is None or _vocabulary.matcher is not keywords.matcher:
+        _vocabulary = _ToneVocabulary(keywords.matcher)  # rebuilt whenever the shared matcher is replaced
+    vocab = _vocabulary
+    unknown = len(vocab.ids)
+
+    count = len(messages)
+    scores = np.zeros((count, len(TONE_CATEGORIES)))
+    if not count:
+        return scores
+
+    # Tokenize the whole batch with one regex pass; a separator token marks message boundaries.
+    joined = _SEPARATOR.join(message or "" for message in messages).lower()
+    if joined.count(_SEPARATOR) != count - 1:
+        joined = _SEPARATOR.join((message or "").replace(_SEPARATOR, " ") for message in messages).lower()
+    tokens = _BATCH_TOKENS.findall(joined)
+    separator = unknown + 1
+    codes = dict(vocab.ids, **{_SEPARATOR: separator})
+    ids = np.fromiter(map(codes.get, tokens, repeat(unknown)), dtype=np.intp, count=len(tokens))
+    owners = np.cumsum(ids == separator)
+
+    # Multi-word phrases: only positions whose word can start a phrase.
+    rows = [owners]
+    starts = np.flatnonzero(np.fromiter(map(vocab.first_words.__contains__, tokens), dtype=bool, count=len(tokens)))
+    for length in vocab.phrase_lengths:
+        candidates = starts[starts + length <= len(tokens)]
+        candidates = candidates[owners[candidates] == owners[candidates + length - 1]]
+        grams = [(i, vocab.ids.get(" ".join(tokens[i:i + length]), unknown)) for i in candidates.tolist()]
+        grams = [(i, gram_id) for i, gram_id in grams if gram_id != unknown]
+        if grams:
+            positions, gram_ids = zip(*grams)
+            ids = np.concatenate([ids, np.asarray(gram_ids, dtype=np.intp)])
+            rows.append(owners[list(positions)])
+    rows = np.concatenate(rows)
+
+    known = ids < unknown
+    rows, hits = rows[known], vocab.membership[ids[known]]
+    for column in range(len(TONE_CATEGORIES)):
+        scores[:, column] = np.bincount(rows, weights=hits[:, column], minlength=count)
+    return scores
+
+def dominant_tones(scores):
+    """Turn analyze_tones() scores into one tone per message ("neutral" when nothing matched)."""
+    import numpy as np
+
+    best = np.argmax(scores, axis=1)
+    matched = scores.max(axis=1) > 0 if len(scores) else np.zeros(0, dtype=bool)
+    return [TONE_CATEGORIES[index] if hit else "neutral" for index, hit in zip(best, matched)]
+
+def iter_tones(messages, chunk_size=10000):
+    """Stream (chunk, scores) pairs over any iterable of messages with bounded memory."""
+    iterator = iter(messages)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk, analyze_tones(chunk)
+
+def backfill_sentiment_csv(src_path, dst_path, chunk_size=10000):
+    """Fill the Sentiment column of a journal sheet export (CSV) chunk by chunk.
+
+    Returns {user id: tone of that user's last message}, ready to store as
+    each user's last_sentiment.
+    """
+    last_sentiment = {}
+    with open(src_path, newline="", encoding="utf-8") as src, open(dst_path, "w", newline="", encoding="utf-8") as dst:
+        reader = csv.DictReader(src)
+        fieldnames = list(reader.fieldnames or [])
+        if "Sentiment" not in fieldnames:
+            fieldnames.append("Sentiment")
+        writer = csv.DictWriter(dst, fieldnames=fieldnames)
+        writer.writeheader()
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                break
+            tones = dominant_tones(analyze_tones([row.get("Message", "") for row in rows]))
+            for row, tone in zip(rows, tones):
+                row["Sentiment"] = tone
+                user_id = str(row.get("User ID") or row.get("User Id") or "").strip()
+                if user_id:
+                    last_sentiment[user_id] = tone
+            writer.writerows(rows)
+    return last_sentiment
+
+
 def get_tone_emoji(tone: str) -> str:
     """Return an emoji that best suits the detected tone."""
     emojis = {
@@ -66,6 +186,21 @@ def get_tone_based_message(tone: str) -> str:
     return messages.get(tone, "🌷 I’m here for you — always. 🌱")
 
 
+# 🧪 Usage: python tone_analysis.py backfill export.csv out.csv [--update-users]
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] != "backfill":
+        print("Usage: python tone_analysis.py backfill <export.csv> <out.csv> [--update-users]")
+        sys.exit(1)
+    latest = backfill_sentiment_csv(sys.argv[2], sys.argv[3])
+    print(f"✅ Wrote sentiments to {sys.argv[3]} ({len(latest)} users)")
+    if "--update-users" in sys.argv:
+        from database import flush, set_last_sentiment
+        for user_id, tone in latest.items():
+            set_last_sentiment(user_id, tone)
+        flush()
+        print("✅ Updated last_sentiment for every user in the export")
+
+
 # ==========================
 # 🌷 NEXT STEP:
 # ==========================
@@ -0,0 +1,117 @@
+import os
+import math
+import logging
+import threading
+from collections import deque
+import metrics
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 SETTINGS
+# ==========================
+USAGE_WINDOW = int(os.getenv("USAGE_WINDOW", "1000"))              # recent requests kept per route
+USAGE_MIN_SAMPLES = int(os.getenv("USAGE_MIN_SAMPLES", "50"))      # before max_tokens adapts
+USAGE_REPORT_EVERY = int(os.getenv("USAGE_REPORT_EVERY", "500"))   # log a report every N requests (0 = never)
+MAX_TOKENS_HEADROOM = float(os.getenv("MAX_TOKENS_HEADROOM", "1.25"))
+
+# USD per 1M tokens: (prompt, cached prompt, completion)
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+# ==========================
+# 📈 PER-ROUTE STATS
+# ==========================
+class RouteUsage:
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.latencies = deque(maxlen=USAGE_WINDOW)
+        self.first_token = deque(maxlen=USAGE_WINDOW)
+        self.completions = deque(maxlen=USAGE_WINDOW)
+
+_routes = {}
+_lock = threading.Lock()
+_total_requests = 0
+
+def _percentile(values, pct):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(pct / 100 * len(ordered))) - 1)]
+
+def record(route, model, usage, latency, first_token=None):
+    """Record one completion's token usage and latency for a route."""
+    global _total_requests
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    prompt_price, cached_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0, 0.0))
+    metrics.openai_tokens_total.inc(prompt - cached, route=route or "default", kind="prompt")
+    metrics.openai_tokens_total.inc(cached, route=route or "default", kind="cached")
+    metrics.openai_tokens_total.inc(completion, route=route or "default", kind="completion")
+    with _lock:
+        stats = _routes.setdefault(route or "default", RouteUsage())
+        stats.requests += 1
+        stats.prompt_tokens += prompt
+        stats.cached_tokens += cached
+        stats.completion_tokens += completion
+        stats.cost += ((prompt - cached) * prompt_price + cached * cached_price + completion * completion_price) / 1e6
+        stats.latencies.append(latency)
+        if first_token is not None:
+            stats.first_token.append(first_token)
+        if completion:
+            stats.completions.append(completion)
+        _total_requests += 1
+        should_report = USAGE_REPORT_EVERY and _total_requests % USAGE_REPORT_EVERY == 0
+    if should_report:
+        logger.info("💸 OpenAI usage\n" + report())
+
+def suggested_max_tokens(route, default, floor=150):
+    """max_tokens sized from measured reply lengths: p99 with headroom, never above ``default``."""
+    with _lock:
+        stats = _routes.get(route)
+        if stats is None or len(stats.completions) < USAGE_MIN_SAMPLES:
+            return default
+        measured = _percentile(stats.completions, 99) * MAX_TOKENS_HEADROOM
+    return int(min(default, max(floor, measured)))
+
+def report():
+    """Prompt vs completion tokens, cache hits, cost and latency per route, as a text table."""
+    lines = [
+        f"{'route':<14}{'reqs':>7}{'prompt':>11}{'cached':>9}{'compl':>10}"
+        f"{'cost $':>10}{'p50 s':>8}{'p95 s':>8}{'ttft p50':>10}{'compl p99':>11}"
+    ]
+    with _lock:
+        for route, stats in sorted(_routes.items()):
+            lines.append(
+                f"{route:<14}{stats.requests:>7}{stats.prompt_tokens:>11}{stats.cached_tokens:>9}"
+                f"{stats.completion_tokens:>10}{stats.cost:>10.4f}"
+                f"{_percentile(stats.latencies, 50):>8.2f}{_percentile(stats.latencies, 95):>8.2f}"
+                f"{_percentile(stats.first_token, 50):>10.2f}{_percentile(stats.completions, 99):>11}"
+            )
+    return "\n".join(lines)
+
+def snapshot():
+    """Raw per-route counters, e.g. for a metrics endpoint."""
+    with _lock:
+        return {
+            route: {
+                "requests": stats.requests,
+                "prompt_tokens": stats.prompt_tokens,
+                "cached_tokens": stats.cached_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "cost_usd": stats.cost,
+            }
+            for route, stats in _routes.items()
+        }
@@ -1,38 +1,48 @@
+import os
 from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from schedule_parser import parse_time
+
+DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE")  # IANA name, e.g. "Asia/Kolkata"; unset = server local time
 
 # ==========================
 # ⏳ UTILITY FUNCTIONS
 # ==========================
 def convert_to_24h(time_string):
-    """Convert a user-input time like '9am' or '9:30 PM' into 'HH:MM' 24h format."""
-    time_string = time_string.strip().lower()
-    try:
-        # Try common formats
-        if ":" in time_string:
-            return datetime.strptime(time_string, "%I:%M%p").strftime("%H:%M")  # e.g., 9:30pm
-        else:
-            return datetime.strptime(time_string, "%I%p").strftime("%H:%M")      # e.g., 9am
-    except ValueError:
-        return None
+    """Convert a user-input time like '9am' or '9:30 PM' into 'HH:MM' 24h format (None if invalid)."""
+    return parse_time(time_string)
+
 
+def get_current_time(timezone_name=None):
+    """Get the current time in 'HH:MM' 24h format, in the given timezone if any."""
+    return datetime.now(resolve_timezone(timezone_name)).strftime("%H:%M")
 
-def get_current_time():
-    """Get the current time in 'HH:MM' 24h format."""
-    return datetime.now().strftime("%H:%M")
+
+@lru_cache(maxsize=None)
+def resolve_timezone(timezone_name=None):
+    """Return the tzinfo for an IANA name, falling back to DEFAULT_TIMEZONE / server local."""
+    for name in (timezone_name, DEFAULT_TIMEZONE):
+        if name:
+            try:
+                return ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                continue
+    return datetime.now().astimezone().tzinfo
+
+
+def is_valid_timezone(timezone_name):
+    """Check if the input is a known IANA timezone name (e.g. 'Europe/Berlin')."""
+    try:
+        ZoneInfo(timezone_name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
 
 
 def is_valid_time_string(time_string):
     """Check if the input is a valid time (9am, 9:30 PM, 18:00, etc.)."""
-    if not time_string:
-        return False
-    patterns = ["%I%p", "%I:%M%p", "%H:%M"]
-    for pattern in patterns:
-        try:
-            datetime.strptime(time_string, pattern)
-            return True
-        except ValueError:
-            continue
-    return False
+    return parse_time(time_string) is not None
 
 
 def get_friendly_activity_message(activity_name):
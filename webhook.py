@@ -0,0 +1,242 @@
+import os
+import sys
+import hmac
+import json
+import asyncio
+import logging
+from dotenv import load_dotenv
+from telegram import Update
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 LOAD ENVIRONMENT
+# ==========================
+load_dotenv()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")                          # public base URL, e.g. https://vyaara.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")                # echoed by Telegram in X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("PORT", os.getenv("WEBHOOK_PORT", "8080")))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))  # Telegram-side parallel deliveries
+WEBHOOK_MAX_QUEUE = int(os.getenv("WEBHOOK_MAX_QUEUE", "10000"))    # beyond this, answer 503 so Telegram redelivers
+WEBHOOK_SET_ON_START = os.getenv("WEBHOOK_SET_ON_START", "1") == "1"
+WEBHOOK_READ_TIMEOUT = float(os.getenv("WEBHOOK_READ_TIMEOUT", "10"))  # seconds to receive one whole request
+WEBHOOK_MAX_BODY = 1024 * 1024
+WEBHOOK_MAX_HEADERS = 100
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+# ==========================
+# 🌐 MINIMAL ASYNC HTTP SERVER
+# ==========================
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large",
+            431: "Request Header Fields Too Large", 503: "Service Unavailable"}
+
+class _RequestError(Exception):
+    """A request answered with ``status`` before it reaches the handler; the connection is then closed."""
+
+    def __init__(self, status, reason):
+        super().__init__(reason)
+        self.status = status
+
+async def _readline(reader):
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise _RequestError(431, "line too long") from None
+
+async def _read_request(reader):
+    """Parse one HTTP/1.1 request; returns (method, path, headers, body) or None on EOF."""
+    request_line = await _readline(reader)
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").split(" ", 2)
+    if len(parts) != 3:
+        raise _RequestError(400, "malformed request line")
+    method, path, _ = parts
+    headers = {}
+    for _ in range(WEBHOOK_MAX_HEADERS + 1):
+        line = await _readline(reader)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise _RequestError(431, "too many headers")
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise _RequestError(400, "bad content-length") from None
+    if length < 0:
+        raise _RequestError(400, "bad content-length")
+    if length > WEBHOOK_MAX_BODY:
+        raise _RequestError(413, "body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?", 1)[0], headers, body
+
+def _response(status, body=b"", keep_alive=True):
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Content-Type: text/plain\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+# ==========================
+# 📬 WEBHOOK RECEIVER
+# ==========================
+class WebhookServer:
+    """Receives Telegram updates over HTTP and feeds them to the application.
+
+    Each POST to WEBHOOK_PATH is checked against WEBHOOK_SECRET (constant-
+    time compare), decoded with Update.de_json and put on the application's
+    update_queue, and answered 200 straight away: handlers run after the
+    ack, so a slow reply never holds up Telegram's delivery. When the queue
+    is over WEBHOOK_MAX_QUEUE the update is refused with 503 and Telegram
+    redelivers it later. GET /healthz reports the queue depth. Metrics are
+    not served here, on the public listener, but on METRICS_PORT (see metrics.start).
+    """
+
+    def __init__(self, application, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET):
+        self.application = application
+        self.path = path
+        self.secret = secret.encode()
+        self.received = 0
+        self._server = None
+
+    def _authorized(self, headers):
+        if not self.secret:
+            return True
+        return hmac.compare_digest(headers.get(SECRET_HEADER, "").encode(), self.secret)
+
+    async def handle(self, method, path, headers, body):
+        """Return the HTTP status for one request."""
+        if path == "/healthz" and method == "GET":
+            return 200, f"ok queue={self.application.update_queue.qsize()}".encode()
+        if path != self.path:
+            return 404, b""
+        if method != "POST":
+            return 405, b""
+        if not self._authorized(headers):
+            logger.warning("🚫 Webhook call with a wrong secret token")
+            return 403, b""
+        if self.application.update_queue.qsize() >= WEBHOOK_MAX_QUEUE:
+            return 503, b""
+        try:
+            payload = json.loads(body)
+            if not isinstance(payload, dict):
+                raise ValueError(f"expected a JSON object, got {type(payload).__name__}")
+            update = Update.de_json(payload, self.application.bot)
+            if update is None:
+                raise ValueError("empty update")
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"⚠️ Ignoring malformed update: {e}")
+            return 400, b""
+        self.application.update_queue.put_nowait(update)
+        self.received += 1
+        return 200, b""
+
+    async def _serve_connection(self, reader, writer):
+        """Answer requests on one connection until it closes, errs or sits idle past WEBHOOK_READ_TIMEOUT."""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), timeout=WEBHOOK_READ_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except _RequestError as e:
+                    writer.write(_response(e.status, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                status, body = await self.handle(*request)
+                keep_alive = request[2].get("connection", "").lower() != "close"
+                writer.write(_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"❌ Webhook connection failed: {e}")
+        finally:
+            writer.close()
+
+    async def start(self, host=WEBHOOK_LISTEN, port=WEBHOOK_PORT):
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        logger.info(f"🌐 Webhook listening on {host}:{port}{self.path}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+async def serve(application, stop_event=None):
+    """Run the application in webhook mode until ``stop_event`` is set (or forever)."""
+    server = WebhookServer(application)
+    async with application:
+        if application.post_init:
+            await application.post_init(application)  # PTB only runs it from run_polling/run_webhook
+        await application.start()
+        await server.start()
+        if WEBHOOK_SET_ON_START and WEBHOOK_URL:
+            await application.bot.set_webhook(
+                url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET or None,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=Update.ALL_TYPES,
+            )
+            logger.info(f"✅ Webhook registered at {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+        try:
+            await (stop_event or asyncio.Event()).wait()
+        finally:
+            await server.stop()
+            await application.stop()
+
+def run_webhook(application):
+    """Blocking entry point used by bot.main when BOT_MODE=webhook."""
+    if not WEBHOOK_SECRET:
+        logger.warning("⚠️ WEBHOOK_SECRET is empty: anyone who finds the URL can post updates")
+    try:
+        asyncio.run(serve(application))
+    except KeyboardInterrupt:
+        pass
+
+# ==========================
+# 🔁 REPLAY RECORDED UPDATES
+# ==========================
+async def replay(path, url, secret=WEBHOOK_SECRET, concurrency=20):
+    """POST every update in a JSON-lines file to a running webhook; returns status counts."""
+    import httpx
+
+    with open(path, "r", encoding="utf-8") as f:
+        updates = [line for line in (l.strip() for l in f) if line]
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = secret
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(client, body):
+        async with semaphore:
+            response = await client.post(url, content=body.encode("utf-8"), headers=headers)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async with httpx.AsyncClient(timeout=10) as client:
+        await asyncio.gather(*(post(client, body) for body in updates))
+    return statuses
+
+# 🧪 Usage: python webhook.py replay updates.jsonl [http://localhost:8080/telegram]
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "replay":
+        print("Usage: python webhook.py replay <updates.jsonl> [url]")
+        sys.exit(1)
+    target = sys.argv[3] if len(sys.argv) > 3 else f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}"
+    print(f"✅ Replayed {sys.argv[2]} to {target}: {asyncio.run(replay(sys.argv[2], target))}")
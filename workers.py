@@ -0,0 +1,192 @@
+import os
+import sys
+import zlib
+import time
+import asyncio
+import logging
+import multiprocessing
+from types import SimpleNamespace
+from dotenv import load_dotenv
+from telegram import Bot, Update
+from telegram.error import NetworkError, RetryAfter
+from logging_setup import setup_logging
+
+# ==========================
+# ⚙️ CONFIGURE LOGGING
+# ==========================
+logger = logging.getLogger(__name__)
+
+# ==========================
+# 🌍 LOAD ENVIRONMENT
+# ==========================
+load_dotenv()
+TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "1"))                    # >1: shard chats across processes
+WORKER_MAX_BACKLOG = int(os.getenv("WORKER_MAX_BACKLOG", "10000"))   # queued updates before ingress pauses
+WORKER_PREFETCH = int(os.getenv("WORKER_PREFETCH", "100"))           # updates a worker takes ahead of its handlers
+POLL_TIMEOUT = int(os.getenv("POLL_TIMEOUT", "30"))                  # long-poll seconds per getUpdates
+
+# ==========================
+# 🔀 SHARD ROUTING
+# ==========================
+def shard_for(chat_id, shards):
+    """Stable shard for a chat: the same chat always lands on the same worker."""
+    return zlib.crc32(str(chat_id).encode()) % shards
+
+class ShardRouter:
+    """Routes updates to one multiprocessing queue per worker by chat id.
+
+    A chat has exactly one owning worker, which keeps its messages in
+    order (the worker's chat_queue lock does the rest) and means per-user
+    state is only ever written by one process. It also quacks like an
+    update queue (put_nowait/qsize) so webhook.WebhookServer can feed it.
+    """
+
+    def __init__(self, queues):
+        self.queues = queues
+
+    def put_nowait(self, update):
+        chat = update.effective_chat
+        index = shard_for(chat.id, len(self.queues)) if chat else 0
+        self.queues[index].put(update.to_dict())
+
+    def qsize(self):
+        try:
+            return sum(q.qsize() for q in self.queues)
+        except NotImplementedError:  # macOS
+            return 0
+
+# ==========================
+# 👷 WORKER PROCESS
+# ==========================
+def _worker_env(index):
+    """Per-worker file names for state that is not safe to share between processes."""
+    base, ext = os.path.splitext(os.getenv("JOURNAL_QUEUE_FILE", "journal_queue.db"))
+    os.environ["JOURNAL_QUEUE_FILE"] = f"{base}-{index}{ext}"
+    metrics_port = int(os.getenv("METRICS_PORT", "0"))
+    if metrics_port:
+        os.environ["METRICS_PORT"] = str(metrics_port + 1 + index)  # one scrape target per worker
+
+def _worker_main(index, inbox, with_jobs=False):
+    _worker_env(index)
+    setup_logging()  # spawned processes start without the parent's handlers
+    import bot  # imported here so each process builds its own clients and caches
+
+    async def run():
+        app = bot.build_application(with_jobs)
+        loop = asyncio.get_running_loop()
+        async with app:
+            if app.post_init:
+                await app.post_init(app)  # metrics on this worker's METRICS_PORT (see _worker_env)
+            await app.start()
+            logger.info(f"👷 Worker {index} ready (pid {os.getpid()})")
+            while True:
+                # Leave the backlog in the shared queue, where a restarted worker picks it up.
+                while app.update_queue.qsize() >= WORKER_PREFETCH:
+                    await asyncio.sleep(0.05)
+                data = await loop.run_in_executor(None, inbox.get)
+                if data is None:
+                    break
+                await app.update_queue.put(Update.de_json(data, app.bot))
+            await app.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+# ==========================
+# 📥 INGRESS (PARENT PROCESS)
+# ==========================
+async def _poll(router):
+    """Long-poll Telegram and hand every update to its shard."""
+    async with Bot(TELEGRAM_TOKEN) as telegram:
+        await telegram.delete_webhook()
+        offset = None
+        while True:
+            if router.qsize() >= WORKER_MAX_BACKLOG:
+                await asyncio.sleep(0.5)
+                continue
+            try:
+                updates = await telegram.get_updates(
+                    offset=offset, timeout=POLL_TIMEOUT, allowed_updates=Update.ALL_TYPES,
+                    read_timeout=POLL_TIMEOUT + 10,
+                )
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except NetworkError as e:
+                logger.warning(f"⚠️ getUpdates failed, retrying: {e}")
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                router.put_nowait(update)
+                offset = update.update_id + 1
+
+async def _webhook(router):
+    import webhook
+    async with Bot(TELEGRAM_TOKEN) as telegram:
+        server = webhook.WebhookServer(SimpleNamespace(bot=telegram, update_queue=router))
+        await server.start()
+        if webhook.WEBHOOK_URL:
+            await telegram.set_webhook(
+                url=webhook.WEBHOOK_URL.rstrip("/") + webhook.WEBHOOK_PATH,
+                secret_token=webhook.WEBHOOK_SECRET or None,
+                max_connections=webhook.WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        await asyncio.Event().wait()
+
+# ==========================
+# 🧭 SUPERVISOR
+# ==========================
+def run_workers(workers=BOT_WORKERS, mode="polling", with_jobs=False):
+    """Start ``workers`` processes and feed them from one polling or webhook ingress.
+
+    Workers that die are restarted on the same queue, so their chats keep
+    their owner and updates still waiting in it are handled by the new
+    process. Updates the dead worker had already taken (at most
+    WORKER_PREFETCH plus those being handled) are lost. With ``with_jobs``
+    the scheduled jobs (runner.register_jobs) run in worker 0 only.
+    """
+    if os.getenv("DB_BACKEND", "json").lower() != "sqlite" and workers > 1:
+        raise ValueError("❌ Several workers need DB_BACKEND=sqlite (run: python storage.py migrate).")
+
+    ctx = multiprocessing.get_context("spawn")
+    queues = [ctx.Queue() for _ in range(workers)]
+    processes = [None] * workers
+
+    def ensure_running():
+        for index, process in enumerate(processes):
+            if process is None or not process.is_alive():
+                if process is not None:
+                    logger.warning(f"♻️ Worker {index} exited ({process.exitcode}), restarting")
+                processes[index] = ctx.Process(target=_worker_main, args=(index, queues[index], with_jobs and index == 0), name=f"worker-{index}")
+                processes[index].start()
+
+    async def supervise():
+        ingress = asyncio.create_task((_webhook if mode == "webhook" else _poll)(ShardRouter(queues)))
+        while not ingress.done():
+            ensure_running()
+            await asyncio.sleep(2)
+        ingress.result()
+
+    logger.info(f"✅ Starting {workers} worker(s), {mode} ingress")
+    try:
+        asyncio.run(supervise())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for q in queues:
+            q.put(None)
+        deadline = time.monotonic() + 30
+        for process in processes:
+            if process is not None:
+                process.join(max(0, deadline - time.monotonic()))
+                if process.is_alive():
+                    process.terminate()
+
+# 🧪 Usage: python workers.py [polling|webhook]
+if __name__ == "__main__":
+    setup_logging()
+    run_workers(BOT_WORKERS, sys.argv[1] if len(sys.argv) > 1 else os.getenv("BOT_MODE", "polling"), with_jobs=True)